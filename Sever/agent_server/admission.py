@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from .metrics import LatencyStats
+
+
+class LLMOverloadedError(RuntimeError):
+    # LLM 대기열이 꽉 찼거나 최대 대기 시간을 넘김(호출 측에서 429 또는 fallback)
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(f"LLM is overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("state", "event", "loop", "future")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.state = "waiting"  # waiting | granted | abandoned
+        self.loop = loop
+        self.event: Optional[threading.Event] = None if loop else threading.Event()
+        self.future: Optional[asyncio.Future] = loop.create_future() if loop else None
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdmissionGate:
+    # LLM 호출 전용 입장 제한: 동시에 concurrency개까지만 Ollama를 부르고, 나머지는 최대 max_queue개까지 줄을 세운다.
+    # 줄이 꽉 찼거나 max_wait_seconds 안에 자리가 나지 않으면 LLMOverloadedError.
+    # 자리는 release 때 줄 맨 앞 대기자에게 바로 넘긴다(FIFO). 비동기(이벤트 루프)와 동기(스레드) 호출을 같이 받는다.
+    def __init__(
+        self,
+        concurrency: int = 4,
+        max_queue: int = 64,
+        max_wait_seconds: float = 5.0,
+        wait_stats: Optional[LatencyStats] = None,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = threading.Lock()
+        self._waiters: Deque[_Waiter] = deque()
+        self.active = 0
+        self.peak_queue = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        # 여러 게이트(백엔드마다 하나)가 대기 시간 분포를 같이 쓸 수 있다.
+        self.wait = wait_stats if wait_stats is not None else LatencyStats()
+
+    def _enter(self, waiter_factory) -> Optional[_Waiter]:
+        # 바로 들어가면 None, 줄을 서야 하면 대기자, 줄도 꽉 찼으면 예외
+        with self._lock:
+            if self.active < self.concurrency and not self._waiters:
+                self.active += 1
+                self.admitted += 1
+                return None
+            if len(self._waiters) >= self.max_queue:
+                self.shed_queue_full += 1
+                raise LLMOverloadedError("queue full", self.max_wait_seconds)
+            waiter = waiter_factory()
+            self._waiters.append(waiter)
+            self.peak_queue = max(self.peak_queue, len(self._waiters))
+            return waiter
+
+    def _settle(self, waiter: _Waiter, timed_out: bool = True) -> bool:
+        # 깨어났거나 시간이 다 됨: 자리를 받았으면 True, 아니면 줄에서 빠진다.
+        with self._lock:
+            if waiter.state == "granted":
+                self.admitted += 1
+                return True
+            if timed_out:
+                self.shed_timeout += 1
+            waiter.state = "abandoned"
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            return False
+
+    def acquire(self) -> None:
+        started = time.perf_counter()
+        waiter = self._enter(_Waiter)
+        if waiter is not None:
+            waiter.event.wait(self.max_wait_seconds)
+            if not self._settle(waiter):
+                raise LLMOverloadedError("queue timeout", self.max_wait_seconds)
+        self.wait.observe((time.perf_counter() - started) * 1000)
+
+    async def aacquire(self) -> None:
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        waiter = self._enter(lambda: _Waiter(loop))
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait_seconds)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # 요청이 취소됨: 그 사이 자리를 받았으면 다음 대기자에게 넘긴다.
+                if self._settle(waiter, timed_out=False):
+                    self.release()
+                raise
+            if not self._settle(waiter):
+                raise LLMOverloadedError("queue timeout", self.max_wait_seconds)
+        self.wait.observe((time.perf_counter() - started) * 1000)
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if waiter.state == "waiting":
+                    waiter.state = "granted"
+                    waiter.wake()
+                    return
+            self.active -= 1
+
+    def outstanding(self) -> int:
+        # 들어간 호출 + 줄 선 호출. 라우팅(매 요청)용이라 락이나 지연 분포 계산 없이 O(1)로 읽는다(약간 늦은 값이어도 된다).
+        return self.active + len(self._waiters)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {
+                "concurrency": self.concurrency,
+                "active": self.active,
+                "queue_depth": len(self._waiters),
+                "peak_queue_depth": self.peak_queue,
+                "max_queue": self.max_queue,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 1),
+                "admitted": self.admitted,
+                "shed_queue_full": self.shed_queue_full,
+                "shed_timeout": self.shed_timeout,
+            }
+        out["wait"] = self.wait.stats()
+        return out
@@ -1,21 +1,185 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import os
-from typing import Any, Dict, Optional
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
-import requests
+import httpx
 
-from .prompt_packs import CATEGORY_DOMAIN_BY_ID, CATEGORY_NAME_BY_ID, resolve_mode
+from .admission import AdmissionGate, LLMOverloadedError
+from .backends import BackendPool, OllamaBackend
+from .breaker import CLOSED, HALF_OPEN, CircuitBreaker
+from .cache import TTLCache
+from .metrics import LatencyStats
+from .prompt_packs import CATEGORY_DOMAIN_BY_ID, CATEGORY_NAME_BY_ID, PROMPT_PACKS, resolve_mode
+
+
+# 시스템 프롬프트는 (카테고리, 모드)마다 고정이라 시작할 때 한 번만 만든다.
+# Ollama(llama.cpp)는 직전 요청과 토큰이 같은 앞부분까지 KV 캐시를 재사용하므로, 모든 카테고리에 공통인
+# 지시문을 맨 앞에, 도메인별 응답 형식을 그다음에, 카테고리/모드별 내용을 맨 뒤에 둔다.
+_COMMON_INSTRUCTIONS = (
+    "너는 카테고리 전용 AI 에이전트다. 한국어로 간결히 답해라. "
+    "추천 결과 컨텍스트가 주어지면 추상적인 설명 대신, "
+    "실제 후보 수(몇 건)와 상위 후보의 제목/상태/가격(또는 핵심 조건)을 구체적으로 설명하라. "
+    "리스트에 없는 정보를 꾸며내지 마라. "
+)
+_MARKET_FIND_FORMAT = (
+    "응답 형식: 1) 검색 결과 요약(몇 건, 핵심 키워드) "
+    "2) 상위 매물 2~3개를 항목으로 설명 "
+    "3) 바로 선택/비교할 수 있는 다음 질문 1개."
+)
+_DEFAULT_FORMAT = "응답 형식: 1) 핵심요약 1문장 2) 다음 행동 1~2개 3) 필요한 추가질문 1개."
+
+
+def _system_prompt(category_id: str, mode_id: str, mode_meta: Dict[str, str]) -> str:
+    category_name = CATEGORY_NAME_BY_ID.get(category_id, "친구 만들기")
+    category_domain = CATEGORY_DOMAIN_BY_ID.get(category_id, "people")
+    response_format = _MARKET_FIND_FORMAT if mode_id == "find" and category_domain == "market" else _DEFAULT_FORMAT
+    return (
+        f"{_COMMON_INSTRUCTIONS}"
+        f"{response_format} "
+        f"카테고리: {category_name}. "
+        f"현재 모드: {mode_meta['title']}({mode_id}). "
+        f"모드 설명: {mode_meta['description']}. "
+        f"입력 힌트: {mode_meta['prompt_hint']}. "
+        f"모드 지시: {mode_meta['system_prompt']}"
+    )
+
+
+SYSTEM_PROMPTS: Dict[Tuple[str, str], str] = {
+    (category_id, mode_id): _system_prompt(category_id, mode_id, mode_meta)
+    for category_id, pack in PROMPT_PACKS.items()
+    for mode_id, mode_meta in pack["modes"].items()
+}
+
+
+class _Flight:
+    # 진행 중인 동기 Ollama 호출 하나. 같은 지문으로 온 다른 스레드는 done을 기다렸다가 result를 같이 쓴다.
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[LLMOverloadedError] = None
 
 
 class AIEngine:
     def __init__(self) -> None:
-        self.ollama_base = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
+        # OLLAMA_BASE_URLS(쉼표 구분)로 Ollama 인스턴스 여러 개를 줄 수 있다. 없으면 OLLAMA_BASE_URL 하나.
+        base_urls = [url.strip() for url in os.getenv("OLLAMA_BASE_URLS", "").split(",") if url.strip()]
+        if not base_urls:
+            base_urls = [os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")]
+        self.ollama_base = base_urls[0]
         # 기본값은 로컬 무료 사용에 유리한 경량 모델로 둔다.
         self.ollama_model = os.getenv("OLLAMA_MODEL", "llama3.2:1b")
-        # 첫 요청(콜드 스타트)은 시간이 걸릴 수 있어 여유 있게 설정.
+        # 첫 요청(콜드 스타트)은 시간이 걸릴 수 있어 여유 있게 설정(응답 읽기 기준).
         self.timeout = float(os.getenv("OLLAMA_TIMEOUT", "30"))
+        # 콜드 스타트를 사용자 대신 서버 시작 때 치른다: 모델을 미리 올리고(warm-up) 주기적으로 keep_alive를 갱신한다.
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        self.warmup_enabled = os.getenv("OLLAMA_WARMUP", "1").strip() not in {"0", "false", "no"}
+        self.warmup_timeout = float(os.getenv("OLLAMA_WARMUP_TIMEOUT", "120"))
+        self.ping_interval = float(os.getenv("OLLAMA_PING_INTERVAL", "120"))
+        # 응답의 load_duration이 이보다 길면 모델을 새로 올린(콜드) 요청으로 센다.
+        self.cold_load_ms = float(os.getenv("OLLAMA_COLD_LOAD_MS", "500"))
+        self.warmed_at: Optional[float] = None
+        self.last_ping_at: Optional[float] = None
+        self._keepalive_task: Optional["asyncio.Task[None]"] = None
+        self._model_counts: Counter = Counter()
+        self._model_lock = threading.Lock()
+        self.cold_load = LatencyStats()
+        self.prompt_eval = LatencyStats()
+        self.warmup_duration = LatencyStats()
+        # 연결 자체가 안 되면(서버 꺼짐 등) 오래 기다리지 않고 바로 fallback 한다.
+        self.connect_timeout = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "3"))
+        self.max_connections = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "128"))
+        # httpcore 풀은 요청을 배정할 때 유휴 연결을 매번 전부 훑으므로, 유휴(keep-alive) 연결 수는 작게 둔다.
+        self.max_keepalive = int(os.getenv("OLLAMA_MAX_KEEPALIVE", "16"))
+        # 백엔드마다 연결 풀(동기 requests.Session + httpx.AsyncClient), 차단기, 입장 제한을 따로 둔다.
+        # 차단기: Ollama가 죽었거나 과부하면 연속 실패 후 열어, 타임아웃까지 기다리지 않고 바로 fallback 한다.
+        # 입장 제한: 인스턴스가 동시에 생성할 수 있는 수(OLLAMA_NUM_PARALLEL)만큼만 보내고 나머지는 줄을 세운다.
+        # 줄이 꽉 차거나 오래 기다리면 LLM_SHED_MODE에 따라 fallback 문장(fallback) 또는 429(reject)로 돌려보낸다.
+        admission_wait = LatencyStats()
+        self.pool = BackendPool(
+            [
+                OllamaBackend(
+                    base_url,
+                    breaker=CircuitBreaker(
+                        failure_threshold=int(os.getenv("OLLAMA_BREAKER_FAILURES", "5")),
+                        cooldown_seconds=float(os.getenv("OLLAMA_BREAKER_COOLDOWN", "10")),
+                        max_probes=int(os.getenv("OLLAMA_BREAKER_PROBES", "1")),
+                    ),
+                    admission=AdmissionGate(
+                        concurrency=int(os.getenv("LLM_CONCURRENCY", "4")),
+                        max_queue=int(os.getenv("LLM_QUEUE_MAX", "64")),
+                        max_wait_seconds=float(os.getenv("LLM_QUEUE_WAIT_MS", "5000")) / 1000,
+                        wait_stats=admission_wait,
+                    ),
+                    timeout=self.timeout,
+                    connect_timeout=self.connect_timeout,
+                    max_connections=self.max_connections,
+                    max_keepalive=self.max_keepalive,
+                )
+                for base_url in base_urls
+            ]
+        )
+        # 백엔드가 여러 개면 OLLAMA_HEALTH_INTERVAL초마다 /api/ps로 확인해 응답 없는 곳을 라우팅에서 뺀다.
+        self.health_interval = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "5"))
+        self._health_task: Optional["asyncio.Task[None]"] = None
+        self.shed_mode = "reject" if os.getenv("LLM_SHED_MODE", "fallback").strip() == "reject" else "fallback"
+        # 동기 경로(OLLAMA_ASYNC=0) 전용 스레드. 기본 스레드풀(/categories, /actions 등)과 나눠 쓴다.
+        self.executor = ThreadPoolExecutor(
+            max_workers=sum(
+                backend.admission.concurrency + backend.admission.max_queue for backend in self.pool.backends
+            ),
+            thread_name_prefix="llm",
+        )
+        # 같은 모델/시스템 프롬프트/사용자 메시지(추천 문맥 포함)면 Ollama를 다시 부르지 않고 이전 답을 쓴다.
+        # LLM_CACHE_SIZE=0이면 끄고, LLM_CACHE_DISABLED_DOMAINS(예: "people,sport")로 도메인별로 끌 수 있다.
+        cache_size = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+        self._reply_cache: Optional[TTLCache] = None
+        if cache_size > 0:
+            self._reply_cache = TTLCache(
+                max_entries=cache_size,
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "600")),
+                max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(4 * 1024 * 1024))),
+                sizeof=lambda text: len(text.encode("utf-8")),
+            )
+        self.cache_disabled_domains = {
+            domain.strip() for domain in os.getenv("LLM_CACHE_DISABLED_DOMAINS", "").split(",") if domain.strip()
+        }
+        self._cache_counts: Dict[str, Counter] = {}
+        self._cache_counts_lock = threading.Lock()
+        # 같은 지문의 요청이 동시에 들어오면 Ollama 호출 하나를 같이 기다린다(LLM_COALESCE=0이면 끔).
+        self.coalesce = os.getenv("LLM_COALESCE", "1").strip() not in {"0", "false", "no"}
+        self._sync_flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+        self._flight_counts: Counter = Counter()
+        self._flight_lock = threading.Lock()
+
+    @property
+    def model_warm(self) -> bool:
+        # 백엔드 하나라도 모델이 올라가 있으면 첫 요청을 콜드 스타트 없이 받을 수 있다.
+        return any(backend.model_warm for backend in self.pool.backends)
+
+    async def aclose(self) -> None:
+        for task in (self._keepalive_task, self._health_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._keepalive_task = None
+        self._health_task = None
+        for backend in self.pool.backends:
+            await backend.aclose()
 
     def reply(
         self,
@@ -24,67 +188,562 @@ class AIEngine:
         mode: Optional[str] = "find",
         action_context: Optional[str] = None,
         recommendation_context: Optional[str] = None,
+        reject_when_busy: bool = False,
     ) -> str:
-        # 1) 로컬 무료 AI(Ollama) 우선
-        text = self._reply_with_ollama(
+        # reject_when_busy: 대기열이 넘칠 때 LLM_SHED_MODE=reject이면 LLMOverloadedError를 올린다(아니면 fallback).
+        payload = self._chat_payload(
             category_id=category_id,
             message=message,
             mode=mode,
             action_context=action_context,
             recommendation_context=recommendation_context,
         )
+        fingerprint = self._fingerprint(payload)
+        cached = self._cached_reply(category_id, fingerprint)
+        if cached:
+            return cached
+        # 1) 로컬 무료 AI(Ollama) 우선. 같은 질문이 이미 진행 중이면 그 호출 결과를 같이 받는다.
+        try:
+            text = self._join_flight(fingerprint, lambda: self._fetch_reply(category_id, fingerprint, payload))
+        except LLMOverloadedError:
+            if reject_when_busy and self.shed_mode == "reject":
+                raise
+            text = None
         if text:
             return text
         # 2) 실패 시 안전한 fallback
         return self._fallback(category_id, mode)
 
-    def _reply_with_ollama(
+    async def areply(
+        self,
+        category_id: Optional[str],
+        message: str,
+        mode: Optional[str] = "find",
+        action_context: Optional[str] = None,
+        recommendation_context: Optional[str] = None,
+        reject_when_busy: bool = False,
+    ) -> str:
+        # reply()의 비동기 버전: Ollama 응답을 기다리는 동안 워커 스레드를 잡고 있지 않는다.
+        payload = self._chat_payload(
+            category_id=category_id,
+            message=message,
+            mode=mode,
+            action_context=action_context,
+            recommendation_context=recommendation_context,
+        )
+        fingerprint = self._fingerprint(payload)
+        cached = self._cached_reply(category_id, fingerprint)
+        if cached:
+            return cached
+        try:
+            text = await self._ajoin_flight(fingerprint, lambda: self._afetch_reply(category_id, fingerprint, payload))
+        except LLMOverloadedError:
+            if reject_when_busy and self.shed_mode == "reject":
+                raise
+            text = None
+        if text:
+            return text
+        return self._fallback(category_id, mode)
+
+    async def astream_reply(
+        self,
+        category_id: Optional[str],
+        message: str,
+        mode: Optional[str] = "find",
+        action_context: Optional[str] = None,
+        recommendation_context: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        # Ollama stream 응답(줄 단위 JSON)을 받은 조각 그대로 흘려보낸다.
+        # 첫 조각 전에 실패하면 fallback 문장 하나로 대신하고, 도중에 끊기면 받은 데까지만 보낸다.
+        payload = self._chat_payload(
+            category_id=category_id,
+            message=message,
+            mode=mode,
+            action_context=action_context,
+            recommendation_context=recommendation_context,
+        )
+        fingerprint = self._fingerprint(payload)
+        cached = self._cached_reply(category_id, fingerprint)
+        if cached:
+            yield cached
+            return
+        flight = self._async_flights.get(fingerprint) if self.coalesce else None
+        if flight is not None:
+            # 같은 질문을 이미 생성 중이면 새로 부르지 않고 완성된 답을 한 조각으로 받는다.
+            self._count_flight("coalesced")
+            try:
+                text = await asyncio.shield(flight)
+            except Exception:
+                # 대표 호출이 입장 제한(LLMOverloadedError) 등으로 실패해도 이미 추천 목록을 보낸 스트림이므로
+                # 직접 호출할 때처럼 fallback 문장으로 답하고 정상 종료한다.
+                text = None
+            yield text or self._fallback(category_id, mode)
+            return
+        self._count_flight("upstream_calls")
+        if self.coalesce:
+            # 이 스트림이 대표 호출이 된다. 끝나면(실패/중단 포함) 기다리던 요청에 결과를 넘긴다.
+            flight = asyncio.get_running_loop().create_future()
+            self._async_flights[fingerprint] = flight
+        payload["stream"] = True
+        pieces: List[str] = []
+        sent = False
+        done = False
+        admitted = False
+        # 차단기를 통과한 뒤 아직 성공/실패를 알리지 않았으면 True.
+        # 첫 줄을 제대로 받으면 Ollama는 살아 있는 것으로 본다(이후 끊김은 차단기에 반영하지 않는다).
+        pending = False
+        backend = self.pool.pick()
+        started = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            if backend is None:
+                raise LLMOverloadedError("no backend", 0.0)
+            # 스트림은 이미 추천 목록을 보낸 뒤라 대기열이 넘쳐도 429 대신 fallback 문장으로 답한다.
+            await backend.admission.aacquire()
+            admitted = True
+            if backend.breaker.allow():
+                pending = True
+                started = time.perf_counter()
+                async with backend.client().stream("POST", "/api/chat", json=payload) as res:
+                    if res.status_code != 200:
+                        pending = False
+                        error = f"HTTP {res.status_code}"
+                        backend.breaker.record_failure(error)
+                    else:
+                        async for line in res.aiter_lines():
+                            if not line.strip():
+                                continue
+                            data = json.loads(line)
+                            if pending:
+                                pending = False
+                                backend.breaker.record_success()
+                            piece = data.get("message", {}).get("content", "")
+                            if not sent:
+                                piece = piece.lstrip()
+                            if piece:
+                                sent = True
+                                pieces.append(piece)
+                                yield piece
+                            if data.get("done"):
+                                done = True
+                                self._observe_load(backend, data)
+                                break
+        except LLMOverloadedError:
+            pass
+        except Exception as exc:
+            error = type(exc).__name__
+            if pending:
+                pending = False
+                backend.breaker.record_failure(error)
+        finally:
+            if pending:
+                # 결과를 보기 전에 요청이 취소됨
+                backend.breaker.release()
+            if admitted:
+                backend.admission.release()
+                if done or error:
+                    backend.observe((time.perf_counter() - started) * 1000, error)
+            # 끝까지 받은 답만 캐시/공유한다(도중에 끊긴 답은 버린다).
+            text = "".join(pieces).strip() if sent and done else None
+            if text:
+                self._store_reply(category_id, fingerprint, text)
+            if flight is not None:
+                if self._async_flights.get(fingerprint) is flight:
+                    del self._async_flights[fingerprint]
+                if not flight.done():
+                    flight.set_result(text)
+        if not sent:
+            yield self._fallback(category_id, mode)
+
+    @staticmethod
+    def _fingerprint(payload: Dict[str, Any]) -> str:
+        # stream 여부와 무관하게 같은 답이므로 모델/메시지/옵션만으로 만든다.
+        raw = json.dumps(
+            [payload["model"], payload["messages"], payload.get("options")], ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _cache_enabled(self, category_key: str) -> bool:
+        return self._reply_cache is not None and (
+            CATEGORY_DOMAIN_BY_ID.get(category_key, "people") not in self.cache_disabled_domains
+        )
+
+    def _cached_reply(self, category_id: Optional[str], fingerprint: str) -> Optional[str]:
+        category_key = category_id or "friend"
+        if not self._cache_enabled(category_key):
+            self._count_cache(category_key, "bypass")
+            return None
+        cached = self._reply_cache.get(fingerprint)
+        self._count_cache(category_key, "hits" if cached else "misses")
+        return cached
+
+    def _store_reply(self, category_id: Optional[str], fingerprint: str, text: str) -> None:
+        if text and self._cache_enabled(category_id or "friend"):
+            self._reply_cache.set(fingerprint, text)
+
+    def reply_fingerprint(
+        self,
+        category_id: Optional[str],
+        message: str,
+        mode: Optional[str] = "find",
+        action_context: Optional[str] = None,
+        recommendation_context: Optional[str] = None,
+    ) -> str:
+        # reply()/areply()가 같은 답을 낼 요청인지 가르는 키(답변 캐시/single-flight와 같은 기준)
+        return self._fingerprint(
+            self._chat_payload(category_id, message, mode, action_context, recommendation_context)
+        )
+
+    def is_fallback(self, category_id: Optional[str], mode: Optional[str], text: str) -> bool:
+        # reply()/areply()가 LLM 답 대신 돌려준 fallback 문장인지
+        return text == self._fallback(category_id, mode)
+
+    def _count_cache(self, category_key: str, outcome: str) -> None:
+        with self._cache_counts_lock:
+            self._cache_counts.setdefault(category_key, Counter())[outcome] += 1
+
+    def cache_stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"enabled": self._reply_cache is not None}
+        if self._reply_cache is not None:
+            out.update(self._reply_cache.stats())
+        out["disabled_domains"] = sorted(self.cache_disabled_domains)
+        with self._cache_counts_lock:
+            counts = {category_key: dict(counter) for category_key, counter in self._cache_counts.items()}
+        by_category: Dict[str, Dict[str, Any]] = {}
+        for category_key, counter in sorted(counts.items()):
+            hits = counter.get("hits", 0)
+            lookups = hits + counter.get("misses", 0)
+            by_category[category_key] = {
+                "hits": hits,
+                "misses": counter.get("misses", 0),
+                "bypass": counter.get("bypass", 0),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+        out["by_category"] = by_category
+        return out
+
+    def _join_flight(self, fingerprint: str, fetch: Callable[[], Optional[str]]) -> Optional[str]:
+        # 동기 경로(스레드) single-flight: 먼저 온 스레드만 Ollama를 부르고 나머지는 그 결과를 기다린다.
+        if not self.coalesce:
+            self._count_flight("upstream_calls")
+            return fetch()
+        with self._flight_lock:
+            flight = self._sync_flights.get(fingerprint)
+            leader = flight is None
+            if leader:
+                flight = self._sync_flights[fingerprint] = _Flight()
+        self._count_flight("upstream_calls" if leader else "coalesced")
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fetch()
+        except LLMOverloadedError as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._flight_lock:
+                del self._sync_flights[fingerprint]
+            flight.done.set()
+        return flight.result
+
+    async def _ajoin_flight(self, fingerprint: str, fetch: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        # 비동기 경로 single-flight. 공유 호출은 별도 task로 돌려, 기다리던 요청 하나가 취소돼도
+        # (클라이언트 끊김) 나머지 요청은 결과를 받는다.
+        if not self.coalesce:
+            self._count_flight("upstream_calls")
+            return await fetch()
+        flight = self._async_flights.get(fingerprint)
+        if flight is None:
+            flight = asyncio.ensure_future(fetch())
+            self._async_flights[fingerprint] = flight
+            flight.add_done_callback(lambda done: self._drop_async_flight(fingerprint, done))
+            self._count_flight("upstream_calls")
+        else:
+            self._count_flight("coalesced")
+        return await asyncio.shield(flight)
+
+    def _drop_async_flight(self, fingerprint: str, flight: "asyncio.Future[Optional[str]]") -> None:
+        if self._async_flights.get(fingerprint) is flight:
+            del self._async_flights[fingerprint]
+
+    def _count_flight(self, outcome: str) -> None:
+        with self._flight_lock:
+            self._flight_counts[outcome] += 1
+
+    def coalesce_stats(self) -> Dict[str, Any]:
+        with self._flight_lock:
+            upstream = self._flight_counts["upstream_calls"]
+            coalesced = self._flight_counts["coalesced"]
+            in_flight = len(self._sync_flights)
+        in_flight += len(self._async_flights)
+        total = upstream + coalesced
+        return {
+            "enabled": self.coalesce,
+            "upstream_calls": upstream,
+            "coalesced": coalesced,
+            "coalesced_rate": round(coalesced / total, 4) if total else 0.0,
+            "in_flight": in_flight,
+        }
+
+    def _fetch_reply(self, category_id: Optional[str], fingerprint: str, payload: Dict[str, Any]) -> Optional[str]:
+        text = self._reply_with_ollama(payload)
+        if text:
+            self._store_reply(category_id, fingerprint, text)
+        return text
+
+    async def _afetch_reply(self, category_id: Optional[str], fingerprint: str, payload: Dict[str, Any]) -> Optional[str]:
+        # 공유 호출이 끝나기 전에 캐시에 넣어, 뒤이어 오는 요청은 캐시에서 바로 받게 한다.
+        backend = self.pool.pick()
+        if backend is None:
+            return None
+        await backend.admission.aacquire()
+        try:
+            if not backend.breaker.allow():
+                return None
+            started = time.perf_counter()
+            try:
+                res = await backend.client().post("/api/chat", json=payload)
+                data = res.json() if res.status_code == 200 else None
+            except Exception as exc:
+                backend.observe((time.perf_counter() - started) * 1000, type(exc).__name__)
+                backend.breaker.record_failure(type(exc).__name__)
+                return None
+            except BaseException:
+                backend.breaker.release()
+                raise
+        finally:
+            backend.admission.release()
+        text = self._judge_reply(backend, res.status_code, data, (time.perf_counter() - started) * 1000)
+        if text:
+            self._store_reply(category_id, fingerprint, text)
+        return text
+
+    def _reply_with_ollama(self, payload: Dict[str, Any]) -> Optional[str]:
+        backend = self.pool.pick()
+        if backend is None:
+            return None
+        backend.admission.acquire()
+        try:
+            if not backend.breaker.allow():
+                return None
+            started = time.perf_counter()
+            try:
+                res = backend.session.post(
+                    f"{backend.base_url}/api/chat",
+                    headers={"Content-Type": "application/json"},
+                    data=json.dumps(payload),
+                    timeout=(self.connect_timeout, self.timeout),
+                )
+                data = res.json() if res.status_code == 200 else None
+            except Exception as exc:
+                backend.observe((time.perf_counter() - started) * 1000, type(exc).__name__)
+                backend.breaker.record_failure(type(exc).__name__)
+                return None
+        finally:
+            backend.admission.release()
+        return self._judge_reply(backend, res.status_code, data, (time.perf_counter() - started) * 1000)
+
+    def _judge_reply(
+        self, backend: OllamaBackend, status_code: int, data: Optional[Dict[str, Any]], elapsed_ms: float
+    ) -> Optional[str]:
+        # 200이 아니면 Ollama 쪽 실패로 본다. 200인데 내용이 비었으면 Ollama는 정상, 답만 fallback.
+        if status_code != 200:
+            backend.observe(elapsed_ms, f"HTTP {status_code}")
+            backend.breaker.record_failure(f"HTTP {status_code}")
+            return None
+        backend.observe(elapsed_ms)
+        backend.breaker.record_success()
+        self._observe_load(backend, data)
+        return self._parse_reply(status_code, data)
+
+    def _observe_load(self, backend: OllamaBackend, data: Optional[Dict[str, Any]]) -> None:
+        # Ollama 응답의 load_duration(ns)으로 이 요청이 모델 로딩을 기다렸는지(콜드) 판단한다.
+        if data and "prompt_eval_duration" in data:
+            # 프롬프트 처리 시간: 시스템 프롬프트 앞부분이 Ollama KV 캐시에 걸리면 짧아진다.
+            self.prompt_eval.observe(data["prompt_eval_duration"] / 1e6)
+        if not data or "load_duration" not in data:
+            return
+        load_ms = data["load_duration"] / 1e6
+        cold = load_ms >= self.cold_load_ms
+        with self._model_lock:
+            self._model_counts["requests_cold" if cold else "requests_warm"] += 1
+        if cold:
+            self.cold_load.observe(load_ms)
+        # 어느 쪽이든 지금은 이 백엔드에 모델이 올라가 있다.
+        backend.model_warm = True
+
+    def start_keepalive(self) -> None:
+        # 이벤트 루프 안(startup 훅)에서 부른다. 모델을 올리고, 이후 ping_interval마다 상주 여부 확인 + keep_alive 갱신.
+        if self.warmup_enabled and self._keepalive_task is None:
+            self._keepalive_task = asyncio.get_running_loop().create_task(self._keepalive_loop())
+
+    async def _keepalive_loop(self) -> None:
+        while True:
+            ok = await self.ping_model()
+            # 아직 못 올렸으면(Ollama 꺼짐 등) 더 자주 다시 시도한다.
+            await asyncio.sleep(self.ping_interval if ok else min(self.ping_interval, 10.0))
+
+    async def ping_model(self) -> bool:
+        # 모든 백엔드에 모델을 올리고 keep_alive를 갱신한다. 하나라도 실패하면 False(더 자주 다시 시도).
+        results = await asyncio.gather(*(self._ping_backend(backend) for backend in self.pool.backends))
+        return all(results)
+
+    async def _ping_backend(self, backend: OllamaBackend) -> bool:
+        # /api/ps로 모델이 올라가 있는지 보고, 올라가 있으면 keep_alive만 갱신(빈 messages),
+        # 내려가 있으면 1토큰짜리 생성으로 다시 올린다.
+        client = backend.client()
+        try:
+            resident = await self._model_resident(client)
+            if resident:
+                res = await client.post(
+                    "/api/chat",
+                    json={"model": self.ollama_model, "messages": [], "keep_alive": self.keep_alive},
+                )
+                res.raise_for_status()
+            else:
+                backend.model_warm = False
+                started = time.perf_counter()
+                res = await client.post(
+                    "/api/chat",
+                    json={
+                        "model": self.ollama_model,
+                        "messages": [{"role": "user", "content": "hi"}],
+                        "stream": False,
+                        "keep_alive": self.keep_alive,
+                        "options": {"num_predict": 1},
+                    },
+                    timeout=httpx.Timeout(self.warmup_timeout, connect=self.connect_timeout),
+                )
+                res.raise_for_status()
+                self.warmup_duration.observe((time.perf_counter() - started) * 1000)
+                self.warmed_at = time.time()
+                with self._model_lock:
+                    self._model_counts["warmups"] += 1
+        except Exception:
+            backend.model_warm = False
+            with self._model_lock:
+                self._model_counts["ping_failures"] += 1
+            return False
+        backend.model_warm = True
+        self.last_ping_at = time.time()
+        with self._model_lock:
+            self._model_counts["pings"] += 1
+        return True
+
+    def start_health_checks(self) -> None:
+        # 이벤트 루프 안(startup 훅)에서 부른다. 백엔드가 하나면 차단기만으로 충분해 돌리지 않는다.
+        if len(self.pool) > 1 and self.health_interval > 0 and self._health_task is None:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.gather(*(self.check_backend(backend) for backend in self.pool.backends))
+            await asyncio.sleep(self.health_interval)
+
+    async def check_backend(self, backend: OllamaBackend) -> bool:
+        # 가벼운 GET /api/ps가 연결 타임아웃 안에 200이면 정상. 실패하면 다음 확인까지 라우팅에서 뺀다.
+        try:
+            res = await backend.client().get("/api/ps", timeout=httpx.Timeout(self.connect_timeout))
+            res.raise_for_status()
+        except Exception as exc:
+            backend.mark_checked(False, type(exc).__name__)
+            return False
+        backend.mark_checked(True)
+        return True
+
+    async def _model_resident(self, client: httpx.AsyncClient) -> bool:
+        try:
+            res = await client.get("/api/ps")
+            res.raise_for_status()
+            models = res.json().get("models") or []
+        except Exception:
+            return False
+        names = {self.ollama_model, f"{self.ollama_model}:latest"}
+        return any(item.get("name") in names or item.get("model") in names for item in models)
+
+    def model_stats(self) -> Dict[str, Any]:
+        with self._model_lock:
+            counts = dict(self._model_counts)
+        warm = counts.get("requests_warm", 0)
+        cold = counts.get("requests_cold", 0)
+        return {
+            "ready": self.model_warm,
+            "warmup_enabled": self.warmup_enabled,
+            "keep_alive": self.keep_alive,
+            "warmed_at": self.warmed_at,
+            "last_ping_at": self.last_ping_at,
+            "warmups": counts.get("warmups", 0),
+            "pings": counts.get("pings", 0),
+            "ping_failures": counts.get("ping_failures", 0),
+            "requests_warm": warm,
+            "requests_cold": cold,
+            "cold_rate": round(cold / (warm + cold), 4) if warm + cold else 0.0,
+            "cold_load": self.cold_load.stats(),
+            "warmup_duration": self.warmup_duration.stats(),
+            "prompt_eval": self.prompt_eval.stats(),
+        }
+
+    def admission_stats(self) -> Dict[str, Any]:
+        return {"shed_mode": self.shed_mode, **self.pool.admission_stats()}
+
+    def breaker_stats(self) -> Dict[str, Any]:
+        return self.pool.breaker_stats()
+
+    def backend_stats(self) -> Dict[str, Any]:
+        return {"health_interval": self.health_interval, **self.pool.stats()}
+
+    def health(self) -> Dict[str, Any]:
+        breaker = self.breaker_stats()
+        status = {CLOSED: "ok", HALF_OPEN: "recovering"}.get(breaker["state"], "down")
+        out = {
+            "status": status,
+            # 모델이 미리 올라가 있어 첫 요청도 콜드 스타트 없이 답할 수 있으면 True
+            "ready": self.model_warm,
+            "base_url": self.ollama_base,
+            "model": self.ollama_model,
+            "breaker": breaker,
+            "model_state": self.model_stats(),
+        }
+        if len(self.pool) > 1:
+            out["backends"] = [
+                {"base_url": backend.base_url, "routable": backend.routable(), "ready": backend.model_warm}
+                for backend in self.pool.backends
+            ]
+        return out
+
+    @staticmethod
+    def _parse_reply(status_code: int, data: Optional[Dict[str, Any]]) -> Optional[str]:
+        if status_code != 200 or not data:
+            return None
+        content = data.get("message", {}).get("content", "").strip()
+        return content or None
+
+    def _chat_payload(
         self,
         category_id: Optional[str],
         message: str,
         mode: Optional[str],
         action_context: Optional[str],
         recommendation_context: Optional[str],
-    ) -> Optional[str]:
+    ) -> Dict[str, Any]:
         category_key = category_id or "friend"
-        mode_id, mode_meta = resolve_mode(category_key, mode)
-        category_name = CATEGORY_NAME_BY_ID.get(category_key, "친구 만들기")
-        category_domain = CATEGORY_DOMAIN_BY_ID.get(category_key, "people")
+        mode_id, _ = resolve_mode(category_key, mode)
+        system_prompt = SYSTEM_PROMPTS.get((category_key, mode_id)) or SYSTEM_PROMPTS[("friend", mode_id)]
 
-        user_message = message
-        if action_context:
-            user_message = f"{message}\n\n[ActionResult]\n{action_context}"
+        # 여러 요청이 공유하는 문맥(추천 결과, 등록 결과)을 앞에, 사용자마다 다른 요청 문장을 맨 뒤에 둔다.
+        sections = []
         if recommendation_context:
-            user_message = f"{user_message}\n\n[RecommendationContext]\n{recommendation_context}"
-
-        mode_specific = (
-            "추천 결과 컨텍스트가 주어지면 추상적인 설명 대신, "
-            "실제 후보 수(몇 건)와 상위 후보의 제목/상태/가격(또는 핵심 조건)을 구체적으로 설명하라. "
-            "리스트에 없는 정보를 꾸며내지 마라."
-        )
-        if mode_id == "find" and category_domain == "market":
-            response_format = (
-                "응답 형식: 1) 검색 결과 요약(몇 건, 핵심 키워드) "
-                "2) 상위 매물 2~3개를 항목으로 설명 "
-                "3) 바로 선택/비교할 수 있는 다음 질문 1개."
-            )
-        else:
-            response_format = (
-                "응답 형식: 1) 핵심요약 1문장 "
-                "2) 다음 행동 1~2개 "
-                "3) 필요한 추가질문 1개."
-            )
+            sections.append(f"[RecommendationContext]\n{recommendation_context}")
+        if action_context:
+            sections.append(f"[ActionResult]\n{action_context}")
+        user_message = message
+        if sections:
+            sections.append(f"[Request]\n{message}")
+            user_message = "\n\n".join(sections)
 
-        system_prompt = (
-            "너는 카테고리 전용 AI 에이전트다. 한국어로 간결히 답해라. "
-            f"카테고리: {category_name}. "
-            f"현재 모드: {mode_meta['title']}({mode_id}). "
-            f"모드 설명: {mode_meta['description']}. "
-            f"입력 힌트: {mode_meta['prompt_hint']}. "
-            f"모드 지시: {mode_meta['system_prompt']} "
-            f"{mode_specific} "
-            f"{response_format}"
-        )
         payload: Dict[str, Any] = {
             "model": self.ollama_model,
             "messages": [
@@ -92,21 +751,9 @@ class AIEngine:
                 {"role": "user", "content": user_message},
             ],
             "stream": False,
+            "keep_alive": self.keep_alive,
         }
-        try:
-            res = requests.post(
-                f"{self.ollama_base}/api/chat",
-                headers={"Content-Type": "application/json"},
-                data=json.dumps(payload),
-                timeout=self.timeout,
-            )
-            if res.status_code != 200:
-                return None
-            data = res.json()
-            content = data.get("message", {}).get("content", "").strip()
-            return content or None
-        except Exception:
-            return None
+        return payload
 
     def _fallback(self, category_id: Optional[str], mode: Optional[str]) -> str:
         cid = category_id or "friend"
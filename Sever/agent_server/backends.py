@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+import requests
+
+from .admission import AdmissionGate
+from .breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from .metrics import LatencyStats
+
+
+class OllamaBackend:
+    # Ollama 인스턴스 하나: 자기 연결 풀, 차단기, 입장 제한(동시 호출 수 + 대기열), 지연/오류 지표를 따로 가진다.
+    def __init__(
+        self,
+        base_url: str,
+        breaker: CircuitBreaker,
+        admission: AdmissionGate,
+        timeout: float,
+        connect_timeout: float,
+        max_connections: int,
+        max_keepalive: int,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.breaker = breaker
+        self.admission = admission
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.session = requests.Session()
+        self._async_client: Optional[httpx.AsyncClient] = None
+        # 마지막 상태 확인(/api/ps) 결과. 실패하면 다음 확인에서 살아날 때까지 라우팅에서 뺀다.
+        self.healthy = True
+        self.last_check_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.model_warm = False
+        self.latency = LatencyStats()
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def client(self) -> httpx.AsyncClient:
+        # 이벤트 루프 안에서 처음 쓸 때 만든다(워커 프로세스별, 백엔드별 1개).
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=min(self.max_keepalive, self.max_connections),
+                ),
+            )
+        return self._async_client
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def outstanding(self) -> int:
+        # 보낸 호출 + 이 백엔드 대기열에 선 호출
+        return self.admission.outstanding()
+
+    def routable(self) -> bool:
+        return self.healthy and self.breaker.available()
+
+    def observe(self, elapsed_ms: float, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._counts["requests"] += 1
+            if error:
+                self._counts["errors"] += 1
+                self.last_error = error
+        if not error:
+            self.latency.observe(elapsed_ms)
+
+    def mark_checked(self, ok: bool, error: Optional[str] = None) -> None:
+        self.last_check_at = time.time()
+        self.healthy = ok
+        if not ok:
+            self.count("health_check_failures")
+            self.last_error = error
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        requests_total = counts.get("requests", 0)
+        errors = counts.get("errors", 0)
+        admission = self.admission.stats()
+        return {
+            "base_url": self.base_url,
+            "routable": self.routable(),
+            "healthy": self.healthy,
+            "ready": self.model_warm,
+            "last_check_at": self.last_check_at,
+            "health_check_failures": counts.get("health_check_failures", 0),
+            "outstanding": admission["active"] + admission["queue_depth"],
+            "concurrency": admission["concurrency"],
+            "routed": counts.get("routed", 0),
+            "requests": requests_total,
+            "errors": errors,
+            "error_rate": round(errors / requests_total, 4) if requests_total else 0.0,
+            "last_error": self.last_error,
+            "latency": self.latency.stats(),
+            "breaker": self.breaker.stats(),
+            "admission": admission,
+        }
+
+
+class BackendPool:
+    # 여러 Ollama 인스턴스(예: NUMA 노드마다 하나) 중 밀린 호출이 가장 적은 곳으로 보낸다(least outstanding).
+    # 상태 확인에 실패했거나 차단기가 열린 백엔드는 건너뛴다. 모두 빠지면 None(호출 측 fallback).
+    def __init__(self, backends: List[OllamaBackend]) -> None:
+        self.backends = backends
+        self._rotation = itertools.count()
+        self.no_backend = 0
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def pick(self) -> Optional[OllamaBackend]:
+        if len(self.backends) == 1:
+            # 고를 곳이 없으니 그대로 보내고, 차단기/입장 제한 판단은 호출 쪽에 맡긴다.
+            self.backends[0].count("routed")
+            return self.backends[0]
+        candidates = [backend for backend in self.backends if backend.routable()]
+        if not candidates:
+            self.no_backend += 1
+            return None
+        # 동률이면 돌아가며 고르도록 시작 위치를 옮긴다(처음 몇 요청이 한 곳에 몰리지 않게).
+        offset = next(self._rotation) % len(candidates)
+        rotated = candidates[offset:] + candidates[:offset]
+        backend = min(rotated, key=lambda item: item.outstanding() / item.admission.concurrency)
+        backend.count("routed")
+        return backend
+
+    def state(self) -> str:
+        # 하나라도 정상(closed)이면 closed, 시험 중인 곳이 있으면 half_open, 모두 열렸으면 open
+        states = {backend.breaker.stats()["state"] for backend in self.backends if backend.healthy}
+        if CLOSED in states:
+            return CLOSED
+        if HALF_OPEN in states:
+            return HALF_OPEN
+        return OPEN
+
+    def breaker_stats(self) -> Dict[str, Any]:
+        per_backend = [backend.breaker.stats() for backend in self.backends]
+        if len(per_backend) == 1:
+            return per_backend[0]
+        out: Dict[str, Any] = {"state": self.state()}
+        for key in ("opened_count", "short_circuited", "successes", "failures"):
+            out[key] = sum(stats[key] for stats in per_backend)
+        out["backends"] = {backend.base_url: stats for backend, stats in zip(self.backends, per_backend)}
+        return out
+
+    def admission_stats(self) -> Dict[str, Any]:
+        per_backend = [backend.admission.stats() for backend in self.backends]
+        if len(per_backend) == 1:
+            return per_backend[0]
+        out: Dict[str, Any] = {}
+        for key in ("concurrency", "active", "queue_depth", "max_queue", "admitted", "shed_queue_full", "shed_timeout"):
+            out[key] = sum(stats[key] for stats in per_backend)
+        out["peak_queue_depth"] = max(stats["peak_queue_depth"] for stats in per_backend)
+        out["max_wait_ms"] = per_backend[0]["max_wait_ms"]
+        # 대기 시간 분포는 모든 백엔드가 같은 LatencyStats에 기록한다.
+        out["wait"] = per_backend[0]["wait"]
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "count": len(self.backends),
+            "routable": sum(1 for backend in self.backends if backend.routable()),
+            "no_backend": self.no_backend,
+            "backends": [backend.stats() for backend in self.backends],
+        }
+
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    # closed: 정상 호출. 연속 실패가 failure_threshold에 닿으면 open.
+    # open: cooldown 동안 호출하지 않고 바로 실패로 돌려준다(호출 측은 fallback). cooldown이 지나면 half_open.
+    # half_open: 시험 호출(probe)을 max_probes개까지만 보낸다. 성공하면 closed, 실패하면 다시 open.
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 10.0,
+        max_probes: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self.max_probes = max(1, max_probes)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.last_failure: Optional[str] = None
+        self.opened_count = 0
+        self.short_circuited = 0
+        self.successes = 0
+        self.failures = 0
+
+    def allow(self) -> bool:
+        # True면 호출해도 된다. 호출 뒤에는 record_success/record_failure/release 중 하나를 꼭 부른다.
+        with self._lock:
+            if self.state == OPEN:
+                if self._clock() - self.opened_at < self.cooldown_seconds:
+                    self.short_circuited += 1
+                    return False
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self.probes_in_flight >= self.max_probes:
+                    self.short_circuited += 1
+                    return False
+                self.probes_in_flight += 1
+            return True
+
+    def available(self) -> bool:
+        # allow()와 같은 판단이지만 상태를 바꾸지 않는다(라우팅에서 후보를 고를 때).
+        with self._lock:
+            if self.state == OPEN:
+                return self._clock() - self.opened_at >= self.cooldown_seconds
+            if self.state == HALF_OPEN:
+                return self.probes_in_flight < self.max_probes
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.probes_in_flight = 0
+
+    def record_failure(self, reason: str) -> None:
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_failure = reason
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+                self._open()
+            elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def release(self) -> None:
+        # 결과 없이 끝난 호출(요청 취소 등): 성공/실패로 치지 않고 probe 자리만 돌려준다.
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = self._clock()
+        self.opened_count += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = 0.0
+            if self.state == OPEN:
+                retry_in = max(0.0, self.cooldown_seconds - (self._clock() - self.opened_at))
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "cooldown_seconds": self.cooldown_seconds,
+                "retry_in_seconds": round(retry_in, 2),
+                "last_failure": self.last_failure,
+                "opened_count": self.opened_count,
+                "short_circuited": self.short_circuited,
+                "successes": self.successes,
+                "failures": self.failures,
+            }
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    # LRU + TTL 캐시. tag가 다르면(예: 보드 버전 변경) 만료된 것으로 본다.
+    # max_bytes를 주면 sizeof(value) 합계가 그 안에 들도록 오래된 것부터 내보낸다.
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 60.0,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._data: "OrderedDict[Hashable, Tuple[float, Any, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, tag: Any = None) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now or entry[1] != tag:
+                if entry is not None:
+                    del self._data[key]
+                    self.bytes -= entry[3]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key: Hashable, value: Any, tag: Any = None) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        size = self._sizeof(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[3]
+            if self.max_bytes is not None and size > self.max_bytes:
+                # 혼자서 한도를 넘는 값은 담지 않는다(다른 항목을 전부 밀어내지 않도록).
+                return
+            self._data[key] = (expires_at, tag, value, size)
+            self.bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= evicted[3]
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            out: Dict[str, Any] = {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+            if self.max_bytes is not None:
+                out.update({"bytes": self.bytes, "max_bytes": self.max_bytes, "evictions": self.evictions})
+            return out
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy는 선택 의존성: 없으면 순수 파이썬 경로만 쓴다.
+    np = None
+
+# _score_item과 같은 필드 가중치/순서를 유지해야 부동소수 결과가 같아진다.
+FIELD_WEIGHTS: Tuple[Tuple[str, float], ...] = (("title", 0.22), ("subtitle", 0.14), ("tags", 0.18))
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+def _round_cents(values: "np.ndarray") -> "np.ndarray":
+    # np.round는 x*100을 거쳐 .xx5 경계에서 파이썬 round()와 다를 수 있어, 경계값만 파이썬으로 다시 반올림한다.
+    scaled = values * 100
+    cents = np.rint(scaled)
+    ambiguous = np.nonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)[0]
+    for idx in ambiguous:
+        cents[idx] = round(round(float(values[idx]), 2) * 100)
+    return cents
+
+
+class ColumnarBoard:
+    # 카테고리 보드를 슬롯(행) 단위 컬럼으로 보관한다.
+    # - 필드별 word -> 행 번호 목록(희소 토큰-출현 행렬의 CSC 형태)
+    # - 슬롯 번호가 클수록 최신 항목이라 동점 정렬(보드 최신순)도 슬롯 번호로 처리한다.
+    # 수정/삭제는 기존 슬롯을 죽은 행으로 표시하고, 죽은 행이 많아지면 압축한다.
+    def __init__(self) -> None:
+        self.size = 0
+        self.live = 0
+        self.alive = np.zeros(64, dtype=bool)
+        self.noise = np.zeros(64, dtype=np.float64)
+        self.items: List[Optional[dict]] = []
+        self.slot_words: List[Optional[Dict[str, Set[str]]]] = []
+        self.slot_by_id: Dict[str, int] = {}
+        self.field_rows: Dict[str, Dict[str, List[int]]] = {field: {} for field, _ in FIELD_WEIGHTS}
+        self._row_arrays: Dict[Tuple[str, str], "np.ndarray"] = {}
+
+    def __len__(self) -> int:
+        return self.live
+
+    def add(self, item: dict, field_words: Dict[str, Set[str]], noise: float) -> None:
+        self.remove(item["id"])
+        if self.size >= len(self.alive):
+            self._grow()
+        slot = self.size
+        self.size += 1
+        self.live += 1
+        self.alive[slot] = True
+        self.noise[slot] = noise
+        self.items.append(item)
+        self.slot_words.append(field_words)
+        self.slot_by_id[item["id"]] = slot
+        for field, words in field_words.items():
+            rows_by_word = self.field_rows[field]
+            for word in words:
+                rows_by_word.setdefault(word, []).append(slot)
+                self._row_arrays.pop((field, word), None)
+
+    def remove(self, item_id: str) -> None:
+        slot = self.slot_by_id.pop(item_id, None)
+        if slot is None:
+            return
+        self.alive[slot] = False
+        self.items[slot] = None
+        self.slot_words[slot] = None
+        self.live -= 1
+        # 죽은 행 비율이 절반을 넘으면 살아있는 행만으로 다시 만든다.
+        if self.size > 64 and self.live * 2 < self.size:
+            self._compact()
+
+    def _grow(self) -> None:
+        capacity = max(64, len(self.alive) * 2)
+        alive = np.zeros(capacity, dtype=bool)
+        noise = np.zeros(capacity, dtype=np.float64)
+        alive[: self.size] = self.alive[: self.size]
+        noise[: self.size] = self.noise[: self.size]
+        self.alive = alive
+        self.noise = noise
+
+    def _compact(self) -> None:
+        rows = [
+            (self.items[slot], self.slot_words[slot], float(self.noise[slot]))
+            for slot in range(self.size)
+            if self.alive[slot]
+        ]
+        self.__init__()
+        for item, field_words, noise in rows:
+            self.add(item, field_words, noise)
+
+    def _rows(self, field: str, word: str) -> "np.ndarray":
+        key = (field, word)
+        rows = self._row_arrays.get(key)
+        if rows is None:
+            rows = np.asarray(self.field_rows[field].get(word, ()), dtype=np.int64)
+            self._row_arrays[key] = rows
+        return rows
+
+    def _field_hits(self, field: str, words: Iterable[str]) -> "np.ndarray":
+        mask = np.zeros(self.size, dtype=bool)
+        rows_by_word = self.field_rows[field]
+        for word in words:
+            if word in rows_by_word:
+                mask[self._rows(field, word)] = True
+        return mask
+
+    def rank(
+        self,
+        query_tokens: List[str],
+        words_containing: Callable[[str], Iterable[str]],
+        base: float,
+        limit: int,
+    ) -> Tuple[List[Tuple[float, int, dict]], bool]:
+        # _score_item을 카테고리 전체에 대해 한 번에 계산한다. 반환값의 bool은 히트가 있는 항목 존재 여부.
+        n = self.size
+        weighted = np.zeros(n, dtype=np.float64)
+        hits = np.zeros(n, dtype=np.int64)
+        for token in query_tokens:
+            words = list(words_containing(token))
+            token_hit = np.zeros(n, dtype=bool)
+            for field, weight in FIELD_WEIGHTS:
+                field_hit = self._field_hits(field, words)
+                # 미일치 행에는 0.0을 더하므로 토큰/필드 순서대로 += 하던 파이썬 결과와 비트 단위로 같다.
+                weighted = weighted + weight * field_hit
+                token_hit |= field_hit
+            hits += token_hit
+
+        alive = self.alive[:n]
+        matched = alive & (hits > 0)
+        any_hit = bool(query_tokens) and bool(matched.any())
+        rows = np.nonzero(matched if any_hit else alive)[0]
+        if rows.size == 0:
+            return [], any_hit
+
+        row_hits = hits[rows]
+        if query_tokens:
+            coverage = np.where(row_hits > 0, 0.12 * (row_hits / len(query_tokens)), 0.0)
+        else:
+            coverage = np.zeros(rows.size, dtype=np.float64)
+        raw = base + weighted[rows] + coverage + self.noise[rows]
+        cents = np.minimum(99, _round_cents(raw)).astype(np.int64)
+
+        # (히트수, 점수) 내림차순, 동점이면 최신(슬롯 큰) 항목 우선.
+        order_key = (row_hits * 100 + cents) * n + rows
+        k = min(limit, rows.size)
+        top = np.argpartition(-order_key, k - 1)[:k]
+        top = top[np.argsort(-order_key[top])]
+        out = [
+            (float(cents[idx]) / 100, int(row_hits[idx]), self.items[rows[idx]])
+            for idx in top
+        ]
+        return out, any_hit
@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .storage import MemoryStore
+
+SNAPSHOT_FILE = "snapshot.json"
+SEGMENT_PREFIX = "journal-"
+SEGMENT_SUFFIX = ".log"
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    # writer 스레드가 한 번에 쓰고 fsync하는 묶음. 레코드를 넣은 요청은 done을 기다렸다가 error가 있으면 실패로 돌려준다.
+    __slots__ = ("done", "error", "pending")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.pending = 0
+
+
+class JournalStore(MemoryStore):
+    # 메모리 저장소 + append-only 저널.
+    # - 변경 레코드는 seq를 붙여 큐에 넣고, writer 스레드가 모아서 한 번에 write + fsync(group commit) 한다.
+    #   쓰기 호출은 자기 레코드가 든 묶음의 fsync가 끝날 때까지 기다리고(durable() 블록 안이면 블록을 나갈 때),
+    #   디스크 쓰기가 실패하면 메모리 상태에서 그 레코드를 되돌리고 예외로 돌려준다.
+    # - 주기적으로 전체 상태 스냅샷을 쓰고, 스냅샷에 포함된 이전 저널 세그먼트는 지운다.
+    # - 시작 시 최신 스냅샷을 올린 뒤 그 이후 저널만 재생한다.
+    # 레코드는 모두 객체 전체를 덮어쓰는 put 형태라 같은 레코드를 두 번 적용해도 결과가 같다.
+    name = "journal"
+
+    def __init__(
+        self,
+        directory: str,
+        flush_interval: float = 0.005,
+        snapshot_interval: float = 300.0,
+        snapshot_every: int = 10000,
+    ) -> None:
+        super().__init__()
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_every = max(1, snapshot_every)
+        os.makedirs(directory, exist_ok=True)
+
+        self._seq = 0
+        self._snapshot_seq = 0
+        self._records_since_snapshot = 0
+        self._last_snapshot_at = time.monotonic()
+        self.records_written = 0
+        self.fsyncs = 0
+        self.snapshots_written = 0
+        self.recovered_records = 0
+        self.recovery_ms = 0.0
+        self.write_errors = 0
+        self.snapshot_errors = 0
+        self.last_write_error: Optional[str] = None
+
+        self._recover()
+        segments = self._segment_numbers()
+        self._segment = segments[-1] + 1 if segments else 1
+        self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+
+        self._queue: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        # 지금 채우는 묶음. writer가 큐를 비울 때 self._lock 안에서 새 묶음으로 바꾼다.
+        self._batch = _Batch()
+        # durable() 블록 안에서 쓴 레코드의 묶음(스레드별). 블록을 나갈 때 기다린다.
+        self._deferred = threading.local()
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name="journal-writer", daemon=True)
+        self._writer.start()
+        self._snapshotter = threading.Thread(target=self._snapshot_loop, name="journal-snapshot", daemon=True)
+        self._snapshotter.start()
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}")
+
+    def _segment_numbers(self) -> List[int]:
+        numbers: List[int] = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    numbers.append(int(name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def _recover(self) -> None:
+        started = time.perf_counter()
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, encoding="utf-8") as fp:
+                snapshot = json.load(fp)
+            for cid, items in snapshot.get("board", {}).items():
+                for item in reversed(items):
+                    self._apply({"op": "board_put", "category_id": cid, "item": item})
+            for action in snapshot.get("actions", []):
+                self._apply({"op": "action_put", "action": action})
+            for user in snapshot.get("users", []):
+                self._apply({"op": "user_put", "user": user})
+            self._snapshot_seq = int(snapshot.get("seq", 0))
+            self._seq = self._snapshot_seq
+
+        for number in self._segment_numbers():
+            with open(self._segment_path(number), encoding="utf-8") as fp:
+                for line in fp:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 크래시로 잘린 마지막 줄은 버린다.
+                        continue
+                    seq = int(record.get("seq", 0))
+                    if seq <= self._snapshot_seq:
+                        continue
+                    self._apply(record)
+                    self._seq = max(self._seq, seq)
+                    self.recovered_records += 1
+        self.recovery_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    def _record(self, record: dict, expected_version: Optional[int] = None) -> bool:
+        with self._lock:
+            if not self._version_matches(record, expected_version):
+                return False
+            previous = self._previous(record)
+            self._apply(record)
+            self._seq += 1
+            self._records_since_snapshot += 1
+            # 요청 시점의 상태를 남기도록 직렬화는 락 안에서 한다.
+            line = json.dumps({**record, "seq": self._seq}, ensure_ascii=False)
+            batch = self._enqueue_locked("record", (line, record, previous))
+        deferred = getattr(self._deferred, "batches", None)
+        if deferred is not None:
+            if not deferred or deferred[-1] is not batch:
+                deferred.append(batch)
+            return True
+        self._wait_durable([batch])
+        return True
+
+    @contextmanager
+    def durable(self) -> Iterator[None]:
+        outer = getattr(self._deferred, "batches", None)
+        if outer is not None:
+            # 바깥 블록이 기다린다.
+            yield
+            return
+        batches: List[_Batch] = []
+        self._deferred.batches = batches
+        try:
+            yield
+        finally:
+            self._deferred.batches = None
+        self._wait_durable(batches)
+
+    def _wait_durable(self, batches: List[_Batch]) -> None:
+        for batch in batches:
+            self._wait(batch)
+            if batch.error is not None:
+                raise batch.error
+
+    def _previous(self, record: dict) -> Any:
+        # 쓰기가 실패했을 때 되돌릴 이전 값. 호출자가 self._lock을 잡은 상태에서 부른다.
+        op = record["op"]
+        if op == "action_put":
+            return self._actions.get(record["action"]["id"])
+        if op == "user_put":
+            return self._users.get(record["user"]["email"])
+        if op == "board_put":
+            return self._board.get(record["category_id"], {}).get(record["item"]["id"])
+        if op == "board_delete":
+            return self._board.get(record["category_id"], {}).get(record["item_id"])
+        if op == "reset":
+            return {cid: dict(rows) for cid, rows in self._board.items()}, dict(self._actions)
+        return None
+
+    def _undo(self, record: dict, previous: Any) -> None:
+        # 디스크에 남지 못한 레코드를 메모리 상태에서 되돌린다. 호출자가 self._lock을 잡은 상태에서 부른다.
+        # 레코드는 객체 전체를 덮어쓰므로, 그 뒤 다른 레코드가 같은 키를 이미 덮어썼으면 그쪽을 그대로 둔다.
+        op = record["op"]
+        if op in ("action_put", "user_put"):
+            table, key, value = (
+                (self._actions, record["action"]["id"], record["action"])
+                if op == "action_put"
+                else (self._users, record["user"]["email"], record["user"])
+            )
+            if table.get(key) is value:
+                if previous is None:
+                    del table[key]
+                else:
+                    table[key] = previous
+        elif op == "board_put":
+            rows = self._board.get(record["category_id"], {})
+            current = rows.get(record["item"]["id"])
+            if current is not None and current[1] is record["item"]:
+                if previous is None:
+                    del rows[record["item"]["id"]]
+                else:
+                    rows[record["item"]["id"]] = previous
+        elif op == "board_delete":
+            if previous is not None:
+                self._board.setdefault(record["category_id"], {}).setdefault(record["item_id"], previous)
+        elif op == "reset":
+            board, actions = previous
+            for cid, rows in board.items():
+                current_rows = self._board.setdefault(cid, {})
+                for item_id, row in rows.items():
+                    current_rows.setdefault(item_id, row)
+            for action_id, action in actions.items():
+                self._actions.setdefault(action_id, action)
+
+    def _enqueue_locked(self, kind: str, payload: Any) -> _Batch:
+        # 호출자가 self._lock을 잡은 상태에서 부른다. 큐에 넣은 항목은 writer가 다음에 바꿔 가는 묶음에 속한다.
+        self._batch.pending += 1
+        self._queue.put((kind, payload))
+        return self._batch
+
+    def _wait(self, batch: _Batch) -> None:
+        # writer가 예기치 않게 죽었으면 영원히 기다리지 않고 실패로 돌려준다.
+        while not batch.done.wait(0.5):
+            if not self._writer.is_alive():
+                if batch.error is None:
+                    batch.error = OSError("journal writer is not running")
+                return
+
+    def _write_loop(self) -> None:
+        running = True
+        while running:
+            entries = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entries.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            with self._lock:
+                # 여기까지 큐에 들어온 항목이 이번 묶음이다. 이후 들어오는 레코드는 새 묶음에서 기다린다.
+                batch, self._batch = self._batch, _Batch()
+                while True:
+                    try:
+                        entries.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+            error: Optional[BaseException] = None
+            try:
+                records: List[Tuple[str, dict, Any]] = []
+                for kind, payload in entries:
+                    if kind == "record":
+                        records.append(payload)
+                    elif kind == "snapshot":
+                        # 스냅샷 요청 이전 레코드를 먼저 내리고, 새 세그먼트로 넘긴 뒤 스냅샷을 쓴다.
+                        error = self._flush_records(records) or error
+                        records = []
+                        if error is None:
+                            self._try_snapshot(*payload)
+                        else:
+                            # 스냅샷 상태에 디스크에 못 남긴(되돌린) 레코드가 들어 있으므로 쓰지 않고 곧 다시 찍게 한다.
+                            self._skip_snapshot(payload[0])
+                    elif kind == "stop":
+                        running = False
+                error = self._flush_records(records) or error
+            finally:
+                batch.error = error
+                batch.done.set()
+
+    def _flush_records(self, records: List[Tuple[str, dict, Any]]) -> Optional[BaseException]:
+        # 쓰기/fsync 실패는 writer를 죽이지 않는다. 레코드를 메모리 상태에서 되돌리고 이 묶음을 기다리는 호출자에게 돌려준다.
+        try:
+            self._write_lines([line for line, _, _ in records])
+        except (OSError, ValueError) as exc:
+            self.write_errors += 1
+            self.last_write_error = repr(exc)
+            logger.error("journal write failed (%d records): %r", len(records), exc)
+            with self._lock:
+                for _, record, previous in reversed(records):
+                    self._undo(record, previous)
+            # 반쯤 쓴 줄 뒤에 다음 레코드가 이어 붙지 않도록 새 세그먼트로 넘어간다.
+            self._open_next_segment()
+            return exc
+        return None
+
+    def _skip_snapshot(self, seq: int) -> None:
+        self.snapshot_errors += 1
+        logger.error("journal snapshot at seq %d skipped after a failed write", seq)
+        with self._lock:
+            self._records_since_snapshot = max(self._records_since_snapshot, self.snapshot_every)
+
+    def _try_snapshot(self, seq: int, state: Dict[str, Any]) -> None:
+        # 스냅샷 실패는 저널 레코드 유실이 아니다(이전 세그먼트를 지우지 않는다). 기록만 하고 다음 주기에 다시 쓴다.
+        try:
+            self._rotate_and_snapshot(seq, state)
+        except Exception as exc:
+            self.snapshot_errors += 1
+            self.last_write_error = repr(exc)
+            logger.error("journal snapshot at seq %d failed: %r", seq, exc)
+            if self._file.closed:
+                self._open_next_segment()
+
+    def _open_next_segment(self) -> None:
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._segment += 1
+        try:
+            self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+        except OSError as exc:
+            # 열지 못하면 닫힌 파일이 남아 다음 쓰기도 실패로 돌려주고, 그때 다시 연다.
+            logger.error("journal segment %d could not be opened: %r", self._segment, exc)
+
+    def _write_lines(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.records_written += len(lines)
+        self.fsyncs += 1
+
+    def _rotate_and_snapshot(self, seq: int, state: Dict[str, Any]) -> None:
+        old_segments = self._segment_numbers()
+        self._file.close()
+        self._segment += 1
+        self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp_path = snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            json.dump({"seq": seq, **state}, fp, ensure_ascii=False)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, snapshot_path)
+        for number in old_segments:
+            if number < self._segment:
+                os.remove(self._segment_path(number))
+        self._snapshot_seq = seq
+        self.snapshots_written += 1
+
+    def snapshot(self) -> None:
+        # 상태 참조만 락 안에서 복사하고 직렬화는 writer 스레드에서 한다.
+        with self._lock:
+            seq = self._seq
+            state = {
+                "board": self._board_rows(),
+                "actions": list(self._actions.values()),
+                "users": list(self._users.values()),
+            }
+            self._records_since_snapshot = 0
+            self._last_snapshot_at = time.monotonic()
+            self._enqueue_locked("snapshot", (seq, state))
+
+    def _snapshot_loop(self) -> None:
+        while not self._stop.wait(1.0):
+            due = time.monotonic() - self._last_snapshot_at >= self.snapshot_interval
+            if self._records_since_snapshot >= self.snapshot_every or (due and self._records_since_snapshot):
+                self.snapshot()
+
+    def flush(self) -> None:
+        # 지금 채우는 묶음(과 그 앞의 모든 묶음)이 디스크에 내려갈 때까지 기다린다.
+        with self._lock:
+            batch = self._batch
+        if batch.pending:
+            self._wait(batch)
+
+    def close(self) -> None:
+        if not self._writer.is_alive():
+            return
+        self._stop.set()
+        # 종료 시 스냅샷을 남겨 다음 시작 때 재생할 저널을 최소화한다.
+        self.snapshot()
+        with self._lock:
+            self._enqueue_locked("stop", None)
+        # writer는 쓰기 오류에도 멈추지 않고 stop까지 처리한다.
+        self._writer.join()
+        self._file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = super().stats()
+        out.update(
+            {
+                "seq": self._seq,
+                "snapshot_seq": self._snapshot_seq,
+                "segment": self._segment,
+                "pending_records": self._queue.qsize(),
+                "records_written": self.records_written,
+                "fsyncs": self.fsyncs,
+                "snapshots_written": self.snapshots_written,
+                "recovered_records": self.recovered_records,
+                "recovery_ms": self.recovery_ms,
+                "write_errors": self.write_errors,
+                "snapshot_errors": self.snapshot_errors,
+                "last_write_error": self.last_write_error,
+            }
+        )
+        return out
+
@@ -1,18 +1,34 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import json
+import math
+import os
 import re
-from typing import Dict, List, Optional, Tuple
+import time
+from typing import Annotated, Any, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
+from .admission import LLMOverloadedError
 from .ai_engine import AIEngine
+from .cache import TTLCache
+from .metrics import LatencyStats
 from .matching import (
+    STORE,
+    VersionConflictError,
+    apply_change,
     board_count,
-    list_actions,
+    list_actions_page,
     list_user_listings,
+    load_state,
     publish_listing,
     recommendation_detail,
     recommend,
+    recommend_cache_stats,
     request_action,
     seed_mock_board,
     transition_action,
@@ -39,6 +55,7 @@ from .schemas import (
     EmailAuthResponse,
     MatchAction,
     MyListingsResponse,
+    Recommendation,
     RecommendationDetailResponse,
     RouteCandidate,
     RouteRequest,
@@ -47,7 +64,22 @@ from .schemas import (
 
 app = FastAPI(title="Agent Match Prototype API", version="0.1.0")
 ai_engine = AIEngine()
+# OLLAMA_ASYNC=0이면 예전처럼 Ollama 호출을 스레드풀 스레드에서 동기로 기다린다(비교/문제 시 되돌리기용).
+OLLAMA_ASYNC = os.getenv("OLLAMA_ASYNC", "1").strip() not in {"0", "false", "no"}
 USERS_BY_EMAIL: Dict[str, Dict[str, str]] = {}
+# /agent/ask/stream: 요청 시작부터 첫 이벤트(추천 목록) 전송까지, 첫 LLM 조각 전송까지
+ASK_STREAM_TTFB = LatencyStats()
+ASK_STREAM_FIRST_TOKEN = LatencyStats()
+# /agent/ask 기본 시간 예산(ms). 넘기면 LLM은 뒤에서 계속 돌려 결과를 남겨 두고, 요약 문장으로 먼저 답한다. 0이면 끔.
+ASK_DEADLINE_MS = int(os.getenv("ASK_DEADLINE_MS", "5000"))
+ASK_DEADLINE_COUNTS = {"in_time": 0, "exceeded": 0, "late_completed": 0, "late_failed": 0, "late_joined": 0, "late_reused": 0}
+# 예산을 넘겨 뒤에서 계속 도는 LLM 호출(요청 fingerprint -> 호출). 같은 요청이 다시 오면 새로 부르지 않고 합류한다.
+_LATE_LLM_CALLS: Dict[str, asyncio.Future] = {}
+# 늦게 끝난 LLM 답(요청 fingerprint -> 답). 답변 캐시 설정(LLM_CACHE_SIZE, 캐시 끈 도메인)과 무관하게 잠깐 보관한다.
+_LATE_LLM_RESULTS = TTLCache(
+    max_entries=int(os.getenv("ASK_LATE_RESULT_MAX", "256")),
+    ttl_seconds=float(os.getenv("ASK_LATE_RESULT_TTL", "300")),
+)
 
 SUPPORTED_LANGS = {"ko", "en"}
 DOMAIN_TITLE_EN = {
@@ -63,6 +95,15 @@ GENERIC_HINT_EN = {
     "find": "Share concrete conditions to improve matching quality.",
     "publish": "Describe your listing/profile clearly for faster matching.",
 }
+# 예산 초과 시 요약 문장 끝에 붙이는 도메인별 추가 질문
+DOMAIN_FOLLOWUP_KO = {
+    "people": "선호 지역이나 만날 시간대를 알려주시면 더 좁혀 드릴게요.",
+    "sport": "경기 일시나 장소, 실력 수준을 알려주시면 더 좁혀 드릴게요.",
+    "market": "예산이나 원하는 상태를 알려주시면 더 좁혀 드릴게요.",
+    "service": "원하는 일정이나 예산을 알려주시면 더 좁혀 드릴게요.",
+    "learning": "수업 일정이나 현재 수준을 알려주시면 더 좁혀 드릴게요.",
+    "job": "직무나 근무 조건을 알려주시면 더 좁혀 드릴게요.",
+}
 GENERIC_WELCOME_EN = {
     "find": "AI matching is ready. Tell me your conditions.",
     "publish": "Let's post your profile/listing. Tell me key details.",
@@ -199,10 +240,66 @@ def _market_find_summary_en(user_message: str, recs: List) -> str:
     return f"{len(recs)} listings for '{user_message}'. Top: {title_part}."
 
 
+def _parse_if_match(value: Optional[str]) -> Optional[int]:
+    # If-Match: "3" / W/"3" / 3 -> 3, "*" 또는 없음 -> 버전 확인 안 함
+    if value is None:
+        return None
+    raw = value.strip()
+    if raw.startswith("W/"):
+        raw = raw[2:]
+    raw = raw.strip('"')
+    if not raw or raw == "*":
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid If-Match header")
+
+
+def _apply_store_change(record: Dict[str, Any]) -> None:
+    # 같은 저장소를 쓰는 다른 워커의 변경 통지
+    if record["op"] == "user_put":
+        USERS_BY_EMAIL[record["user"]["email"]] = record["user"]
+        return
+    apply_change(record)
+
+
+def _reload_store_state() -> None:
+    # 이 워커가 변경 로그 보존 범위 밖으로 밀려 놓친 변경이 있을 때 저장소 전체를 다시 올린다.
+    load_state()
+    USERS_BY_EMAIL.update(STORE.load_users())
+
+
 @app.on_event("startup")
 def seed_on_startup() -> None:
-    # 로컬 테스트 편의를 위해 목데이터를 기본 시드한다.
-    seed_mock_board(reset=False)
+    # 저장소(MATCH_STORAGE)에 남아있는 보드/액션/사용자를 먼저 올린다.
+    # 적재 전 변경 로그 위치를 잡아 두고 그 이후의 다른 워커 변경을 구독해, 적재 중 들어온 변경도 놓치지 않는다.
+    position = STORE.change_position()
+    load_state()
+    USERS_BY_EMAIL.update(STORE.load_users())
+    STORE.watch(_apply_store_change, after=position, reload=_reload_store_state)
+    # 로컬 테스트 편의를 위해 목데이터를 기본 시드한다. 저장소를 공유하는 워커 중 한 곳만 시드한다.
+    if STORE.claim_seed():
+        seed_mock_board(reset=False)
+
+
+@app.on_event("startup")
+async def warm_ai_model() -> None:
+    # 배포 직후 첫 사용자가 모델 로딩(콜드 스타트)을 기다리지 않도록 백그라운드에서 모델을 올려 두고 상주시킨다.
+    # 준비 여부는 /health/ai의 ready로 확인한다(올라가기 전에도 API는 정상 동작).
+    ai_engine.start_keepalive()
+    # Ollama 백엔드가 여러 개면 주기적으로 상태를 확인해 응답 없는 곳을 라우팅에서 뺀다.
+    ai_engine.start_health_checks()
+
+
+@app.on_event("shutdown")
+def close_store() -> None:
+    STORE.close()
+
+
+@app.on_event("shutdown")
+async def close_ai_client() -> None:
+    await ai_engine.aclose()
 
 
 @app.get("/health")
@@ -210,6 +307,33 @@ def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/health/ai")
+def ai_health() -> Dict[str, Any]:
+    # LLM이 죽어도 API는 fallback으로 응답하므로 항상 200이고, 상태는 본문(status/breaker)으로 알린다.
+    return ai_engine.health()
+
+
+@app.get("/metrics")
+def metrics() -> Dict[str, Any]:
+    return {
+        "recommend_cache": recommend_cache_stats(),
+        "llm_cache": ai_engine.cache_stats(),
+        "llm_coalescing": ai_engine.coalesce_stats(),
+        "llm_breaker": ai_engine.breaker_stats(),
+        "llm_admission": ai_engine.admission_stats(),
+        "llm_backends": ai_engine.backend_stats(),
+        "llm_model": ai_engine.model_stats(),
+        "ask_stream": {"ttfb": ASK_STREAM_TTFB.stats(), "first_token": ASK_STREAM_FIRST_TOKEN.stats()},
+        "ask_deadline": {
+            "default_ms": ASK_DEADLINE_MS,
+            "pending": len(_LATE_LLM_CALLS),
+            "late_results": _LATE_LLM_RESULTS.stats()["entries"],
+            **ASK_DEADLINE_COUNTS,
+        },
+        "storage": {"backend": STORE.name, **STORE.stats()},
+    }
+
+
 @app.get("/categories", response_model=List[Category])
 def categories(lang: Optional[str] = None) -> List[Category]:
     language = _normalized_lang(lang)
@@ -269,22 +393,30 @@ def route_agent(req: RouteRequest, lang: Optional[str] = None) -> RouteResponse:
     return RouteResponse(selected=selected, candidates=candidates)
 
 
-@app.post("/agent/ask", response_model=AskResponse)
-def ask_agent(req: AskRequest, lang: Optional[str] = None) -> AskResponse:
-    language = _normalized_lang(lang)
+async def _prepare_ask(
+    req: AskRequest,
+    language: str,
+    if_match: Optional[str],
+) -> Tuple[str, Optional[str], Optional[str], List[Recommendation], Optional[str]]:
+    # /agent/ask와 /agent/ask/stream 공통: 등록(publish) 처리 후 추천 목록과 LLM에 넘길 문맥을 만든다.
     mode_id, _ = resolve_mode(req.category_id, req.mode)
     action_result: Optional[str] = None
     action_context: Optional[str] = None
 
     if mode_id == "publish":
         try:
-            listing, updated = publish_listing(
+            # 보드 쓰기/점수 계산은 CPU 작업이라 이벤트 루프를 막지 않도록 스레드풀에서 돌린다.
+            listing, updated = await run_in_threadpool(
+                publish_listing,
                 category_id=req.category_id,
                 message=req.message,
                 owner_name=req.user_name,
                 owner_email=req.user_email,
                 target_recommendation_id=req.target_recommendation_id,
+                expected_version=_parse_if_match(if_match) if req.target_recommendation_id else None,
             )
+        except VersionConflictError as exc:
+            raise HTTPException(status_code=412, detail=str(exc))
         except ValueError as exc:
             raise HTTPException(status_code=400, detail=str(exc))
         if language == "ko":
@@ -297,7 +429,7 @@ def ask_agent(req: AskRequest, lang: Optional[str] = None) -> AskResponse:
             f"{'태그' if language == 'ko' else 'Tags'}: {', '.join(listing.tags)}"
         )
 
-    recs = recommend(category_id=req.category_id, message=req.message, mode=mode_id)
+    recs = await run_in_threadpool(recommend, category_id=req.category_id, message=req.message, mode=mode_id)
     recommendation_context: Optional[str] = None
     if recs:
         top = recs[:3]
@@ -307,44 +439,216 @@ def ask_agent(req: AskRequest, lang: Optional[str] = None) -> AskResponse:
                 f"{idx}. {rec.title} | {rec.subtitle} | 태그: {', '.join(rec.tags)} | 점수: {int(rec.score * 100)}"
             )
         recommendation_context = "\n".join(lines)
+    return mode_id, action_result, action_context, recs, recommendation_context
 
+
+def _canned_reply(req: AskRequest, language: str, mode_id: str, recs: List[Recommendation]) -> Optional[str]:
+    # LLM 없이 정해진 문장으로 답하는 경우(거래 도메인 찾기 요약, 영어). 해당 없으면 None.
     category_domain = CATEGORY_DOMAIN_BY_ID.get(req.category_id or "friend", "people")
     if mode_id == "find" and category_domain == "market":
-        assistant = _market_find_summary(req.message, recs) if language == "ko" else _market_find_summary_en(req.message, recs)
-    else:
-        assistant = ai_engine.reply(
+        return _market_find_summary(req.message, recs) if language == "ko" else _market_find_summary_en(req.message, recs)
+    return None
+
+
+def _english_reply(mode_id: str, recs: List[Recommendation]) -> str:
+    # Free local model quality can vary; enforce concise predictable EN fallback.
+    if mode_id == "publish":
+        return "Your listing was posted. I refreshed matching candidates from the server."
+    return f"I analyzed your request and found {len(recs)} matching candidates."
+
+
+def _template_summary(req: AskRequest, language: str, mode_id: str, recs: List[Recommendation]) -> str:
+    # LLM 없이 추천 결과만으로 만드는 요약(모든 도메인). 시간 예산을 넘겼을 때 쓴다.
+    canned = _canned_reply(req, language, mode_id, recs)
+    if canned is not None:
+        return canned
+    if language == "en":
+        return _english_reply(mode_id, recs)
+    followup = DOMAIN_FOLLOWUP_KO.get(CATEGORY_DOMAIN_BY_ID.get(req.category_id or "friend", "people"), "")
+    if not recs:
+        return f"'{req.message}' 조건에 맞는 후보가 아직 없어요. {followup}"
+    top_titles = ", ".join(rec.title.split(": ", 1)[-1] for rec in recs[:2])
+    if mode_id == "publish":
+        return f"관련 후보 {len(recs)}건을 새로 찾았어요. 상위: {top_titles}."
+    return f"'{req.message}' 관련 후보 {len(recs)}건을 찾았어요. 상위: {top_titles}. {followup}"
+
+
+def _finish_late_call(fingerprint: str, category_id: Optional[str], mode_id: str, future: asyncio.Future) -> None:
+    # 예산을 넘긴 LLM 호출이 끝남. LLM 답(fallback 문장 제외)은 다음 같은 요청이 바로 받도록 남겨 둔다.
+    if _LATE_LLM_CALLS.get(fingerprint) is future:
+        del _LATE_LLM_CALLS[fingerprint]
+    if future.cancelled() or future.exception() is not None:
+        ASK_DEADLINE_COUNTS["late_failed"] += 1
+        return
+    text = future.result()
+    if not text or ai_engine.is_fallback(category_id, mode_id, text):
+        ASK_DEADLINE_COUNTS["late_failed"] += 1
+        return
+    ASK_DEADLINE_COUNTS["late_completed"] += 1
+    _LATE_LLM_RESULTS.set(fingerprint, text)
+
+
+def _with_action_result(assistant: str, action_result: Optional[str]) -> str:
+    if action_result and "등록" not in assistant:
+        return f"{action_result}\n{assistant}"
+    return assistant
+
+
+@app.post("/agent/ask", response_model=AskResponse)
+async def ask_agent(
+    req: AskRequest,
+    lang: Optional[str] = None,
+    if_match: Annotated[Optional[str], Header(alias="If-Match")] = None,
+) -> AskResponse:
+    started = time.monotonic()
+    language = _normalized_lang(lang)
+    mode_id, action_result, action_context, recs, recommendation_context = await _prepare_ask(req, language, if_match)
+
+    deadline_exceeded = False
+    assistant = _canned_reply(req, language, mode_id, recs)
+    if assistant is None:
+        reply_args = dict(
             category_id=req.category_id,
             message=req.message,
             mode=mode_id,
             action_context=action_context,
             recommendation_context=recommendation_context,
+            # 등록은 이미 끝났으므로 다시 시도하라는 429 대신 fallback 문장으로 답한다.
+            reject_when_busy=mode_id != "publish",
         )
-        if language == "en":
-            # Free local model quality can vary; enforce concise predictable EN fallback.
-            if mode_id == "publish":
-                assistant = "Your listing was posted. I refreshed matching candidates from the server."
-            else:
-                assistant = f"I analyzed your request and found {len(recs)} matching candidates."
-    if action_result and "등록" not in assistant:
-        assistant = f"{action_result}\n{assistant}"
+        fingerprint = ai_engine.reply_fingerprint(
+            req.category_id, req.message, mode_id, action_context, recommendation_context
+        )
+        late_text = _LATE_LLM_RESULTS.get(fingerprint)
+        late_call = _LATE_LLM_CALLS.get(fingerprint)
+        if late_text is not None:
+            # 앞선 같은 요청이 예산을 넘겨 늦게 받은 LLM 답
+            ASK_DEADLINE_COUNTS["late_reused"] += 1
+            call: asyncio.Future = asyncio.get_running_loop().create_future()
+            call.set_result(late_text)
+        elif late_call is not None:
+            # 앞선 같은 요청의 LLM 호출이 아직 도는 중이면 새로 부르지 않고 그 호출을 기다린다.
+            ASK_DEADLINE_COUNTS["late_joined"] += 1
+            call = late_call
+        elif OLLAMA_ASYNC:
+            call = asyncio.ensure_future(ai_engine.areply(**reply_args))
+        else:
+            # 기본 스레드풀 대신 LLM 전용 스레드에서 기다린다.
+            call = asyncio.get_running_loop().run_in_executor(ai_engine.executor, lambda: ai_engine.reply(**reply_args))
+        deadline_ms = ASK_DEADLINE_MS if req.deadline_ms is None else req.deadline_ms
+        if deadline_ms:
+            remaining = deadline_ms / 1000 - (time.monotonic() - started)
+            await asyncio.wait({call}, timeout=max(0.0, remaining))
+        if deadline_ms and not call.done():
+            # 예산 초과: LLM 호출은 취소하지 않고 끝까지 돌려 결과를 남긴다(재시도/재조회 때 바로 받음).
+            ASK_DEADLINE_COUNTS["exceeded"] += 1
+            if call is not late_call:
+                _LATE_LLM_CALLS[fingerprint] = call
+                call.add_done_callback(functools.partial(_finish_late_call, fingerprint, req.category_id, mode_id))
+            assistant = _template_summary(req, language, mode_id, recs)
+            deadline_exceeded = True
+        else:
+            ASK_DEADLINE_COUNTS["in_time"] += 1
+            try:
+                # 합류한 호출은 다른 요청 것이므로 이 요청이 끊겨도 취소되지 않게 shield로 기다린다.
+                assistant = await (asyncio.shield(call) if call is late_call else call)
+            except LLMOverloadedError as exc:
+                raise HTTPException(
+                    status_code=429, detail=str(exc), headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+                )
+            if language == "en":
+                assistant = _english_reply(mode_id, recs)
     return AskResponse(
-        assistant_message=assistant,
+        assistant_message=_with_action_result(assistant, action_result),
         active_mode=mode_id,
         action_result=action_result,
         recommendations=recs,
+        deadline_exceeded=deadline_exceeded,
     )
 
 
-@app.get("/actions", response_model=ActionListResponse)
-def actions(category_id: Optional[str] = None, viewer_email: Optional[str] = None) -> ActionListResponse:
-    return ActionListResponse(
-        actions=[
-            MatchAction(**item)
-            for item in list_actions(category_id=category_id, viewer_email=viewer_email)
-        ]
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/agent/ask/stream")
+async def ask_agent_stream(
+    req: AskRequest,
+    lang: Optional[str] = None,
+    if_match: Annotated[Optional[str], Header(alias="If-Match")] = None,
+) -> StreamingResponse:
+    # /agent/ask의 SSE 버전. 이벤트 순서:
+    #   recommendations(추천 목록, 바로 전송) -> token*(LLM 조각) 또는 message(정해진 문장 1개) -> done(최종 문장 + action_result)
+    # 등록 실패(400/412)는 스트림을 열기 전에 일반 HTTP 오류로 돌려준다.
+    started = time.perf_counter()
+    language = _normalized_lang(lang)
+    mode_id, action_result, action_context, recs, recommendation_context = await _prepare_ask(req, language, if_match)
+
+    async def events():
+        yield _sse("recommendations", {"active_mode": mode_id, "recommendations": [rec.dict() for rec in recs]})
+        # yield 뒤로 돌아오면 앞 조각은 이미 소켓으로 보내진 상태다.
+        ASK_STREAM_TTFB.observe((time.perf_counter() - started) * 1000)
+
+        assistant = _canned_reply(req, language, mode_id, recs)
+        if assistant is None and language == "en":
+            # 영어는 LLM 결과를 어차피 정해진 문장으로 바꾸므로 LLM을 부르지 않는다.
+            assistant = _english_reply(mode_id, recs)
+        if assistant is not None:
+            yield _sse("message", {"text": assistant})
+        else:
+            pieces: List[str] = []
+            async for piece in ai_engine.astream_reply(
+                category_id=req.category_id,
+                message=req.message,
+                mode=mode_id,
+                action_context=action_context,
+                recommendation_context=recommendation_context,
+            ):
+                if not pieces:
+                    ASK_STREAM_FIRST_TOKEN.observe((time.perf_counter() - started) * 1000)
+                pieces.append(piece)
+                yield _sse("token", {"text": piece})
+            assistant = "".join(pieces)
+        yield _sse(
+            "done",
+            {
+                "assistant_message": _with_action_result(assistant, action_result),
+                "active_mode": mode_id,
+                "action_result": action_result,
+            },
+        )
+
+    # 프록시(nginx 등)가 모아서 보내지 않도록 버퍼링을 끈다.
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@app.get("/actions", response_model=ActionListResponse)
+def actions(
+    category_id: Optional[str] = None,
+    viewer_email: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    inbox: bool = False,
+    status: Optional[str] = None,
+) -> ActionListResponse:
+    try:
+        items, next_cursor = list_actions_page(
+            category_id=category_id,
+            viewer_email=viewer_email,
+            limit=limit,
+            after=after,
+            inbox=inbox,
+            status=status,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return ActionListResponse(actions=[MatchAction(**item) for item in items], next_cursor=next_cursor)
+
+
 @app.post("/actions/request", response_model=MatchAction)
 def create_action(req: ActionCreateRequest) -> MatchAction:
     try:
@@ -363,17 +667,24 @@ def create_action(req: ActionCreateRequest) -> MatchAction:
 
 
 @app.post("/actions/{action_id}/transition", response_model=MatchAction)
-def update_action(action_id: str, req: ActionTransitionRequest) -> MatchAction:
+def update_action(
+    action_id: str,
+    req: ActionTransitionRequest,
+    if_match: Annotated[Optional[str], Header(alias="If-Match")] = None,
+) -> MatchAction:
     try:
         action = transition_action(
             action_id=action_id,
             command=req.action,
             actor_email=req.actor_email,
             note=req.note,
+            expected_version=_parse_if_match(if_match),
         )
         return MatchAction(**action)
     except KeyError:
         raise HTTPException(status_code=404, detail="action not found")
+    except VersionConflictError as exc:
+        raise HTTPException(status_code=412, detail=str(exc))
     except PermissionError as exc:
         raise HTTPException(status_code=403, detail=str(exc))
     except ValueError as exc:
@@ -408,7 +719,9 @@ def auth_email(req: EmailAuthRequest) -> EmailAuthResponse:
         name = email.split("@")[0]
 
     created = email not in USERS_BY_EMAIL
-    USERS_BY_EMAIL[email] = {"email": email, "name": name}
+    user = {"email": email, "name": name}
+    STORE.put_user(user)
+    USERS_BY_EMAIL[email] = user
     return EmailAuthResponse(email=email, name=name, created=created)
 
 
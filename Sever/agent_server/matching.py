@@ -1,14 +1,26 @@
 from __future__ import annotations
 
+from bisect import bisect_left, insort
 from datetime import datetime, timezone
+import base64
+import heapq
+import json
+import math
+import os
 import re
-from collections import defaultdict
-from random import random
-from typing import DefaultDict, Dict, List, Optional, Tuple
+import threading
+import zlib
+from collections import OrderedDict, defaultdict
+from contextlib import ExitStack
+from itertools import count
+from typing import Any, DefaultDict, Dict, Iterable, List, Optional, Set, Tuple
 from uuid import uuid4
 
+from .cache import TTLCache
+from .columnar import ColumnarBoard, numpy_available
 from .prompt_packs import CATEGORIES, CATEGORY_DOMAIN_BY_ID, CATEGORY_NAME_BY_ID
 from .schemas import Recommendation
+from .storage import create_store
 
 # 주요 카테고리는 조금 더 자연스러운 샘플을 유지한다.
 CURATED_CANDIDATES: Dict[str, List[dict]] = {
@@ -103,13 +115,193 @@ MOCK_OWNER_POOL = [
     {"name": "지아", "email": "jia.connect@agenta.local", "phone": "010-4872-7714"},
 ]
 
+
+class _RecencyBoard:
+    # 카테고리 보드: id -> 항목 OrderedDict(마지막이 최신).
+    # id 조회, 최상단 이동, 가장 오래된 항목 제거가 모두 O(1)이고, 순회는 기존 리스트처럼 최신순이다.
+    def __init__(self) -> None:
+        self._items: "OrderedDict[str, dict]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return reversed(self._items.values())
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._items
+
+    def get(self, item_id: str) -> Optional[dict]:
+        return self._items.get(item_id)
+
+    def put_front(self, item: dict) -> None:
+        self._items[item["id"]] = item
+        self._items.move_to_end(item["id"])
+
+    def pop_oldest(self) -> dict:
+        return self._items.popitem(last=False)[1]
+
+    def pop(self, item_id: str) -> Optional[dict]:
+        return self._items.pop(item_id, None)
+
+
 # 카테고리별 실제 서버 보드(로컬 메모리)
-BOARD: DefaultDict[str, List[dict]] = defaultdict(list)
+BOARD: DefaultDict[str, _RecencyBoard] = defaultdict(_RecencyBoard)
+BOARD_LIMIT_PER_CATEGORY = int(os.getenv("BOARD_LIMIT_PER_CATEGORY", "120"))
+# 보드가 바뀔 때마다 올라가는 카테고리별 버전(추천 캐시 무효화, 낙관적 읽기 검증용)
+BOARD_VERSION: DefaultDict[str, int] = defaultdict(int)
+# 카테고리별 쓰기 락. 보드/색인 변경은 이 락 안에서만 하고, 읽기는 락 없이 한 뒤 버전으로 검증한다.
+# 알려진 카테고리는 미리 만들고, 그 밖의 id는 실제로 보드에 쓸 때(등록될 때)만 만든다.
+# 읽기 경로는 락을 만들지 않으므로 클라이언트가 보낸 임의의 category_id로 락이 늘어나지 않는다.
+_CATEGORY_LOCKS: Dict[str, threading.Lock] = {category["id"]: threading.Lock() for category in CATEGORIES}
+_CATEGORY_LOCKS_GUARD = threading.Lock()
+OPTIMISTIC_READ_RETRIES = 3
+
+
+class VersionConflictError(Exception):
+    # If-Match로 받은 버전이 현재 버전과 다를 때(HTTP 412)
+    pass
+
+
+def _category_lock(category_id: str) -> threading.Lock:
+    # 쓰기 경로 전용(보드를 만들 카테고리만).
+    lock = _CATEGORY_LOCKS.get(category_id)
+    if lock is not None:
+        return lock
+    with _CATEGORY_LOCKS_GUARD:
+        lock = _CATEGORY_LOCKS.get(category_id)
+        if lock is None:
+            lock = _CATEGORY_LOCKS[category_id] = threading.Lock()
+        return lock
+
+
+def _read_board_consistent(category_id: str, read):
+    # seqlock 방식: 쓰기 중이 아닐 때 락 없이 읽고, 그동안 버전이 바뀌거나 쓰기가 끼어들었으면 다시 읽는다.
+    # 재시도가 계속 실패할 때만 쓰기 락을 잡고 읽는다. (버전, 결과)를 돌려준다.
+    # 락이 없는 카테고리는 한 번도 쓴 적이 없는 것이므로 잠기지 않은 것으로 본다(그사이 첫 쓰기가 끼면 버전 확인에서 걸린다).
+    lock = _CATEGORY_LOCKS.get(category_id)
+    for _ in range(OPTIMISTIC_READ_RETRIES):
+        version = BOARD_VERSION.get(category_id, 0)
+        if lock is not None and lock.locked():
+            continue
+        try:
+            out = read()
+        except Exception:
+            # 순회 중 dict/set 변경, 죽은 슬롯 참조 등 쓰기와 겹친 흔적이므로 다시 읽는다.
+            # 실제 버그라면 아래 락 안의 읽기에서 그대로 예외가 난다.
+            continue
+        if (lock is None or not lock.locked()) and BOARD_VERSION.get(category_id, 0) == version:
+            return version, out
+    lock = _CATEGORY_LOCKS.get(category_id)
+    if lock is None:
+        return BOARD_VERSION.get(category_id, 0), read()
+    with lock:
+        return BOARD_VERSION.get(category_id, 0), read()
+
+# 점수 계산 엔진: python(기본) | numpy(대형 카테고리용 컬럼 기반 일괄 계산, numpy 설치 필요)
+SCORING_ENGINE = os.getenv("MATCH_SCORING_ENGINE", "python").strip().lower()
+if SCORING_ENGINE == "numpy" and not numpy_available():
+    SCORING_ENGINE = "python"
+NUMPY_MIN_ITEMS = int(os.getenv("MATCH_NUMPY_MIN_ITEMS", "1000"))
+
+
+def _parse_domain_ranking(raw: str) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for part in raw.split(","):
+        domain, _, ranking = part.partition("=")
+        if domain.strip() and ranking.strip():
+            out[domain.strip().lower()] = ranking.strip().lower()
+    return out
+
+
+# 도메인별 랭킹 방식: hits(기본, 부분일치 히트 수) | bm25. 예) "market=bm25,job=bm25"
+RANKING_BY_DOMAIN = _parse_domain_ranking(os.getenv("MATCH_RANKING_BY_DOMAIN", ""))
+# BM25F 필드 가중치는 _score_item의 title/subtitle/tag 가중치 비율을 그대로 따른다.
+BM25_FIELD_WEIGHTS: Tuple[Tuple[str, float], ...] = (("title", 1.0), ("subtitle", 0.14 / 0.22), ("tags", 0.18 / 0.22))
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+RECOMMEND_CACHE = TTLCache(
+    max_entries=int(os.getenv("RECOMMEND_CACHE_SIZE", "2048")),
+    ttl_seconds=float(os.getenv("RECOMMEND_CACHE_TTL", "30")),
+)
+
+ACTION_PAGE_MAX = 200
+
+
+class _ActionTimeline:
+    # updated_at 순으로 정렬된 액션 키 목록. 키는 (updated_at, -생성순번, id)라서
+    # 뒤에서부터 읽으면 기존 정렬(updated_at 내림차순, 같으면 먼저 생성된 것 먼저)과 같다.
+    # 상태 변경 시 기존 키를 이진 탐색으로 지우고 새 키를 끼워 넣는다.
+    def __init__(self) -> None:
+        self._keys: List[Tuple[str, int, str]] = []
+        self._key_by_id: Dict[str, Tuple[str, int, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._key_by_id.clear()
+
+    def upsert(self, action_id: str, updated_at: str, order: int) -> None:
+        old = self._key_by_id.get(action_id)
+        if old is not None:
+            if old[0] == updated_at:
+                return
+            del self._keys[bisect_left(self._keys, old)]
+            order = -old[1]
+        key = (updated_at, -order, action_id)
+        insort(self._keys, key)
+        self._key_by_id[action_id] = key
+
+    def remove(self, action_id: str) -> None:
+        old = self._key_by_id.pop(action_id, None)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, old)]
+
+    def order_of(self, action_id: str) -> int:
+        return -self._key_by_id[action_id][1]
+
+    def page(self, limit: Optional[int], after: Optional[Tuple[str, int, str]] = None) -> List[Tuple[str, int, str]]:
+        # 최신순으로 limit개. after가 있으면 그 키보다 오래된 것부터.
+        end = bisect_left(self._keys, after) if after is not None else len(self._keys)
+        start = 0 if limit is None else max(0, end - limit)
+        return self._keys[start:end][::-1]
+
+
+def _encode_action_cursor(key: Tuple[str, int, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def _decode_action_cursor(cursor: str) -> Tuple[str, int, str]:
+    try:
+        updated_at, neg_order, action_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(updated_at), int(neg_order), str(action_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
 
 # 요청/수락/거절/확정 상태머신 (로컬 메모리)
 ACTIONS: Dict[str, dict] = {}
-ACTION_INDEX_BY_CATEGORY: DefaultDict[str, List[str]] = defaultdict(list)
+_ACTION_ORDER = count()
+ACTION_TIMELINE = _ActionTimeline()
+ACTION_TIMELINE_BY_CATEGORY: DefaultDict[str, _ActionTimeline] = defaultdict(_ActionTimeline)
+# 참여자(owner_email/requester_email) -> 본인이 관련된 액션 타임라인(inbox 조회용)
+ACTION_TIMELINE_BY_PARTICIPANT: DefaultDict[str, _ActionTimeline] = defaultdict(_ActionTimeline)
+# 상태 -> 그 상태인 액션 타임라인, (카테고리, 상태) -> 같은 것(상태 필터 목록 조회용). 키 순서는 ACTION_TIMELINE과 같다.
+ACTION_TIMELINE_BY_STATUS: DefaultDict[str, _ActionTimeline] = defaultdict(_ActionTimeline)
+ACTION_TIMELINE_BY_CATEGORY_STATUS: DefaultDict[Tuple[str, str], _ActionTimeline] = defaultdict(_ActionTimeline)
 ACTION_INDEX_BY_RECOMMENDATION: DefaultDict[str, List[str]] = defaultdict(list)
+# (카테고리, 추천 id, 요청자 email) -> 진행 중(requested/accepted) 액션 id. request_action 중복 확인용.
+OPEN_ACTION_STATUSES = {"requested", "accepted"}
+OPEN_ACTION_BY_KEY: Dict[Tuple[str, str, str], str] = {}
+# 중복 확인 후 생성, 상태 전이를 원자적으로 처리한다.
+_ACTION_LOCK = threading.Lock()
+
+# 영속 저장소(MATCH_STORAGE=memory|sqlite). 위 메모리 구조와 색인은 저장소 내용을 올려둔 작업 사본이며,
+# 모든 변경은 저장소에 먼저 기록한 뒤 메모리에 반영한다.
+STORE = create_store()
 
 ACTION_TRANSITIONS: Dict[str, Dict[str, str]] = {
     "requested": {
@@ -267,10 +459,49 @@ def _image_seed_urls(seed: str, count: int = 3) -> List[str]:
     return [f"https://picsum.photos/seed/{safe_seed}-{idx}/800/600" for idx in range(1, count + 1)]
 
 
-def _score_item(query_tokens: List[str], item: dict, from_board: bool = False) -> Tuple[float, int]:
+_WORD_RE = re.compile(r"[0-9a-z가-힣]+")
+
+
+def _item_search_fields(item: dict) -> Tuple[str, str, List[str]]:
     title = item.get("title", "").lower()
     subtitle = item.get("subtitle", "").lower()
     tags = [str(t).lower() for t in item.get("tags", [])]
+    return title, subtitle, tags
+
+
+def _item_field_words(item: dict) -> Dict[str, Set[str]]:
+    # 검색 토큰은 [0-9a-z가-힣] 연속 구간 안에서만 부분일치할 수 있으므로
+    # 필드를 같은 문자 구간(word)으로 쪼개 두면 부분일치 판정이 그대로 유지된다.
+    title, subtitle, tags = _item_search_fields(item)
+    tag_words: Set[str] = set()
+    for tag in tags:
+        tag_words.update(_WORD_RE.findall(tag))
+    return {
+        "title": set(_WORD_RE.findall(title)),
+        "subtitle": set(_WORD_RE.findall(subtitle)),
+        "tags": tag_words,
+    }
+
+
+def _word_grams(word: str) -> Set[str]:
+    grams = {word[i : i + 2] for i in range(len(word) - 1)}
+    grams.update(word[i : i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def _tie_break_noise(item_id: str) -> float:
+    return (zlib.crc32(item_id.encode("utf-8")) % 1000) / 1000 * 0.03
+
+
+def _base_score(query_tokens: List[str], from_board: bool) -> float:
+    # 검색어가 있을 때 미일치 항목은 점수를 낮추고, 일치 항목은 강하게 올린다.
+    if query_tokens:
+        return 0.34 + (0.08 if from_board else 0.0)
+    return 0.56 + (0.1 if from_board else 0.0)
+
+
+def _score_item(query_tokens: List[str], item: dict, from_board: bool = False) -> Tuple[float, int]:
+    title, subtitle, tags = _item_search_fields(item)
 
     hits = 0
     weighted = 0.0
@@ -288,23 +519,196 @@ def _score_item(query_tokens: List[str], item: dict, from_board: bool = False) -
         if token_hit:
             hits += 1
 
-    # 검색어가 있을 때 미일치 항목은 점수를 낮추고, 일치 항목은 강하게 올린다.
-    if query_tokens:
-        base = 0.34 + (0.08 if from_board else 0.0)
-    else:
-        base = 0.56 + (0.1 if from_board else 0.0)
-
+    base = _base_score(query_tokens, from_board)
     if hits > 0 and len(query_tokens) > 0:
         coverage_bonus = 0.12 * (hits / len(query_tokens))
     else:
         coverage_bonus = 0.0
 
-    # 동점 정렬 시만 약간의 노이즈를 준다.
-    noise = random() * 0.03
+    # 동점 정렬 시만 약간의 노이즈를 준다. 캐시된 결과와 어긋나지 않도록 항목 id로 고정한다.
+    noise = _tie_break_noise(item.get("id", ""))
     score = min(0.99, round(base + weighted + coverage_bonus + noise, 2))
     return score, hits
 
 
+class _BoardIndex:
+    # 카테고리별 역색인: word -> 보드 항목 id. recommend()가 전체 보드를 훑지 않고
+    # 검색 토큰을 포함하는 후보만 점수화하도록 한다.
+    # "코치가방"처럼 토큰이 word 중간에 걸리는 부분일치는 word의 2/3-gram 색인으로 찾는다.
+    def __init__(self) -> None:
+        self.items: Dict[str, dict] = {}
+        self.recency: Dict[str, int] = {}
+        self.postings: DefaultDict[str, Set[str]] = defaultdict(set)
+        self.item_fields: Dict[str, Dict[str, Set[str]]] = {}
+        self.grams: DefaultDict[str, Set[str]] = defaultdict(set)
+        # BM25용 통계: 필드별 길이 합(평균 길이 계산). 문서 빈도는 postings 크기로 바로 얻는다.
+        self.field_length_totals: DefaultDict[str, int] = defaultdict(int)
+        self.columns: Optional[ColumnarBoard] = ColumnarBoard() if SCORING_ENGINE == "numpy" else None
+
+    def add(self, item: dict) -> None:
+        item_id = item["id"]
+        if item_id in self.items:
+            self.remove(item_id)
+        field_words = _item_field_words(item)
+        words = set().union(*field_words.values())
+        self.items[item_id] = item
+        self.recency[item_id] = next(_BOARD_RECENCY)
+        self.item_fields[item_id] = field_words
+        for field, field_set in field_words.items():
+            self.field_length_totals[field] += len(field_set)
+        for word in words:
+            if word not in self.postings:
+                for gram in _word_grams(word):
+                    self.grams[gram].add(word)
+            self.postings[word].add(item_id)
+        if self.columns is not None:
+            self.columns.add(item, field_words, _tie_break_noise(item_id))
+
+    def remove(self, item_id: str) -> None:
+        if self.items.pop(item_id, None) is None:
+            return
+        if self.columns is not None:
+            self.columns.remove(item_id)
+        self.recency.pop(item_id, None)
+        field_words = self.item_fields.pop(item_id, {})
+        for field, field_set in field_words.items():
+            self.field_length_totals[field] -= len(field_set)
+        for word in set().union(*field_words.values()):
+            ids = self.postings.get(word)
+            if ids is None:
+                continue
+            ids.discard(item_id)
+            if not ids:
+                del self.postings[word]
+                for gram in _word_grams(word):
+                    words = self.grams.get(gram)
+                    if words is None:
+                        continue
+                    words.discard(word)
+                    if not words:
+                        del self.grams[gram]
+
+    def words_containing(self, token: str) -> Iterable[str]:
+        if len(token) < 2:
+            return [word for word in self.postings if token in word]
+        if len(token) == 2:
+            return list(self.grams.get(token, ()))
+        # trigram 교집합은 후보를 좁힐 뿐이므로 실제 부분일치로 한 번 더 확인한다.
+        gram_sets = []
+        for gram in _word_grams(token):
+            if len(gram) != 3:
+                continue
+            words = self.grams.get(gram)
+            if not words:
+                return []
+            gram_sets.append(words)
+        gram_sets.sort(key=len)
+        matched = set(gram_sets[0]).intersection(*gram_sets[1:])
+        return [word for word in matched if token in word]
+
+    def candidates(self, query_tokens: List[str]) -> List[dict]:
+        ids: Set[str] = set()
+        for token in query_tokens:
+            for word in self.words_containing(token):
+                ids.update(self.postings[word])
+        # 동점 정렬이 기존(보드 최신순)과 같도록 최신 항목부터 돌려준다.
+        ordered = sorted(ids, key=lambda item_id: self.recency[item_id], reverse=True)
+        return [self.items[item_id] for item_id in ordered]
+
+    def bm25_candidates(self, query_tokens: List[str]) -> List[Tuple[float, int, dict]]:
+        # 후보 검색 경로는 candidates()와 같고, 토큰별 문서 빈도(df)는 매칭 word들의 postings 합집합 크기다.
+        total = len(self.items)
+        if not total:
+            return []
+        avg_lengths = {field: max(1.0, self.field_length_totals[field] / total) for field, _ in BM25_FIELD_WEIGHTS}
+        scores: DefaultDict[str, float] = defaultdict(float)
+        hits: DefaultDict[str, int] = defaultdict(int)
+        for token in query_tokens:
+            words = list(self.words_containing(token))
+            matched_ids: Set[str] = set()
+            for word in words:
+                matched_ids.update(self.postings[word])
+            if not matched_ids:
+                continue
+            df = len(matched_ids)
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for item_id in matched_ids:
+                fields = self.item_fields[item_id]
+                tf = 0.0
+                for field, weight in BM25_FIELD_WEIGHTS:
+                    field_set = fields[field]
+                    field_tf = sum(1 for word in words if word in field_set)
+                    if field_tf:
+                        norm = 1 - BM25_B + BM25_B * len(field_set) / avg_lengths[field]
+                        tf += weight * field_tf / norm
+                scores[item_id] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1)
+                hits[item_id] += 1
+        ordered = sorted(scores, key=lambda item_id: self.recency[item_id], reverse=True)
+        return [(scores[item_id], hits[item_id], self.items[item_id]) for item_id in ordered]
+
+
+_BOARD_RECENCY = count()
+BOARD_INDEX: DefaultDict[str, _BoardIndex] = defaultdict(_BoardIndex)
+
+# 등록자 색인: owner_email -> 카테고리 -> 최근 수정순 항목(마지막이 최신),
+# (owner_email, 등록일 UTC) -> (카테고리, 항목 id). /me/listings와 AI 업서트 조회가 보드 전체를 훑지 않게 한다.
+OWNER_LISTINGS: DefaultDict[str, Dict[str, "OrderedDict[str, dict]"]] = defaultdict(dict)
+OWNER_LISTINGS_BY_DAY: DefaultDict[Tuple[str, str], Set[Tuple[str, str]]] = defaultdict(set)
+
+
+def _owner_key(item: dict) -> str:
+    return (item.get("owner_email") or "").strip().lower()
+
+
+def _utc_day(iso_str: str) -> Optional[str]:
+    try:
+        dt = datetime.fromisoformat(iso_str)
+    except Exception:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).date().isoformat()
+
+
+def _index_owner_listing(category_id: str, item: dict) -> None:
+    owner = _owner_key(item)
+    if not owner:
+        return
+    listings = OWNER_LISTINGS[owner].setdefault(category_id, OrderedDict())
+    listings.pop(item["id"], None)
+    listings[item["id"]] = item
+    day = _utc_day(item.get("created_at", ""))
+    if day:
+        OWNER_LISTINGS_BY_DAY[(owner, day)].add((category_id, item["id"]))
+
+
+def _unindex_owner_listing(category_id: str, item: dict) -> None:
+    owner = _owner_key(item)
+    by_category = OWNER_LISTINGS.get(owner)
+    if not by_category:
+        return
+    listings = by_category.get(category_id)
+    if listings is not None:
+        listings.pop(item["id"], None)
+        if not listings:
+            del by_category[category_id]
+    if not by_category:
+        del OWNER_LISTINGS[owner]
+    day = _utc_day(item.get("created_at", ""))
+    refs = OWNER_LISTINGS_BY_DAY.get((owner, day)) if day else None
+    if refs is not None:
+        refs.discard((category_id, item["id"]))
+        if not refs:
+            del OWNER_LISTINGS_BY_DAY[(owner, day)]
+
+
+def _latest_owner_listing(category_id: str, owner_email: str) -> Optional[dict]:
+    listings = OWNER_LISTINGS.get(owner_email, {}).get(category_id)
+    if not listings:
+        return None
+    return next(reversed(listings.values()))
+
+
 def _insert_board_item(
     category_id: str,
     title: str,
@@ -317,7 +721,9 @@ def _insert_board_item(
     owner_email: Optional[str] = None,
     owner_phone: Optional[str] = None,
 ) -> dict:
-    stable_index = len(BOARD.get(category_id, []))
+    # 호출자가 _category_lock(category_id)를 잡은 상태에서 부른다.
+    board = BOARD.get(category_id)
+    stable_index = len(board) if board is not None else 0
     owner = _owner_profile_for(category_id, stable_index)
     resolved_owner_name = owner_name or owner["name"]
     resolved_owner_email = owner_email or owner["email"]
@@ -338,12 +744,60 @@ def _insert_board_item(
         "owner_phone": resolved_owner_phone,
         "created_at": now,
         "updated_at": now,
+        "version": 1,
     }
-    BOARD[category_id].insert(0, item)
-    BOARD[category_id] = BOARD[category_id][:120]
+    _save_board_item(category_id, item)
     return item
 
 
+def _save_board_item(category_id: str, item: dict, expected_version: Optional[int] = None) -> None:
+    # expected_version이 있으면(기존 글 수정) 저장소에 조건부로 쓴다. 다른 워커가 먼저 고쳤으면
+    # 저장소의 현재 행으로 메모리를 맞추고 VersionConflictError(412)를 낸다.
+    if not STORE.put_board_item(category_id, item, expected_version=expected_version):
+        stored = _refresh_board_item(category_id, item["id"])
+        current = stored.get("version", 1) if stored is not None else "deleted"
+        raise VersionConflictError(f"listing version mismatch: expected {expected_version}, current {current}")
+    for evicted in _place_board_item(category_id, item):
+        STORE.delete_board_item(category_id, evicted["id"])
+
+
+def _refresh_board_item(category_id: str, item_id: str) -> Optional[dict]:
+    # 호출자가 _category_lock(category_id)를 잡은 상태에서 부른다. 저장소의 행을 다시 읽어 메모리에 반영한다.
+    stored = STORE.get_board_item(category_id, item_id)
+    if stored is None:
+        _remove_board_item(category_id, item_id)
+    else:
+        _place_board_item(category_id, stored)
+    return stored
+
+
+def _place_board_item(category_id: str, item: dict) -> List[dict]:
+    # 신규/수정 항목을 보드 최상단에 두고 색인을 갱신한다. 한도를 넘어 밀려난 항목을 돌려준다.
+    board = BOARD[category_id]
+    board.put_front(item)
+    index = BOARD_INDEX[category_id]
+    index.add(item)
+    _index_owner_listing(category_id, item)
+    evicted: List[dict] = []
+    while len(board) > BOARD_LIMIT_PER_CATEGORY:
+        row = board.pop_oldest()
+        index.remove(row["id"])
+        _unindex_owner_listing(category_id, row)
+        evicted.append(row)
+    BOARD_VERSION[category_id] += 1
+    return evicted
+
+
+def _remove_board_item(category_id: str, item_id: str) -> None:
+    board = BOARD.get(category_id)
+    item = board.pop(item_id) if board is not None else None
+    if item is None:
+        return
+    BOARD_INDEX[category_id].remove(item_id)
+    _unindex_owner_listing(category_id, item)
+    BOARD_VERSION[category_id] += 1
+
+
 def _recommendation_from_item(item: dict, score: float) -> Recommendation:
     return Recommendation(
         id=item["id"],
@@ -356,14 +810,13 @@ def _recommendation_from_item(item: dict, score: float) -> Recommendation:
         owner_name=item.get("owner_name", ""),
         owner_email_masked=_mask_email(item.get("owner_email", "")),
         owner_phone_masked=_mask_phone(item.get("owner_phone", "")),
+        version=item.get("version", 1),
     )
 
 
 def _find_board_item(category_id: str, recommendation_id: str) -> Optional[dict]:
-    for item in BOARD.get(category_id, []):
-        if item.get("id") == recommendation_id:
-            return item
-    return None
+    board = BOARD.get(category_id)
+    return board.get(recommendation_id) if board is not None else None
 
 
 def _default_candidates_for_category(category_id: str) -> List[dict]:
@@ -518,39 +971,173 @@ def _seed_items_for_category(category_id: str) -> List[dict]:
     ]
 
 
-def seed_mock_board(reset: bool = False) -> Dict[str, int]:
-    if reset:
-        BOARD.clear()
-        ACTIONS.clear()
-        ACTION_INDEX_BY_CATEGORY.clear()
-        ACTION_INDEX_BY_RECOMMENDATION.clear()
-
-    counts: Dict[str, int] = {}
-    for category in CATEGORIES:
-        cid = category["id"]
-        existing_ids = {item["id"] for item in BOARD.get(cid, [])}
-        inserted = 0
-
-        for idx, item in enumerate(_seed_items_for_category(cid), start=1):
-            seed_id = f"{cid}-seed-{idx}"
-            if seed_id in existing_ids:
-                continue
-            _insert_board_item(
-                category_id=cid,
-                title=item["title"],
-                subtitle=item["subtitle"],
-                tags=item["tags"],
-                item_id=seed_id,
-            )
-            inserted += 1
+def _lock_all_state(stack: ExitStack) -> None:
+    # 전체 초기화/재적재용: 모든 카테고리 락(정렬 순서)과 액션 락을 잡는다.
+    # 보드가 아직 비어 있는 카테고리에도 동시에 쓰기가 들어올 수 있으므로 BOARD에 있는 것만이 아니라 전 카테고리를 잡는다.
+    with _CATEGORY_LOCKS_GUARD:
+        registered = set(_CATEGORY_LOCKS)
+    category_ids = registered | set(BOARD)
+    for cid in sorted(category_ids):
+        stack.enter_context(_category_lock(cid))
+    stack.enter_context(_ACTION_LOCK)
 
-        counts[cid] = inserted
 
-    return counts
+def seed_mock_board(reset: bool = False) -> Dict[str, int]:
+    # 시드 쓰기 전체의 디스크 반영은 카테고리 락을 모두 푼 뒤 한꺼번에 기다린다.
+    with STORE.durable():
+        if reset:
+            with ExitStack() as stack:
+                _lock_all_state(stack)
+                STORE.reset()
+                _clear_state()
+
+        counts: Dict[str, int] = {}
+        for category in CATEGORIES:
+            cid = category["id"]
+            inserted = 0
+
+            with _category_lock(cid):
+                board = BOARD.get(cid)
+                for idx, item in enumerate(_seed_items_for_category(cid), start=1):
+                    seed_id = f"{cid}-seed-{idx}"
+                    if board is not None and seed_id in board:
+                        continue
+                    _insert_board_item(
+                        category_id=cid,
+                        title=item["title"],
+                        subtitle=item["subtitle"],
+                        tags=item["tags"],
+                        item_id=seed_id,
+                    )
+                    inserted += 1
+
+            counts[cid] = inserted
+
+        return counts
+
+
+def _clear_state() -> None:
+    BOARD.clear()
+    BOARD_INDEX.clear()
+    OWNER_LISTINGS.clear()
+    OWNER_LISTINGS_BY_DAY.clear()
+    for cid in BOARD_VERSION:
+        BOARD_VERSION[cid] += 1
+    RECOMMEND_CACHE.clear()
+    ACTIONS.clear()
+    ACTION_TIMELINE.clear()
+    ACTION_TIMELINE_BY_CATEGORY.clear()
+    ACTION_TIMELINE_BY_PARTICIPANT.clear()
+    ACTION_TIMELINE_BY_STATUS.clear()
+    ACTION_TIMELINE_BY_CATEGORY_STATUS.clear()
+    ACTION_INDEX_BY_RECOMMENDATION.clear()
+    OPEN_ACTION_BY_KEY.clear()
+
+
+def _place_action(action: dict) -> None:
+    # 신규 액션은 색인에 추가하고, 기존 액션은 updated_at이 바뀐 경우 타임라인 위치만 옮긴다.
+    action_id = action["id"]
+    previous = ACTIONS.get(action_id)
+    if previous is None:
+        ACTION_INDEX_BY_RECOMMENDATION[action["recommendation_id"]].append(action_id)
+    ACTIONS[action_id] = action
+    order = next(_ACTION_ORDER)
+    updated_at = action.get("updated_at", "")
+    ACTION_TIMELINE.upsert(action_id, updated_at, order)
+    ACTION_TIMELINE_BY_CATEGORY[action["category_id"]].upsert(action_id, updated_at, order)
+    for email in _action_participants(action):
+        ACTION_TIMELINE_BY_PARTICIPANT[email].upsert(action_id, updated_at, order)
+    # 상태별 타임라인: 이전 상태에서 빼고 새 상태에 넣는다. 순번은 전체 타임라인 것을 써서 커서 키가 같게 한다.
+    if previous is not None and previous["status"] != action["status"]:
+        ACTION_TIMELINE_BY_STATUS[previous["status"]].remove(action_id)
+        ACTION_TIMELINE_BY_CATEGORY_STATUS[(previous["category_id"], previous["status"])].remove(action_id)
+    order = ACTION_TIMELINE.order_of(action_id)
+    ACTION_TIMELINE_BY_STATUS[action["status"]].upsert(action_id, updated_at, order)
+    ACTION_TIMELINE_BY_CATEGORY_STATUS[(action["category_id"], action["status"])].upsert(action_id, updated_at, order)
+    _index_open_action(action)
+
+
+def _open_action_key(action: dict) -> Tuple[str, str, str]:
+    return (action["category_id"], action["recommendation_id"], (action.get("requester_email") or "").lower())
+
+
+def _index_open_action(action: dict) -> None:
+    key = _open_action_key(action)
+    if action["status"] in OPEN_ACTION_STATUSES:
+        OPEN_ACTION_BY_KEY.setdefault(key, action["id"])
+        return
+    if OPEN_ACTION_BY_KEY.get(key) != action["id"]:
+        return
+    del OPEN_ACTION_BY_KEY[key]
+    # 예전 데이터에 같은 키의 진행 중 액션이 더 있으면 그중 가장 먼저 생성된 것으로 넘긴다.
+    for other_id in ACTION_INDEX_BY_RECOMMENDATION.get(action["recommendation_id"], []):
+        other = ACTIONS.get(other_id)
+        if other and other["status"] in OPEN_ACTION_STATUSES and _open_action_key(other) == key:
+            OPEN_ACTION_BY_KEY[key] = other_id
+            break
+
+
+def _action_participants(action: dict) -> Set[str]:
+    emails = {(action.get("owner_email") or "").strip().lower(), (action.get("requester_email") or "").strip().lower()}
+    emails.discard("")
+    return emails
+
+
+def load_state() -> Dict[str, int]:
+    # 서버 시작 시(그리고 변경 로그를 따라가지 못한 워커가 다시 맞출 때) 저장소의 보드/액션을 메모리와 색인으로 올린다.
+    with ExitStack() as stack:
+        _lock_all_state(stack)
+        _clear_state()
+        # 메모리에 올리지 않을(보드 한도를 넘는) 행은 저장소에서도 지워 저장소가 메모리보다 커지지 않게 한다.
+        STORE.trim_board(BOARD_LIMIT_PER_CATEGORY)
+        board = STORE.load_board()
+        for cid, items in board.items():
+            # 저장소는 최신순으로 주므로 오래된 것부터 올려야 보드 순서가 유지된다.
+            for item in reversed(items[:BOARD_LIMIT_PER_CATEGORY]):
+                _place_board_item(cid, item)
+        actions = STORE.load_actions()
+        for action in actions:
+            _place_action(action)
+        return {"board_items": sum(len(items) for items in BOARD.values()), "actions": len(actions)}
+
+
+def apply_change(record: dict) -> None:
+    # 다른 워커가 저장소에 남긴 변경(MemoryStore._apply와 같은 레코드)을 이 프로세스의 메모리 상태와 색인에 반영한다.
+    # 저장소에는 다시 쓰지 않는다. put 변경은 레코드에 실린 사본 대신 저장소의 현재 행을 다시 읽어 반영하므로,
+    # 변경이 어떤 순서로 도착하든 모든 워커가 커밋된 같은 내용으로 수렴한다. 더 높은 버전을 이미 갖고 있으면 무시한다.
+    op = record["op"]
+    if op == "board_put":
+        cid = record["category_id"]
+        stored = STORE.get_board_item(cid, record["item"]["id"])
+        if stored is None:
+            # 그 사이 지워졌다. 뒤따르는 board_delete 변경이 메모리에서도 지운다.
+            return
+        with _category_lock(cid):
+            current = _find_board_item(cid, stored["id"])
+            if current is not None and (current.get("version", 1) > stored.get("version", 1) or current == stored):
+                return
+            _place_board_item(cid, stored)
+    elif op == "board_delete":
+        cid = record["category_id"]
+        with _category_lock(cid):
+            _remove_board_item(cid, record["item_id"])
+    elif op == "action_put":
+        stored = STORE.get_action(record["action"]["id"])
+        if stored is None:
+            return
+        with _ACTION_LOCK:
+            current = ACTIONS.get(stored["id"])
+            if current is not None and (current.get("version", 1) > stored.get("version", 1) or current == stored):
+                return
+            _place_action(stored)
+    elif op == "reset":
+        with ExitStack() as stack:
+            _lock_all_state(stack)
+            _clear_state()
 
 
 def board_count() -> Dict[str, int]:
-    return {cid: len(items) for cid, items in BOARD.items() if items}
+    return {cid: len(items) for cid, items in list(BOARD.items()) if items}
 
 
 def _now_iso() -> str:
@@ -623,19 +1210,85 @@ def _serialize_action(action: dict, viewer_email: Optional[str] = None) -> dict:
         "note": action.get("note"),
         "created_at": action["created_at"],
         "updated_at": action["updated_at"],
+        "version": action.get("version", 1),
         "history": list(action.get("history", [])),
     }
 
 
 def list_actions(category_id: Optional[str] = None, viewer_email: Optional[str] = None) -> List[dict]:
-    if category_id:
-        ids = ACTION_INDEX_BY_CATEGORY.get(category_id, [])
-    else:
-        ids = list(ACTIONS.keys())
+    actions, _ = list_actions_page(category_id=category_id, viewer_email=viewer_email)
+    return actions
 
-    actions = [ACTIONS[action_id] for action_id in ids if action_id in ACTIONS]
-    actions.sort(key=lambda item: item.get("updated_at", ""), reverse=True)
-    return [_serialize_action(item, viewer_email=viewer_email) for item in actions]
+
+def _parse_status_filter(status: Optional[str]) -> Optional[Set[str]]:
+    # "requested,accepted"처럼 쉼표로 여러 상태를 받는다.
+    if not status:
+        return None
+    statuses = {part.strip().lower() for part in status.split(",") if part.strip()}
+    unknown = statuses - set(ACTION_TRANSITIONS)
+    if unknown:
+        raise ValueError(f"unknown status: {', '.join(sorted(unknown))}")
+    return statuses or None
+
+
+def list_actions_page(
+    category_id: Optional[str] = None,
+    viewer_email: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    inbox: bool = False,
+    status: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    # updated_at 최신순 페이지와 다음 페이지 커서를 돌려준다(limit이 없으면 전체, 커서 없음).
+    # inbox=True면 viewer_email이 owner/requester인 액션만 본인 타임라인에서 읽는다.
+    statuses = _parse_status_filter(status)
+    category_filter: Optional[str] = None
+    if inbox:
+        email = (viewer_email or "").strip().lower()
+        if not email:
+            raise ValueError("viewer_email is required for inbox")
+        timeline = ACTION_TIMELINE_BY_PARTICIPANT.get(email) or _ActionTimeline()
+        category_filter = category_id or None
+    elif category_id:
+        timeline = ACTION_TIMELINE_BY_CATEGORY.get(category_id) or _ActionTimeline()
+    else:
+        timeline = ACTION_TIMELINE
+    if limit is not None:
+        limit = max(1, min(limit, ACTION_PAGE_MAX))
+    after_key = _decode_action_cursor(after) if after else None
+
+    # 다음 페이지 존재 여부를 알기 위해 하나 더 읽는다.
+    want = limit + 1 if limit is not None else None
+    if statuses is None and category_filter is None:
+        keys = timeline.page(want, after=after_key)
+    elif statuses is not None and not inbox:
+        # 상태 필터는 상태별 타임라인에서 상태마다 want개씩만 읽어 최신순으로 합친다(전체 타임라인을 훑지 않는다).
+        if category_id:
+            timelines = [ACTION_TIMELINE_BY_CATEGORY_STATUS.get((category_id, name)) for name in statuses]
+        else:
+            timelines = [ACTION_TIMELINE_BY_STATUS.get(name) for name in statuses]
+        pages = [found.page(want, after=after_key) for found in timelines if found is not None]
+        keys = list(heapq.merge(*pages, reverse=True))
+        if want is not None:
+            keys = keys[:want]
+    else:
+        # inbox(본인 타임라인)에 카테고리/상태 필터: 한 사람의 액션만 훑는다.
+        keys = []
+        for key in timeline.page(None, after=after_key):
+            action = ACTIONS[key[2]]
+            if statuses is not None and action["status"] not in statuses:
+                continue
+            if category_filter is not None and action["category_id"] != category_filter:
+                continue
+            keys.append(key)
+            if want is not None and len(keys) >= want:
+                break
+    next_cursor = None
+    if limit is not None and len(keys) > limit:
+        keys = keys[:limit]
+        next_cursor = _encode_action_cursor(keys[-1])
+    actions = [_serialize_action(ACTIONS[key[2]], viewer_email=viewer_email) for key in keys]
+    return actions, next_cursor
 
 
 def find_action_by_recommendation(
@@ -643,17 +1296,19 @@ def find_action_by_recommendation(
     recommendation_id: str,
     requester_email: Optional[str] = None,
 ) -> Optional[dict]:
-    candidate_ids = ACTION_INDEX_BY_RECOMMENDATION.get(recommendation_id, [])
     req_email = (requester_email or "").strip().lower()
+    if req_email:
+        action_id = OPEN_ACTION_BY_KEY.get((category_id, recommendation_id, req_email))
+        return ACTIONS.get(action_id) if action_id else None
+
+    candidate_ids = ACTION_INDEX_BY_RECOMMENDATION.get(recommendation_id, [])
     for action_id in candidate_ids:
         action = ACTIONS.get(action_id)
         if not action:
             continue
         if action["category_id"] != category_id:
             continue
-        if req_email and (action.get("requester_email") or "").lower() != req_email:
-            continue
-        if action["status"] in {"requested", "accepted"}:
+        if action["status"] in OPEN_ACTION_STATUSES:
             return action
     return None
 
@@ -672,79 +1327,122 @@ def request_action(
     if not req_email:
         raise ValueError("requester_email is required")
 
-    existing = find_action_by_recommendation(cid, recommendation_id, requester_email=req_email)
-    if existing:
-        return _serialize_action(existing, viewer_email=req_email)
-
-    board_item = _find_board_item(cid, recommendation_id)
-    owner_profile = _owner_profile_for(cid, stable_index=0)
-    owner_email = (board_item or {}).get("owner_email", owner_profile["email"]).lower()
-    owner_name = (board_item or {}).get("owner_name", owner_profile["name"])
-    owner_phone = (board_item or {}).get("owner_phone", owner_profile["phone"])
-
-    if owner_email == req_email:
-        raise ValueError("cannot request your own listing")
-
-    now = _now_iso()
-    action_id = f"act-{uuid4().hex[:10]}"
-    action = {
-        "id": action_id,
-        "category_id": cid,
-        "recommendation_id": recommendation_id,
-        "recommendation_title": recommendation_title,
-        "recommendation_subtitle": recommendation_subtitle,
-        "status": "requested",
-        "requester_email": req_email,
-        "requester_name": (requester_name or req_email.split("@")[0]).strip() or "요청자",
-        "owner_email": owner_email,
-        "owner_name": owner_name,
-        "owner_phone": owner_phone,
-        "note": note,
-        "created_at": now,
-        "updated_at": now,
-        "history": [
-            {
-                "status": "requested",
-                "note": note,
-                "at": now,
-            }
-        ],
-    }
-    ACTIONS[action_id] = action
-    ACTION_INDEX_BY_CATEGORY[cid].append(action_id)
-    ACTION_INDEX_BY_RECOMMENDATION[recommendation_id].append(action_id)
-    return _serialize_action(action, viewer_email=req_email)
-
+    # 저장소 쓰기의 디스크 반영(fsync)은 _ACTION_LOCK을 푼 뒤에 기다린다. 그래야 동시 요청이 한 fsync에 묶인다.
+    with STORE.durable(), _ACTION_LOCK:
+        existing = find_action_by_recommendation(cid, recommendation_id, requester_email=req_email)
+        if existing:
+            return _serialize_action(existing, viewer_email=req_email)
+
+        board_item = _find_board_item(cid, recommendation_id)
+        owner_profile = _owner_profile_for(cid, stable_index=0)
+        owner_email = (board_item or {}).get("owner_email", owner_profile["email"]).lower()
+        owner_name = (board_item or {}).get("owner_name", owner_profile["name"])
+        owner_phone = (board_item or {}).get("owner_phone", owner_profile["phone"])
+
+        if owner_email == req_email:
+            raise ValueError("cannot request your own listing")
+
+        now = _now_iso()
+        action_id = f"act-{uuid4().hex[:10]}"
+        action = {
+            "id": action_id,
+            "category_id": cid,
+            "recommendation_id": recommendation_id,
+            "recommendation_title": recommendation_title,
+            "recommendation_subtitle": recommendation_subtitle,
+            "status": "requested",
+            "requester_email": req_email,
+            "requester_name": (requester_name or req_email.split("@")[0]).strip() or "요청자",
+            "owner_email": owner_email,
+            "owner_name": owner_name,
+            "owner_phone": owner_phone,
+            "note": note,
+            "created_at": now,
+            "updated_at": now,
+            "version": 1,
+            "history": [
+                {
+                    "status": "requested",
+                    "note": note,
+                    "at": now,
+                }
+            ],
+        }
+        # 저장소가 (카테고리, 추천, 요청자)의 진행 중 액션 중복을 막는다. 다른 워커가 먼저 만든 요청이 있으면 그것을 돌려준다.
+        stored = STORE.add_action(action)
+        _place_action(stored)
+        return _serialize_action(stored, viewer_email=req_email)
 
-def transition_action(action_id: str, command: str, actor_email: str, note: Optional[str] = None) -> dict:
-    action = ACTIONS.get(action_id)
-    if not action:
-        raise KeyError(action_id)
 
-    current = action["status"]
-    possible = ACTION_TRANSITIONS.get(current, {})
-    if command not in possible:
-        allowed = ", ".join(possible.keys()) if possible else "없음"
-        raise ValueError(f"invalid transition: {current} -> {command} (allowed: {allowed})")
+def transition_action(
+    action_id: str,
+    command: str,
+    actor_email: str,
+    note: Optional[str] = None,
+    expected_version: Optional[int] = None,
+) -> dict:
+    with STORE.durable(), _ACTION_LOCK:
+        action = ACTIONS.get(action_id)
+        if not action:
+            raise KeyError(action_id)
 
-    role = _viewer_role(action, actor_email)
-    if not _can_run_command(current, command, role):
-        raise PermissionError(f"forbidden transition: role={role}, status={current}, command={command}")
+        current_version = action.get("version", 1)
+        if expected_version is not None and expected_version != current_version:
+            raise VersionConflictError(
+                f"action version mismatch: expected {expected_version}, current {current_version}"
+            )
 
-    next_status = possible[command]
-    now = _now_iso()
-    action["status"] = next_status
-    action["updated_at"] = now
-    if note is not None:
-        action["note"] = note
-    action.setdefault("history", []).append(
-        {
-            "status": next_status,
-            "note": note,
-                "at": now,
-            }
-    )
-    return _serialize_action(action, viewer_email=actor_email)
+        current = action["status"]
+        possible = ACTION_TRANSITIONS.get(current, {})
+        if command not in possible:
+            allowed = ", ".join(possible.keys()) if possible else "없음"
+            raise ValueError(f"invalid transition: {current} -> {command} (allowed: {allowed})")
+
+        role = _viewer_role(action, actor_email)
+        if not _can_run_command(current, command, role):
+            raise PermissionError(f"forbidden transition: role={role}, status={current}, command={command}")
+
+        next_status = possible[command]
+        now = _now_iso()
+        # 새 dict로 만들어 저장소의 조건부 쓰기(version이 current_version일 때만)가 성공한 뒤에만 메모리에 반영한다.
+        updated = dict(action)
+        updated["status"] = next_status
+        updated["updated_at"] = now
+        updated["version"] = current_version + 1
+        if note is not None:
+            updated["note"] = note
+        updated["history"] = [*action.get("history", []), {"status": next_status, "note": note, "at": now}]
+        if not STORE.put_action(updated, expected_version=current_version):
+            # 다른 워커가 먼저 전이했다. 저장소의 현재 행으로 맞추고 412로 돌려준다.
+            stored = STORE.get_action(action_id)
+            if stored is not None:
+                _place_action(stored)
+            current = stored.get("version", 1) if stored is not None else "deleted"
+            raise VersionConflictError(f"action version mismatch: expected {current_version}, current {current}")
+        _place_action(updated)
+        return _serialize_action(updated, viewer_email=actor_email)
+
+
+def _revised_listing(
+    existing: dict,
+    title: str,
+    summary: str,
+    tags: List[str],
+    owner_name: Optional[str],
+    fallback_tags: List[str],
+) -> dict:
+    # 기존 항목 dict는 건드리지 않고 새 dict로 만든다(copy-on-write).
+    # 락 없이 읽는 추천/상세 조회는 수정 전이나 후 항목 중 하나를 온전히 보게 된다.
+    item = dict(existing)
+    item["title"] = f"{title} 수정됨"
+    item["subtitle"] = summary
+    item["tags"] = tags[:4] if tags else fallback_tags
+    item["detail"] = f"{summary}\n등록자: {owner_name or existing.get('owner_name', '익명')}\n태그: {', '.join(tags)}"
+    if owner_name:
+        item["owner_name"] = owner_name
+    item["updated_at"] = _now_iso()
+    item["version"] = existing.get("version", 1) + 1
+    return item
 
 
 def publish_listing(
@@ -753,6 +1451,7 @@ def publish_listing(
     owner_name: Optional[str] = None,
     owner_email: Optional[str] = None,
     target_recommendation_id: Optional[str] = None,
+    expected_version: Optional[int] = None,
 ) -> Tuple[Recommendation, bool]:
     cid = category_id or "friend"
     tags = _extract_tags(message)
@@ -764,90 +1463,120 @@ def publish_listing(
         summary = summary[:42] + "..."
     normalized_owner_email = (owner_email or "").strip().lower()
 
-    # 타겟 ID가 있으면 해당 글만 업데이트한다.
-    if normalized_owner_email and target_recommendation_id:
-        for idx, existing in enumerate(BOARD.get(cid, [])):
-            if existing.get("id") != target_recommendation_id:
-                continue
-            if (existing.get("owner_email") or "").lower() != normalized_owner_email:
-                raise ValueError("cannot edit listing owned by another user")
-            existing["title"] = f"{title} 수정됨"
-            existing["subtitle"] = summary
-            existing["tags"] = tags[:4] if tags else existing.get("tags", ["매칭", "조건"])
-            existing["detail"] = f"{summary}\n등록자: {owner_name or existing.get('owner_name', '익명')}\n태그: {', '.join(tags)}"
-            if owner_name:
-                existing["owner_name"] = owner_name
-            existing["updated_at"] = _now_iso()
-            BOARD[cid].pop(idx)
-            BOARD[cid].insert(0, existing)
-            return _recommendation_from_item(existing, score=0.99), True
-        raise ValueError("target listing not found")
-
-    # AI 업서트: 같은 카테고리에서 내가 올린 최신 글을 음성/텍스트로 다시 말하면 수정으로 처리.
-    if normalized_owner_email:
-        for idx, existing in enumerate(BOARD.get(cid, [])):
-            if (existing.get("owner_email") or "").lower() != normalized_owner_email:
-                continue
-            existing["title"] = f"{title} 수정됨"
-            existing["subtitle"] = summary
-            existing["tags"] = tags[:4] if tags else ["매칭", "조건"]
-            existing["detail"] = f"{summary}\n등록자: {owner_name or existing.get('owner_name', '익명')}\n태그: {', '.join(tags)}"
-            if owner_name:
-                existing["owner_name"] = owner_name
-            existing["updated_at"] = _now_iso()
-            # 수정된 항목을 보드 최상단으로 이동
-            BOARD[cid].pop(idx)
-            BOARD[cid].insert(0, existing)
-            return _recommendation_from_item(existing, score=0.99), True
-
-    item = _insert_board_item(
-        category_id=cid,
-        title=f"{title} 등록됨",
-        subtitle=summary,
-        tags=tags,
-        detail=f"{summary}\n등록자: {owner_name or '익명'}\n태그: {', '.join(tags)}",
-        owner_name=owner_name,
-        owner_email=normalized_owner_email or None,
-    )
+    with STORE.durable(), _category_lock(cid):
+        # 타겟 ID가 있으면 해당 글만 업데이트한다. expected_version(If-Match)이 있으면 버전이 같을 때만.
+        if normalized_owner_email and target_recommendation_id:
+            existing = _find_board_item(cid, target_recommendation_id)
+            if existing is not None:
+                if (existing.get("owner_email") or "").lower() != normalized_owner_email:
+                    raise ValueError("cannot edit listing owned by another user")
+                current_version = existing.get("version", 1)
+                if expected_version is not None and expected_version != current_version:
+                    raise VersionConflictError(
+                        f"listing version mismatch: expected {expected_version}, current {current_version}"
+                    )
+                item = _revised_listing(
+                    existing, title, summary, tags, owner_name, existing.get("tags", ["매칭", "조건"])
+                )
+                _save_board_item(cid, item, expected_version=current_version)
+                return _recommendation_from_item(item, score=0.99), True
+            raise ValueError("target listing not found")
+
+        # AI 업서트: 같은 카테고리에서 내가 올린 최신 글을 음성/텍스트로 다시 말하면 수정으로 처리.
+        if normalized_owner_email:
+            existing = _latest_owner_listing(cid, normalized_owner_email)
+            if existing is not None:
+                item = _revised_listing(existing, title, summary, tags, owner_name, ["매칭", "조건"])
+                # 수정된 항목을 보드 최상단으로 이동
+                _save_board_item(cid, item, expected_version=existing.get("version", 1))
+                return _recommendation_from_item(item, score=0.99), True
+
+        item = _insert_board_item(
+            category_id=cid,
+            title=f"{title} 등록됨",
+            subtitle=summary,
+            tags=tags,
+            detail=f"{summary}\n등록자: {owner_name or '익명'}\n태그: {', '.join(tags)}",
+            owner_name=owner_name,
+            owner_email=normalized_owner_email or None,
+        )
     return _recommendation_from_item(item, score=0.99), False
 
 
+def _default_board_item(category_id: str, idx: int, item: dict) -> dict:
+    item_id = f"{category_id}-default-{idx}"
+    owner = _owner_profile_for(category_id, idx)
+    return {
+        "id": item_id,
+        "title": item["title"],
+        "subtitle": item["subtitle"],
+        "tags": item["tags"],
+        "detail": f"{item['title']} · {item['subtitle']}",
+        "image_urls": _image_seed_urls(item_id, count=3),
+        "owner_name": owner["name"],
+        "owner_email": owner["email"],
+        "owner_phone": owner["phone"],
+    }
+
+
+def recommend_cache_stats() -> Dict[str, Any]:
+    return RECOMMEND_CACHE.stats()
+
+
 def recommend(category_id: Optional[str], message: str, mode: Optional[str] = "find") -> List[Recommendation]:
     cid = category_id or "friend"
+    query_tokens = _extract_query_tokens(message)
+    cache_key = (cid, tuple(query_tokens), "publish" if mode == "publish" else "find")
+    cached = RECOMMEND_CACHE.get(cache_key, tag=BOARD_VERSION.get(cid, 0))
+    if cached is not None:
+        return list(cached)
+    version, out = _read_board_consistent(cid, lambda: _rank_recommendations(cid, query_tokens, mode))
+    RECOMMEND_CACHE.set(cache_key, out, tag=version)
+    return list(out)
+
+
+def _rank_recommendations(cid: str, query_tokens: List[str], mode: Optional[str]) -> List[Recommendation]:
     default_items = _default_candidates_for_category(cid)
     board_items = BOARD.get(cid, [])
-    query_tokens = _extract_query_tokens(message)
-    scored: List[Tuple[Recommendation, int]] = []
+    limit = 5 if mode == "publish" else 8
+    # 랭킹은 (점수, 히트수, 항목) 튜플로만 하고 Recommendation 변환은 최종 top-k에만 한다.
+    scored: List[Tuple[float, int, dict]] = []
+
+    index = BOARD_INDEX.get(cid)
+    domain = CATEGORY_DOMAIN_BY_ID.get(cid, "people")
+    if query_tokens and index is not None and RANKING_BY_DOMAIN.get(domain) == "bm25":
+        ranked = index.bm25_candidates(query_tokens)
+        if ranked:
+            base = _base_score(query_tokens, from_board=True)
+            top = heapq.nlargest(limit, ranked, key=lambda row: row[0])
+            # 노출 점수는 BM25 값을 [base, 0.99] 구간으로 단조 변환해 순위와 어긋나지 않게 한다.
+            return [
+                _recommendation_from_item(item, score=min(0.99, round(base + 0.57 * bm25 / (bm25 + 1.5), 2)))
+                for bm25, _, item in top
+            ]
+
+    columns = index.columns if index is not None else None
+    if SCORING_ENGINE == "numpy" and columns is not None and len(columns) >= NUMPY_MIN_ITEMS:
+        base = _base_score(query_tokens, from_board=True)
+        top, any_hit = columns.rank(query_tokens, index.words_containing, base=base, limit=limit)
+        if query_tokens and not any_hit:
+            if domain == "market" and mode != "publish":
+                return []
+        return [_recommendation_from_item(item, score=score) for score, _, item in top]
+
+    if query_tokens and board_items:
+        # 토큰을 포함하는 후보가 있으면 그것만 점수화하고, 없을 때만 전체 보드로 fallback 한다.
+        board_items = BOARD_INDEX[cid].candidates(query_tokens) or board_items
 
     for item in board_items:
         score, hits = _score_item(query_tokens, item, from_board=True)
-        scored.append((_recommendation_from_item(item, score=score), hits))
+        scored.append((score, hits, item))
 
     if not board_items:
         for idx, item in enumerate(default_items, start=1):
-            item_for_score = {
-                "title": item["title"],
-                "subtitle": item["subtitle"],
-                "tags": item["tags"],
-            }
-            score, hits = _score_item(query_tokens, item_for_score, from_board=False)
-            scored.append(
-                (
-                    Recommendation(
-                        id=f"{cid}-default-{idx}",
-                        title=item["title"],
-                        subtitle=item["subtitle"],
-                        tags=item["tags"],
-                        score=score,
-                        detail=f"{item['title']} · {item['subtitle']}",
-                        image_urls=_image_seed_urls(f"{cid}-default-{idx}", count=3),
-                        owner_name=_owner_profile_for(cid, idx)["name"],
-                        owner_email_masked=_mask_email(_owner_profile_for(cid, idx)["email"]),
-                        owner_phone_masked=_mask_phone(_owner_profile_for(cid, idx)["phone"]),
-                    ),
-                    hits,
-                )
-            )
+            default_item = _default_board_item(cid, idx, item)
+            score, hits = _score_item(query_tokens, default_item, from_board=False)
+            scored.append((score, hits, default_item))
 
     if query_tokens:
         matched_only = [row for row in scored if row[1] > 0]
@@ -856,15 +1585,12 @@ def recommend(category_id: Optional[str], message: str, mode: Optional[str] = "f
         else:
             # 거래/쇼핑 도메인은 미일치 fallback 추천을 노출하지 않는다.
             # (예: "코치가방" 검색 시 무관한 명품 후보 노출 방지)
-            domain = CATEGORY_DOMAIN_BY_ID.get(cid, "people")
             if domain == "market" and mode != "publish":
                 return []
 
-    scored.sort(key=lambda row: (row[1], row[0].score), reverse=True)
-    out = [row[0] for row in scored]
-    if mode == "publish":
-        return out[:5]
-    return out[:8]
+    # nlargest는 sorted(..., reverse=True)[:limit]와 같은 (안정) 순서를 보장한다.
+    top = heapq.nlargest(limit, scored, key=lambda row: (row[1], row[0]))
+    return [_recommendation_from_item(item, score=score) for score, _, item in top]
 
 
 def find_action_for_viewer(
@@ -935,41 +1661,41 @@ def recommendation_detail(category_id: str, recommendation_id: str, viewer_email
     }
 
 
-def _is_today_utc(iso_str: str) -> bool:
-    try:
-        dt = datetime.fromisoformat(iso_str)
-    except Exception:
-        return False
-    now = datetime.now(timezone.utc)
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    return dt.astimezone(timezone.utc).date() == now.date()
-
-
 def list_user_listings(user_email: str, today_only: bool = True) -> List[dict]:
     email = (user_email or "").strip().lower()
     if not email:
         return []
 
+    if today_only:
+        today = datetime.now(timezone.utc).date().isoformat()
+        # 쓰기와 겹쳐도 순회 중 변경 오류가 나지 않도록 list()로 한 번에 복사해서 읽는다.
+        refs = list(OWNER_LISTINGS_BY_DAY.get((email, today), ()))
+        by_category = OWNER_LISTINGS.get(email, {})
+        items = []
+        for cid, item_id in refs:
+            item = by_category.get(cid, {}).get(item_id)
+            if item is not None:
+                items.append((cid, item))
+    else:
+        items = [
+            (cid, item)
+            for cid, listings in list(OWNER_LISTINGS.get(email, {}).items())
+            for item in list(listings.values())
+        ]
+
     out: List[dict] = []
-    for cid, items in BOARD.items():
-        for item in items:
-            owner = (item.get("owner_email") or "").strip().lower()
-            if owner != email:
-                continue
-            created_at = item.get("created_at", "")
-            updated_at = item.get("updated_at") or created_at
-            if today_only and not _is_today_utc(created_at):
-                continue
-            out.append(
-                {
-                    "category_id": cid,
-                    "category_name": CATEGORY_NAME_BY_ID.get(cid, cid),
-                    "recommendation": _recommendation_from_item(item, score=0.99).dict(),
-                    "created_at": created_at,
-                    "updated_at": updated_at,
-                }
-            )
+    for cid, item in items:
+        created_at = item.get("created_at", "")
+        updated_at = item.get("updated_at") or created_at
+        out.append(
+            {
+                "category_id": cid,
+                "category_name": CATEGORY_NAME_BY_ID.get(cid, cid),
+                "recommendation": _recommendation_from_item(item, score=0.99).dict(),
+                "created_at": created_at,
+                "updated_at": updated_at,
+            }
+        )
 
     out.sort(key=lambda row: row.get("updated_at", ""), reverse=True)
     return out
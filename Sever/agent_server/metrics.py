@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict
+
+
+class LatencyStats:
+    # 최근 window개 표본으로 p50/p95를 낸다(전체 누적은 count/합계만 유지).
+    def __init__(self, window: int = 1024) -> None:
+        self._samples: Deque[float] = deque(maxlen=max(1, window))
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self._samples.append(elapsed_ms)
+            self.count += 1
+            self.total_ms += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+            total_ms = self.total_ms
+        if not samples:
+            return {"count": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        return {
+            "count": count,
+            "avg_ms": round(total_ms / count, 2),
+            "p50_ms": round(samples[len(samples) // 2], 2),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+            "max_ms": round(samples[-1], 2),
+        }
@@ -25,6 +25,7 @@ class Recommendation(BaseModel):
     owner_name: str = ""
     owner_email_masked: str = ""
     owner_phone_masked: str = ""
+    version: int = 1
 
 
 class ModeOption(BaseModel):
@@ -81,6 +82,8 @@ class AskRequest(BaseModel):
     user_email: Optional[str] = None
     user_name: Optional[str] = None
     target_recommendation_id: Optional[str] = None
+    # LLM 답을 기다릴 시간 예산(ms, 요청 시작 기준). 없으면 서버 기본값(ASK_DEADLINE_MS), 0이면 제한 없음.
+    deadline_ms: Optional[int] = Field(default=None, ge=0)
 
 
 class AskResponse(BaseModel):
@@ -88,6 +91,8 @@ class AskResponse(BaseModel):
     active_mode: str
     action_result: Optional[str] = None
     recommendations: List[Recommendation]
+    # 예산 안에 LLM 답이 오지 않아 정해진 요약 문장으로 답함. 같은 요청을 다시 보내면 캐시된 LLM 답을 받는다.
+    deadline_exceeded: bool = False
 
 
 class ActionHistoryItem(BaseModel):
@@ -115,6 +120,7 @@ class MatchAction(BaseModel):
     note: Optional[str] = None
     created_at: str
     updated_at: str
+    version: int = 1
     history: List[ActionHistoryItem] = Field(default_factory=list)
 
 
@@ -136,6 +142,7 @@ class ActionTransitionRequest(BaseModel):
 
 class ActionListResponse(BaseModel):
     actions: List[MatchAction] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
 
 
 class RecommendationDetailResponse(BaseModel):
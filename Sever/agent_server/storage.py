@@ -0,0 +1,734 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryStore:
+    # 기본 저장소: 프로세스 메모리에만 보관한다(재시작 시 초기화).
+    # 모든 변경은 {"op": ...} 레코드로 _apply()를 거치므로 저널 재생/복구에도 같은 경로를 쓴다.
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._board: Dict[str, Dict[str, Tuple[int, dict]]] = {}
+        self._actions: Dict[str, dict] = {}
+        self._users: Dict[str, dict] = {}
+        self._recency = 0
+
+    def _record(self, record: dict, expected_version: Optional[int] = None) -> bool:
+        with self._lock:
+            if not self._version_matches(record, expected_version):
+                return False
+            self._apply(record)
+        return True
+
+    def _version_matches(self, record: dict, expected_version: Optional[int]) -> bool:
+        # 조건부 쓰기(expected_version)는 저장된 항목의 버전이 같을 때만 반영한다. 호출자가 self._lock을 잡은 상태에서 부른다.
+        if expected_version is None:
+            return True
+        if record["op"] == "action_put":
+            current = self._actions.get(record["action"]["id"])
+        else:
+            row = self._board.get(record["category_id"], {}).get(record["item"]["id"])
+            current = row[1] if row is not None else None
+        return current is not None and current.get("version", 1) == expected_version
+
+    def _apply(self, record: dict) -> None:
+        op = record["op"]
+        if op == "board_put":
+            self._recency += 1
+            self._board.setdefault(record["category_id"], {})[record["item"]["id"]] = (self._recency, record["item"])
+        elif op == "board_delete":
+            self._board.get(record["category_id"], {}).pop(record["item_id"], None)
+        elif op == "action_put":
+            self._actions[record["action"]["id"]] = record["action"]
+        elif op == "user_put":
+            self._users[record["user"]["email"]] = record["user"]
+        elif op == "reset":
+            self._board.clear()
+            self._actions.clear()
+
+    def _board_rows(self) -> Dict[str, List[dict]]:
+        return {
+            cid: [item for _, item in sorted(rows.values(), key=lambda row: row[0], reverse=True)]
+            for cid, rows in self._board.items()
+            if rows
+        }
+
+    def load_board(self) -> Dict[str, List[dict]]:
+        # 카테고리별로 최신 항목이 앞에 오도록 돌려준다.
+        with self._lock:
+            return self._board_rows()
+
+    def put_board_item(self, category_id: str, item: dict, expected_version: Optional[int] = None) -> bool:
+        return self._record({"op": "board_put", "category_id": category_id, "item": item}, expected_version)
+
+    def trim_board(self, limit: int) -> int:
+        # 카테고리별로 최신 limit개만 남기고 지운다(보드 한도). 지운 수를 돌려준다.
+        with self._lock:
+            stale = [(cid, item["id"]) for cid, items in self._board_rows().items() for item in items[limit:]]
+        with self.durable():
+            for cid, item_id in stale:
+                self.delete_board_item(cid, item_id)
+        return len(stale)
+
+    def get_board_item(self, category_id: str, item_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._board.get(category_id, {}).get(item_id)
+            return row[1] if row is not None else None
+
+    def delete_board_item(self, category_id: str, item_id: str) -> None:
+        self._record({"op": "board_delete", "category_id": category_id, "item_id": item_id})
+
+    def load_actions(self) -> List[dict]:
+        with self._lock:
+            return sorted(self._actions.values(), key=lambda action: action.get("created_at", ""))
+
+    def put_action(self, action: dict, expected_version: Optional[int] = None) -> bool:
+        # expected_version이 있으면 저장된 버전이 같을 때만 쓰고, 아니면 False(다른 쪽이 먼저 고쳤다).
+        return self._record({"op": "action_put", "action": action}, expected_version)
+
+    def add_action(self, action: dict) -> dict:
+        # 새 액션을 쓰고 저장된 액션을 돌려준다. 같은 (카테고리, 추천, 요청자)의 진행 중 액션이 이미 있으면
+        # 그 액션을 돌려준다. 단일 프로세스 저장소에서는 matching의 _ACTION_LOCK이 중복을 막으므로 그대로 쓴다.
+        self.put_action(action)
+        return action
+
+    def get_action(self, action_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._actions.get(action_id)
+
+    def load_users(self) -> Dict[str, dict]:
+        with self._lock:
+            return dict(self._users)
+
+    def put_user(self, user: dict) -> None:
+        self._record({"op": "user_put", "user": user})
+
+    def reset(self) -> None:
+        self._record({"op": "reset"})
+
+    def claim_seed(self) -> bool:
+        # 여러 프로세스가 한 저장소를 공유할 때 목데이터 시드를 한 번만 하도록 한다. 단일 프로세스 저장소는 항상 True.
+        return True
+
+    def change_position(self) -> int:
+        return 0
+
+    def watch(
+        self,
+        callback: Callable[[dict], None],
+        after: int = 0,
+        reload: Optional[Callable[[], None]] = None,
+    ) -> None:
+        # 다른 프로세스의 변경 통지. 단일 프로세스 저장소에서는 받을 변경이 없다.
+        return None
+
+    @contextmanager
+    def durable(self) -> Iterator[None]:
+        # 이 블록 안의 쓰기가 디스크에 내려가기를 블록을 나갈 때 한꺼번에 기다린다. matching은 이것을 자기 락 바깥에 두어
+        # 락을 쥔 채 fsync를 기다리지 않게 한다(그래야 여러 요청이 한 fsync에 묶인다). 메모리 저장소는 기다릴 것이 없다.
+        yield
+
+    def flush(self) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"board_items": sum(len(rows) for rows in self._board.values()), "actions": len(self._actions)}
+
+
+SQLITE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS board_items (
+        id TEXT PRIMARY KEY,
+        category_id TEXT NOT NULL,
+        owner_email TEXT NOT NULL DEFAULT '',
+        recency INTEGER NOT NULL,
+        updated_at TEXT NOT NULL DEFAULT '',
+        version INTEGER NOT NULL DEFAULT 1,
+        payload TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_board_category_recency ON board_items (category_id, recency)",
+    "CREATE INDEX IF NOT EXISTS idx_board_owner_email ON board_items (owner_email)",
+    "CREATE INDEX IF NOT EXISTS idx_board_updated_at ON board_items (updated_at)",
+    """
+    CREATE TABLE IF NOT EXISTS actions (
+        id TEXT PRIMARY KEY,
+        category_id TEXT NOT NULL,
+        recommendation_id TEXT NOT NULL,
+        owner_email TEXT NOT NULL DEFAULT '',
+        requester_email TEXT NOT NULL DEFAULT '',
+        status TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT '',
+        updated_at TEXT NOT NULL DEFAULT '',
+        version INTEGER NOT NULL DEFAULT 1,
+        payload TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_actions_category ON actions (category_id, updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_actions_recommendation ON actions (recommendation_id)",
+    "CREATE INDEX IF NOT EXISTS idx_actions_owner_email ON actions (owner_email)",
+    "CREATE INDEX IF NOT EXISTS idx_actions_requester_email ON actions (requester_email)",
+    "CREATE INDEX IF NOT EXISTS idx_actions_updated_at ON actions (updated_at)",
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        email TEXT PRIMARY KEY,
+        payload TEXT NOT NULL
+    )
+    """,
+    # 멀티 워커 동기화용 변경 로그: 같은 트랜잭션에서 테이블 변경과 함께 남긴다.
+    """
+    CREATE TABLE IF NOT EXISTS changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        worker TEXT NOT NULL,
+        payload TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL DEFAULT ''
+    )
+    """,
+)
+
+# 같은 (카테고리, 추천, 요청자)의 진행 중 액션은 하나만. 워커가 여러 개여도 DB가 중복 요청을 막는다.
+SQLITE_OPEN_ACTION_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_actions_open_key "
+    "ON actions (category_id, recommendation_id, requester_email) WHERE status IN ('requested', 'accepted')"
+)
+
+
+class _PendingWrite:
+    # writer 스레드에 넘기는 쓰기 하나. sync=True면 호출자가 done을 기다려 커밋 결과(rowcount/error)를 받는다.
+    # conditional=True(WHERE version=?)인 쓰기는 실제로 바뀐 행이 있을 때만 변경 로그를 남긴다.
+    __slots__ = ("sql", "params", "change", "sync", "conditional", "done", "rowcount", "error")
+
+    def __init__(
+        self,
+        sql: str,
+        params: tuple,
+        change: Optional[str],
+        sync: bool = False,
+        conditional: bool = False,
+    ) -> None:
+        self.sql = sql
+        self.params = params
+        self.change = change
+        self.sync = sync
+        self.conditional = conditional
+        self.done = threading.Event()
+        self.rowcount = 0
+        self.error: Optional[BaseException] = None
+
+
+class SQLiteStore:
+    # SQLite(WAL) 저장소. 요청 스레드는 쓰기를 큐에 넣기만 하고,
+    # 전용 writer 스레드가 flush_interval 동안 모인 쓰기를 한 트랜잭션으로 묶어 커밋한다.
+    # 여러 워커 프로세스가 같은 파일을 쓸 수 있다: 모든 변경은 changes 테이블에도 남고,
+    # 각 워커는 watch()로 다른 워커의 변경을 주기적으로 읽어 메모리 상태에 반영한다.
+    # 액션 상태 전이와 글 수정은 version 열을 조건으로 한 동기 쓰기(UPDATE ... WHERE id=? AND version=?)라
+    # 워커 간에 같은 버전을 두 번 올리는 일이 없고, 진 쪽은 0행 갱신으로 충돌을 알게 된다.
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 256,
+        flush_interval: float = 0.02,
+        sync_interval: float = 0.1,
+        change_retention: int = 100000,
+    ) -> None:
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+        self.change_retention = max(1000, change_retention)
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._last_recency = 0
+        self._recency_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[_PendingWrite]]" = queue.Queue()
+        self.batches_committed = 0
+        self.writes_committed = 0
+        self.write_errors = 0
+        self.changes_applied = 0
+        self.sync_errors = 0
+        self.resyncs = 0
+        self._watch_position = 0
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._readers = threading.local()
+        self._reader_conns: List[sqlite3.Connection] = []
+        self._reader_conns_lock = threading.Lock()
+
+        conn = self._connect()
+        for statement in SQLITE_SCHEMA:
+            conn.execute(statement)
+        self._migrate(conn)
+        conn.close()
+
+        self._writer_conn = self._connect()
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        # version 열이 없던 예전 DB는 열을 추가하고 payload의 version으로 채운다.
+        for table in ("board_items", "actions"):
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if "version" not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+                conn.execute(f"UPDATE {table} SET version = COALESCE(json_extract(payload, '$.version'), 1)")
+        try:
+            conn.execute(SQLITE_OPEN_ACTION_INDEX)
+        except sqlite3.IntegrityError:
+            # 예전 데이터에 이미 중복된 진행 중 액션이 있으면 색인을 만들 수 없다. 중복 방지는 워커 안의 락으로만 된다.
+            logger.warning("sqlite store: duplicate open actions in %s, open-action unique index not created", self.path)
+
+    def _reader(self) -> sqlite3.Connection:
+        # 단건 조회(get_*)용 스레드별 읽기 연결. 요청 스레드와 watcher 스레드가 매번 새로 연결하지 않게 한다.
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._readers.conn = self._connect()
+            with self._reader_conns_lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    def _next_recency(self) -> int:
+        # 멀티 프로세스에서도 대체로 단조 증가하도록 ns 시각 기반으로 만든다.
+        with self._recency_lock:
+            self._last_recency = max(self._last_recency + 1, time.time_ns())
+            return self._last_recency
+
+    def _enqueue(
+        self,
+        sql: str,
+        params: tuple = (),
+        change: Optional[dict] = None,
+        sync: bool = False,
+        conditional: bool = False,
+    ) -> _PendingWrite:
+        # change는 다른 워커에 알릴 변경 레코드(MemoryStore._apply와 같은 형식). 요청 시점 상태로 직렬화해 둔다.
+        payload = json.dumps(change, ensure_ascii=False) if change is not None else None
+        write = _PendingWrite(sql, params, payload, sync=sync, conditional=conditional)
+        self._queue.put(write)
+        return write
+
+    def _execute_sync(self, sql: str, params: tuple, change: Optional[dict], conditional: bool = False) -> int:
+        # 같은 writer 큐를 거쳐(먼저 넣은 비동기 쓰기 뒤에) 커밋될 때까지 기다리고 갱신된 행 수를 돌려준다.
+        write = self._enqueue(sql, params, change, sync=True, conditional=conditional)
+        write.done.wait()
+        if write.error is not None:
+            raise write.error
+        return write.rowcount
+
+    def _write_loop(self) -> None:
+        stopping = False
+        while not stopping:
+            op = self._queue.get()
+            batch: List[_PendingWrite] = []
+            taken = 1
+            if op is None:
+                stopping = True
+            else:
+                batch.append(op)
+                # 기다리는 호출자(sync)가 있으면 flush_interval을 채우지 않고 이미 큐에 있는 것만 모아 바로 커밋한다.
+                urgent = op.sync
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 and not urgent:
+                        break
+                    try:
+                        op = self._queue.get_nowait() if urgent else self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    taken += 1
+                    if op is None:
+                        stopping = True
+                        break
+                    batch.append(op)
+                    urgent = urgent or op.sync
+            try:
+                if batch:
+                    self._commit_batch(batch)
+            finally:
+                for write in batch:
+                    write.done.set()
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    def _commit_batch(self, batch: List[_PendingWrite]) -> None:
+        # 묶음 커밋이 실패하면 한 건씩 다시 커밋해, 문제 있는 쓰기 하나 때문에 같은 묶음의 다른 쓰기가 버려지지 않게 한다.
+        # writer 스레드는 어떤 경우에도 죽지 않는다(죽으면 이후 flush()가 영원히 대기한다).
+        try:
+            self._commit(batch)
+            return
+        except sqlite3.Error as exc:
+            if len(batch) == 1:
+                self._fail(batch[0], exc)
+                return
+            logger.warning("sqlite store: batch of %d writes failed (%r), retrying one by one", len(batch), exc)
+        for write in batch:
+            try:
+                self._commit([write])
+            except sqlite3.Error as exc:
+                self._fail(write, exc)
+
+    def _fail(self, write: _PendingWrite, exc: sqlite3.Error) -> None:
+        self.write_errors += 1
+        write.error = exc
+        logger.error("sqlite store: write dropped (%s): %r", " ".join(write.sql.split()[:3]), exc)
+
+    def _commit(self, batch: List[_PendingWrite]) -> None:
+        conn = self._writer_conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for write in batch:
+                write.rowcount = conn.execute(write.sql, write.params).rowcount
+                if write.change is None or (write.conditional and write.rowcount == 0):
+                    continue
+                conn.execute("INSERT INTO changes (worker, payload) VALUES (?, ?)", (self.worker_id, write.change))
+            if self.batches_committed % 100 == 0:
+                # 오래된 변경 로그 정리(늦게 뜬 워커는 테이블에서 전체 상태를 읽으므로 로그 전체가 필요 없다).
+                conn.execute(
+                    "DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?",
+                    (self.change_retention,),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        self.batches_committed += 1
+        self.writes_committed += len(batch)
+
+    def load_board(self) -> Dict[str, List[dict]]:
+        self.flush()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT category_id, payload FROM board_items ORDER BY category_id, recency DESC"
+            ).fetchall()
+        finally:
+            conn.close()
+        out: Dict[str, List[dict]] = {}
+        for category_id, payload in rows:
+            out.setdefault(category_id, []).append(json.loads(payload))
+        return out
+
+    def put_board_item(self, category_id: str, item: dict, expected_version: Optional[int] = None) -> bool:
+        change = {"op": "board_put", "category_id": category_id, "item": item}
+        if expected_version is not None:
+            # 수정: 저장된 버전이 expected_version일 때만 바꾸고, 커밋까지 기다려 결과를 돌려준다.
+            rowcount = self._execute_sync(
+                "UPDATE board_items SET owner_email = ?, recency = ?, updated_at = ?, version = ?, payload = ? "
+                "WHERE id = ? AND category_id = ? AND version = ?",
+                (
+                    (item.get("owner_email") or "").lower(),
+                    self._next_recency(),
+                    item.get("updated_at", ""),
+                    item.get("version", 1),
+                    json.dumps(item, ensure_ascii=False),
+                    item["id"],
+                    category_id,
+                    expected_version,
+                ),
+                change,
+                conditional=True,
+            )
+            return rowcount == 1
+        self._enqueue(
+            "INSERT INTO board_items (id, category_id, owner_email, recency, updated_at, version, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET category_id=excluded.category_id, owner_email=excluded.owner_email, "
+            "recency=excluded.recency, updated_at=excluded.updated_at, version=excluded.version, "
+            "payload=excluded.payload",
+            (
+                item["id"],
+                category_id,
+                (item.get("owner_email") or "").lower(),
+                self._next_recency(),
+                item.get("updated_at", ""),
+                item.get("version", 1),
+                json.dumps(item, ensure_ascii=False),
+            ),
+            change=change,
+        )
+        return True
+
+    def trim_board(self, limit: int) -> int:
+        # 카테고리별로 최신 limit개(recency 기준)만 남긴다. 실행 중에는 보드 한도를 넘어 밀려난 글을 그때그때 지우지만,
+        # 한도를 줄였거나 지우기가 유실된 행은 시작(적재) 때 여기서 정리한다. 다른 워커 메모리에는 애초에 없는 행이라 변경 로그는 남기지 않는다.
+        self.flush()
+        return self._execute_sync(
+            "DELETE FROM board_items WHERE id IN (SELECT id FROM (SELECT id, ROW_NUMBER() OVER "
+            "(PARTITION BY category_id ORDER BY recency DESC) AS pos FROM board_items) WHERE pos > ?)",
+            (limit,),
+            None,
+        )
+
+    def get_board_item(self, category_id: str, item_id: str) -> Optional[dict]:
+        row = self._reader().execute(
+            "SELECT payload FROM board_items WHERE id = ? AND category_id = ?", (item_id, category_id)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def delete_board_item(self, category_id: str, item_id: str) -> None:
+        self._enqueue(
+            "DELETE FROM board_items WHERE id = ? AND category_id = ?",
+            (item_id, category_id),
+            change={"op": "board_delete", "category_id": category_id, "item_id": item_id},
+        )
+
+    def load_actions(self) -> List[dict]:
+        self.flush()
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT payload FROM actions ORDER BY created_at, rowid").fetchall()
+        finally:
+            conn.close()
+        return [json.loads(payload) for (payload,) in rows]
+
+    @staticmethod
+    def _action_row(action: dict) -> tuple:
+        return (
+            action["id"],
+            action["category_id"],
+            action["recommendation_id"],
+            action.get("owner_email", ""),
+            action.get("requester_email", ""),
+            action["status"],
+            action.get("created_at", ""),
+            action.get("updated_at", ""),
+            action.get("version", 1),
+            json.dumps(action, ensure_ascii=False),
+        )
+
+    def put_action(self, action: dict, expected_version: Optional[int] = None) -> bool:
+        change = {"op": "action_put", "action": action}
+        if expected_version is not None:
+            # 상태 전이: 저장된 버전이 expected_version일 때만 바꾸고, 커밋까지 기다려 결과를 돌려준다.
+            rowcount = self._execute_sync(
+                "UPDATE actions SET status = ?, updated_at = ?, version = ?, payload = ? WHERE id = ? AND version = ?",
+                (
+                    action["status"],
+                    action.get("updated_at", ""),
+                    action.get("version", 1),
+                    json.dumps(action, ensure_ascii=False),
+                    action["id"],
+                    expected_version,
+                ),
+                change,
+                conditional=True,
+            )
+            return rowcount == 1
+        self._enqueue(
+            "INSERT INTO actions (id, category_id, recommendation_id, owner_email, requester_email, status, "
+            "created_at, updated_at, version, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET status=excluded.status, updated_at=excluded.updated_at, "
+            "version=excluded.version, payload=excluded.payload",
+            self._action_row(action),
+            change=change,
+        )
+        return True
+
+    def add_action(self, action: dict) -> dict:
+        # 진행 중 액션 유일 색인에 걸리면(다른 워커가 먼저 만들었으면) 쓰지 않고 그 액션을 읽어 돌려준다.
+        rowcount = self._execute_sync(
+            "INSERT INTO actions (id, category_id, recommendation_id, owner_email, requester_email, status, "
+            "created_at, updated_at, version, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT DO NOTHING",
+            self._action_row(action),
+            {"op": "action_put", "action": action},
+            conditional=True,
+        )
+        if rowcount == 1:
+            return action
+        row = self._reader().execute(
+            "SELECT payload FROM actions WHERE category_id = ? AND recommendation_id = ? AND requester_email = ? "
+            "AND status IN ('requested', 'accepted') ORDER BY created_at, rowid LIMIT 1",
+            (action["category_id"], action["recommendation_id"], action.get("requester_email", "")),
+        ).fetchone()
+        if row is None:
+            raise sqlite3.IntegrityError(f"action {action['id']} conflicts with an existing row")
+        return json.loads(row[0])
+
+    def get_action(self, action_id: str) -> Optional[dict]:
+        row = self._reader().execute("SELECT payload FROM actions WHERE id = ?", (action_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def load_users(self) -> Dict[str, dict]:
+        self.flush()
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT email, payload FROM users").fetchall()
+        finally:
+            conn.close()
+        return {email: json.loads(payload) for email, payload in rows}
+
+    def put_user(self, user: dict) -> None:
+        self._enqueue(
+            "INSERT INTO users (email, payload) VALUES (?, ?) "
+            "ON CONFLICT(email) DO UPDATE SET payload=excluded.payload",
+            (user["email"], json.dumps(user, ensure_ascii=False)),
+            change={"op": "user_put", "user": user},
+        )
+
+    def reset(self) -> None:
+        self._enqueue("DELETE FROM board_items")
+        self._enqueue("DELETE FROM actions", change={"op": "reset"})
+
+    def claim_seed(self) -> bool:
+        # 처음 시드를 맡은 워커만 True. 나머지 워커는 변경 로그로 시드 결과를 받는다.
+        conn = self._connect()
+        try:
+            cursor = conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('seeded', ?)", (self.worker_id,))
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def change_position(self) -> int:
+        # load_* 전에 읽어 두고 watch(after=...)에 넘기면 적재와 구독 사이의 변경을 놓치지 않는다.
+        self.flush()
+        conn = self._connect()
+        try:
+            (seq,) = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()
+        finally:
+            conn.close()
+        return int(seq)
+
+    def watch(
+        self,
+        callback: Callable[[dict], None],
+        after: int = 0,
+        reload: Optional[Callable[[], None]] = None,
+    ) -> None:
+        # reload는 이 워커가 변경 로그 보존 범위(change_retention) 밖으로 밀렸을 때 전체 상태를 다시 올리는 함수다.
+        if self._watcher is not None:
+            return
+        self._watch_position = after
+        self._watcher = threading.Thread(
+            target=self._watch_loop, args=(callback, reload), name="sqlite-store-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def _watch_loop(self, callback: Callable[[dict], None], reload: Optional[Callable[[], None]]) -> None:
+        conn = self._connect()
+        try:
+            while not self._stop.wait(self.sync_interval):
+                try:
+                    rows = conn.execute(
+                        "SELECT seq, worker, payload FROM changes WHERE seq > ? ORDER BY seq LIMIT 1000",
+                        (self._watch_position,),
+                    ).fetchall()
+                    # seq는 빈틈없이 늘고 지우는 건 오래된 로그 정리뿐이다. 다음 seq가 비었으면 읽기 전에 정리되어
+                    # 놓친 변경이 있다는 뜻이므로, 현재 끝 위치를 잡고 전체 상태를 다시 올린 뒤 거기서부터 이어 간다.
+                    if rows and rows[0][0] > self._watch_position + 1:
+                        (latest,) = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()
+                        logger.warning(
+                            "sqlite store: worker %s fell behind the change log (at %d, oldest kept %d), reloading",
+                            self.worker_id,
+                            self._watch_position,
+                            rows[0][0],
+                        )
+                        if reload is not None:
+                            reload()
+                        self.resyncs += 1
+                        self._watch_position = int(latest)
+                        continue
+                except Exception:
+                    # 읽기나 재적재가 실패하면 위치를 그대로 두고 다음 주기에 다시 시도한다.
+                    self.sync_errors += 1
+                    continue
+                for seq, worker, payload in rows:
+                    self._watch_position = seq
+                    if worker == self.worker_id:
+                        continue
+                    try:
+                        callback(json.loads(payload))
+                        self.changes_applied += 1
+                    except Exception:
+                        # 한 레코드 반영 실패로 동기화 전체가 멈추지 않도록 건너뛴다.
+                        self.sync_errors += 1
+        finally:
+            conn.close()
+
+    @contextmanager
+    def durable(self) -> Iterator[None]:
+        # 결과가 필요한 쓰기(조건부 수정, add_action)는 호출 안에서 커밋을 기다리고, 나머지는 큐에 넣고 바로 돌아온다.
+        yield
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        if not self._writer.is_alive():
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer_conn.close()
+        with self._reader_conns_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "pending_writes": self._queue.qsize(),
+            "batches_committed": self.batches_committed,
+            "writes_committed": self.writes_committed,
+            "write_errors": self.write_errors,
+            "sync_position": self._watch_position,
+            "changes_applied": self.changes_applied,
+            "sync_errors": self.sync_errors,
+            "resyncs": self.resyncs,
+        }
+
+
+def create_store(kind: Optional[str] = None):
+    # MATCH_STORAGE=memory(기본) | sqlite | journal
+    resolved = (kind or os.getenv("MATCH_STORAGE", "memory")).strip().lower()
+    if resolved == "journal":
+        from .journal import JournalStore
+
+        return JournalStore(
+            directory=os.getenv("MATCH_JOURNAL_DIR", "journal"),
+            flush_interval=float(os.getenv("MATCH_JOURNAL_FLUSH_MS", "5")) / 1000,
+            snapshot_interval=float(os.getenv("MATCH_SNAPSHOT_INTERVAL", "300")),
+            snapshot_every=int(os.getenv("MATCH_SNAPSHOT_EVERY", "10000")),
+        )
+    if resolved == "sqlite":
+        return SQLiteStore(
+            path=os.getenv("MATCH_SQLITE_PATH", "agent_server.db"),
+            batch_size=int(os.getenv("MATCH_SQLITE_BATCH_SIZE", "256")),
+            flush_interval=float(os.getenv("MATCH_SQLITE_FLUSH_MS", "20")) / 1000,
+            sync_interval=float(os.getenv("MATCH_SYNC_INTERVAL_MS", "100")) / 1000,
+        )
+    return MemoryStore()
@@ -0,0 +1,107 @@
+# Ollama가 응답하지 않을 때(가짜 Ollama가 타임아웃보다 오래 멈춤) /agent/ask와 /categories 지연 비교
+#   차단기 끔(실패 한도를 사실상 무한대로) vs 켬(OLLAMA_BREAKER_FAILURES 기본값)
+#   cd Sever
+#   python -m benchmarks.bench_ai_outage --concurrency 32 --seconds 8 --ollama-timeout 2
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+from benchmarks.bench_ask_async import _client
+from benchmarks.bench_workers import _wait_ready
+
+
+def _probe(base_url: str, seconds: float) -> List[float]:
+    session = requests.Session()
+    samples: List[float] = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        session.get(f"{base_url}/categories", timeout=60)
+        samples.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.1)
+    return sorted(samples)
+
+
+def _run(breaker: bool, args: argparse.Namespace) -> Dict[str, float]:
+    env = dict(
+        os.environ,
+        MATCH_STORAGE="memory",
+        OLLAMA_BASE_URL=f"http://127.0.0.1:{args.llm_port}",
+        OLLAMA_TIMEOUT=str(args.ollama_timeout),
+        LLM_CACHE_SIZE="0",
+        LLM_COALESCE="0",
+        LLM_CONCURRENCY=str(args.concurrency),
+    )
+    if not breaker:
+        env["OLLAMA_BREAKER_FAILURES"] = str(10**9)
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "agent_server.main:app",
+            "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        _wait_ready(base_url)
+        with ThreadPoolExecutor(args.concurrency + 1) as pool:
+            futures = [pool.submit(_client, base_url, args.seconds, idx) for idx in range(args.concurrency)]
+            probe = pool.submit(_probe, base_url, args.seconds)
+            results = [future.result() for future in futures]
+            probe_samples = probe.result()
+        state = requests.get(f"{base_url}/health/ai", timeout=5).json()["breaker"]["state"]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    samples = sorted(sample for row in results for sample in row[2])
+    return {
+        "rps": sum(row[0] for row in results) / args.seconds,
+        "p50": statistics.median(samples) if samples else 0.0,
+        "p95": samples[int(len(samples) * 0.95)] if samples else 0.0,
+        "probe_p50": statistics.median(probe_samples) if probe_samples else 0.0,
+        "state": state,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--ollama-timeout", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=18003)
+    parser.add_argument("--llm-port", type=int, default=11508)
+    args = parser.parse_args()
+
+    # 타임아웃보다 훨씬 오래 멈추는 가짜 Ollama(과부하/먹통 흉내)
+    llm = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_ollama",
+            "--port", str(args.llm_port), "--delay-ms", str(args.ollama_timeout * 1000 * 30),
+        ]
+    )
+    time.sleep(1.0)
+
+    print(f"concurrency={args.concurrency} seconds={args.seconds} ollama_timeout={args.ollama_timeout}s (Ollama hung)")
+    print(f"{'breaker':>8} {'req/s':>9} {'p50ms':>8} {'p95ms':>8} {'/categories p50ms':>18} {'state':>10}")
+    for breaker in (False, True):
+        row = _run(breaker, args)
+        print(
+            f"{'on' if breaker else 'off':>8} {row['rps']:>9.1f} {row['p50']:>8.1f} {row['p95']:>8.1f} "
+            f"{row['probe_p50']:>18.1f} {row['state']:>10}"
+        )
+    llm.terminate()
+    llm.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# 느린 LLM(가짜 Ollama, 지연 주입) 상황에서 동시 /agent/ask 처리량 비교
+#   동기(OLLAMA_ASYNC=0, 스레드풀에서 requests로 대기) vs 비동기(httpx AsyncClient)
+#   부하 중 가벼운 동기 엔드포인트(GET /actions) 지연도 함께 잰다: 스레드풀이 LLM 대기로 꽉 차면 같이 밀린다.
+#   cd Sever
+#   python -m benchmarks.bench_ask_async --concurrency 128 --llm-delay-ms 500 --seconds 10
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import requests
+
+from benchmarks.bench_workers import _wait_ready
+
+# 거래 도메인(find)은 LLM을 부르지 않으므로 LLM을 타는 카테고리만 쓴다.
+MESSAGES: List[Tuple[str, str]] = [
+    ("friend", "주말에 같이 러닝할 친구 찾아요"),
+    ("dating", "차분하고 대화 잘 통하는 사람"),
+    ("soccer", "토요일 오전 11:11 상대팀 구해요"),
+    ("futsal", "강남 평일 저녁 풋살"),
+]
+
+
+def _client(base_url: str, seconds: float, seed: int) -> Tuple[int, int, List[float]]:
+    session = requests.Session()
+    ok = 0
+    failed = 0
+    samples: List[float] = []
+    deadline = time.monotonic() + seconds
+    idx = seed
+    while time.monotonic() < deadline:
+        category_id, message = MESSAGES[idx % len(MESSAGES)]
+        idx += 1
+        started = time.perf_counter()
+        try:
+            res = session.post(
+                f"{base_url}/agent/ask",
+                json={"category_id": category_id, "mode": "find", "message": message},
+                timeout=60,
+            )
+            if res.status_code == 200:
+                ok += 1
+                samples.append((time.perf_counter() - started) * 1000)
+            else:
+                failed += 1
+        except requests.RequestException:
+            failed += 1
+    return ok, failed, samples
+
+
+def _probe(base_url: str, seconds: float) -> List[float]:
+    session = requests.Session()
+    samples: List[float] = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        session.get(f"{base_url}/actions", params={"limit": 20}, timeout=60)
+        samples.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.1)
+    return sorted(samples)
+
+
+def _run(async_mode: bool, args: argparse.Namespace) -> Dict[str, float]:
+    env = dict(
+        os.environ,
+        MATCH_STORAGE="memory",
+        OLLAMA_BASE_URL=f"http://127.0.0.1:{args.llm_port}",
+        OLLAMA_ASYNC="1" if async_mode else "0",
+        # 가짜 LLM은 동시 생성 제한이 없으므로 입장 제한도 클라이언트 수만큼 연다.
+        LLM_CONCURRENCY=str(args.concurrency),
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "agent_server.main:app",
+            "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        _wait_ready(base_url)
+        with ThreadPoolExecutor(args.concurrency + 1) as pool:
+            futures = [pool.submit(_client, base_url, args.seconds, idx) for idx in range(args.concurrency)]
+            probe = pool.submit(_probe, base_url, args.seconds)
+            results = [future.result() for future in futures]
+            probe_samples = probe.result()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    ok = sum(row[0] for row in results)
+    samples = sorted(sample for row in results for sample in row[2])
+    return {
+        "rps": ok / args.seconds,
+        "failed": sum(row[1] for row in results),
+        "p50": statistics.median(samples) if samples else 0.0,
+        "p95": samples[int(len(samples) * 0.95)] if samples else 0.0,
+        "probe_p50": statistics.median(probe_samples) if probe_samples else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--llm-delay-ms", type=float, default=500.0)
+    parser.add_argument("--port", type=int, default=18001)
+    parser.add_argument("--llm-port", type=int, default=11501)
+    args = parser.parse_args()
+
+    # 가짜 LLM은 별도 프로세스로 띄운다(클라이언트 스레드와 GIL을 나눠 쓰면 측정이 왜곡된다).
+    llm = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_ollama",
+            "--port", str(args.llm_port), "--delay-ms", str(args.llm_delay_ms),
+        ]
+    )
+    time.sleep(1.0)
+
+    print(f"concurrency={args.concurrency} llm_delay={args.llm_delay_ms:.0f}ms seconds={args.seconds}")
+    print(f"{'mode':>6} {'req/s':>9} {'p50ms':>8} {'p95ms':>8} {'failed':>7} {'/actions p50ms':>15}")
+    for async_mode in (False, True):
+        row = _run(async_mode, args)
+        label = "async" if async_mode else "sync"
+        print(
+            f"{label:>6} {row['rps']:>9.1f} {row['p50']:>8.1f} {row['p95']:>8.1f} {int(row['failed']):>7} "
+            f"{row['probe_p50']:>15.1f}"
+        )
+    llm.terminate()
+    llm.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# /agent/ask 시간 예산(deadline_ms) 끔 vs 켬: 느리고 밀리는 Ollama(가짜, 동시 생성 parallel개)에서 지연 꼬리 비교
+#   예산을 넘긴 요청은 추천 요약 문장으로 먼저 답하고(deadline_exceeded), LLM 답은 뒤에서 캐시에 채워진다.
+#   fallback 열은 LLM 대기열이 넘쳐 엔진이 바로 fallback 문장으로 답한 수다(예산과 무관).
+#   cd Sever
+#   python -m benchmarks.bench_ask_deadline --clients 16 --seconds 8 --llm-delay-ms 400 --parallel 2 --deadline-ms 1000
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import requests
+
+from benchmarks.bench_ask_async import MESSAGES
+from benchmarks.bench_workers import _wait_ready
+
+
+FALLBACK_MARKER = "요청을 반영 중입니다"
+
+
+def _client(base_url: str, seconds: float, seed: int, deadline_ms: int) -> Tuple[int, int, List[float]]:
+    session = requests.Session()
+    exceeded = 0
+    fallback = 0
+    samples: List[float] = []
+    deadline = time.monotonic() + seconds
+    idx = seed
+    while time.monotonic() < deadline:
+        category_id, message = MESSAGES[idx % len(MESSAGES)]
+        idx += 1
+        started = time.perf_counter()
+        res = session.post(
+            f"{base_url}/agent/ask",
+            json={"category_id": category_id, "mode": "find", "message": f"{message} {seed}-{idx}", "deadline_ms": deadline_ms},
+            timeout=120,
+        )
+        samples.append((time.perf_counter() - started) * 1000)
+        body = res.json()
+        exceeded += bool(body.get("deadline_exceeded"))
+        fallback += FALLBACK_MARKER in body.get("assistant_message", "")
+    return exceeded, fallback, samples
+
+
+def _run(deadline_ms: int, args: argparse.Namespace) -> Dict[str, float]:
+    env = dict(
+        os.environ,
+        MATCH_STORAGE="memory",
+        OLLAMA_BASE_URL=f"http://127.0.0.1:{args.llm_port}",
+        OLLAMA_WARMUP="0",
+        LLM_CONCURRENCY=str(args.clients),
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "agent_server.main:app",
+            "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        _wait_ready(base_url)
+        with ThreadPoolExecutor(args.clients) as pool:
+            futures = [pool.submit(_client, base_url, args.seconds, idx, deadline_ms) for idx in range(args.clients)]
+            results = [future.result() for future in futures]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    samples = sorted(sample for *_, row in results for sample in row)
+    return {
+        "count": len(samples),
+        "exceeded": sum(row[0] for row in results),
+        "fallback": sum(row[1] for row in results),
+        "p50": statistics.median(samples),
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "max": samples[-1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--llm-delay-ms", type=float, default=400.0)
+    parser.add_argument("--parallel", type=int, default=2)
+    parser.add_argument("--deadline-ms", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=18006)
+    parser.add_argument("--llm-port", type=int, default=11513)
+    args = parser.parse_args()
+
+    llm = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_ollama", "--port", str(args.llm_port),
+            "--delay-ms", str(args.llm_delay_ms), "--parallel", str(args.parallel),
+        ]
+    )
+    time.sleep(1.0)
+
+    print(f"clients={args.clients} seconds={args.seconds} llm_delay={args.llm_delay_ms:.0f}ms parallel={args.parallel}")
+    print(f"{'deadline':>9} {'requests':>9} {'exceeded':>9} {'fallback':>9} {'p50ms':>8} {'p99ms':>8} {'maxms':>8}")
+    for deadline_ms in (0, args.deadline_ms):
+        row = _run(deadline_ms, args)
+        print(
+            f"{deadline_ms or 'off':>9} {row['count']:>9} {row['exceeded']:>9} {row['fallback']:>9} {row['p50']:>8.1f} "
+            f"{row['p99']:>8.1f} {row['max']:>8.1f}"
+        )
+    llm.terminate()
+    llm.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# /agent/ask(한 번에 응답) vs /agent/ask/stream(SSE)의 체감 지연 비교 (가짜 Ollama, 지연 주입)
+#   ttfb: 응답 첫 바이트까지, first_token: 첫 LLM 조각(event: token)까지, total: 응답 끝까지
+#   cd Sever
+#   python -m benchmarks.bench_ask_stream --requests 20 --concurrency 4 --llm-delay-ms 300 --token-delay-ms 40
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from benchmarks.bench_ask_async import MESSAGES
+from benchmarks.bench_workers import _wait_ready
+
+
+def _ask(base_url: str, idx: int, stream: bool) -> Tuple[float, Optional[float], float]:
+    category_id, message = MESSAGES[idx % len(MESSAGES)]
+    path = "/agent/ask/stream" if stream else "/agent/ask"
+    started = time.perf_counter()
+    ttfb: Optional[float] = None
+    first_token: Optional[float] = None
+    with requests.post(
+        f"{base_url}{path}",
+        json={"category_id": category_id, "mode": "find", "message": message},
+        stream=True,
+        timeout=60,
+    ) as res:
+        res.raise_for_status()
+        for line in res.iter_lines():
+            now = (time.perf_counter() - started) * 1000
+            if ttfb is None:
+                ttfb = now
+            if first_token is None and line == b"event: token":
+                first_token = now
+    total = (time.perf_counter() - started) * 1000
+    return ttfb if ttfb is not None else total, first_token, total
+
+
+def _summary(samples: List[float]) -> str:
+    if not samples:
+        return f"{'-':>8} {'-':>8}"
+    samples = sorted(samples)
+    return f"{statistics.median(samples):>8.1f} {samples[int(len(samples) * 0.95)]:>8.1f}"
+
+
+def _run(base_url: str, stream: bool, args: argparse.Namespace) -> Dict[str, List[float]]:
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        rows = list(pool.map(lambda idx: _ask(base_url, idx, stream), range(args.requests)))
+    return {
+        "ttfb": [row[0] for row in rows],
+        "first_token": [row[1] for row in rows if row[1] is not None],
+        "total": [row[2] for row in rows],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-delay-ms", type=float, default=300.0)
+    parser.add_argument("--token-delay-ms", type=float, default=40.0)
+    parser.add_argument("--port", type=int, default=18002)
+    parser.add_argument("--llm-port", type=int, default=11502)
+    args = parser.parse_args()
+
+    llm = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_ollama", "--port", str(args.llm_port),
+            "--delay-ms", str(args.llm_delay_ms), "--token-delay-ms", str(args.token_delay_ms),
+        ]
+    )
+    env = dict(os.environ, MATCH_STORAGE="memory", OLLAMA_BASE_URL=f"http://127.0.0.1:{args.llm_port}")
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "agent_server.main:app",
+            "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        _wait_ready(base_url)
+        print(
+            f"requests={args.requests} concurrency={args.concurrency} "
+            f"llm_delay={args.llm_delay_ms:.0f}ms token_delay={args.token_delay_ms:.0f}ms"
+        )
+        print(f"{'endpoint':>18} {'ttfb p50':>8} {'p95':>8} {'1st tok':>8} {'p95':>8} {'total':>8} {'p95':>8}")
+        for stream in (False, True):
+            row = _run(base_url, stream, args)
+            label = "/agent/ask/stream" if stream else "/agent/ask"
+            print(f"{label:>18} {_summary(row['ttfb'])} {_summary(row['first_token'])} {_summary(row['total'])}")
+        # 서버 쪽에서 잰 값(/metrics의 ask_stream)
+        print("server", requests.get(f"{base_url}/metrics", timeout=5).json()["ask_stream"])
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        llm.terminate()
+        llm.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
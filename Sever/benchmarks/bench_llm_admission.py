@@ -0,0 +1,132 @@
+# LLM 입장 제한(동시 호출 수 + 대기열) 유무에 따른 /agent/ask, /categories 지연 비교
+# 가짜 Ollama는 동시에 parallel개만 생성한다(실제 모델 서버처럼 나머지는 서버 안에서 줄을 선다).
+#   off: 제한 없이 모두 Ollama로 보냄 / fallback: 넘치면 fallback 문장 / reject: 넘치면 429
+#   cd Sever
+#   python -m benchmarks.bench_llm_admission --clients 64 --seconds 8 --llm-delay-ms 500 --parallel 2
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import requests
+
+from benchmarks.bench_ai_outage import _probe
+from benchmarks.bench_ask_async import MESSAGES
+from benchmarks.bench_workers import _wait_ready
+
+
+def _client(base_url: str, seconds: float, seed: int) -> Tuple[Dict[int, int], List[float]]:
+    session = requests.Session()
+    codes: Dict[int, int] = {}
+    samples: List[float] = []
+    deadline = time.monotonic() + seconds
+    idx = seed
+    while time.monotonic() < deadline:
+        category_id, message = MESSAGES[idx % len(MESSAGES)]
+        idx += 1
+        started = time.perf_counter()
+        try:
+            res = session.post(
+                f"{base_url}/agent/ask",
+                json={"category_id": category_id, "mode": "find", "message": f"{message} {seed}-{idx}"},
+                timeout=60,
+            )
+            codes[res.status_code] = codes.get(res.status_code, 0) + 1
+            samples.append((time.perf_counter() - started) * 1000)
+        except requests.RequestException:
+            codes[0] = codes.get(0, 0) + 1
+    return codes, samples
+
+
+def _run(mode: str, args: argparse.Namespace) -> Dict[str, object]:
+    env = dict(
+        os.environ,
+        MATCH_STORAGE="memory",
+        OLLAMA_BASE_URL=f"http://127.0.0.1:{args.llm_port}",
+        LLM_CACHE_SIZE="0",
+        LLM_CONCURRENCY=str(args.parallel),
+        LLM_QUEUE_MAX=str(args.queue_max),
+        LLM_QUEUE_WAIT_MS=str(args.queue_wait_ms),
+        LLM_SHED_MODE=mode,
+    )
+    if mode == "off":
+        env.update(LLM_CONCURRENCY="100000", LLM_SHED_MODE="fallback")
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "agent_server.main:app",
+            "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        _wait_ready(base_url)
+        with ThreadPoolExecutor(args.clients + 1) as pool:
+            futures = [pool.submit(_client, base_url, args.seconds, idx) for idx in range(args.clients)]
+            probe = pool.submit(_probe, base_url, args.seconds)
+            results = [future.result() for future in futures]
+            probe_samples = probe.result()
+        admission = requests.get(f"{base_url}/metrics", timeout=5).json()["llm_admission"]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    codes: Dict[int, int] = {}
+    for row_codes, _ in results:
+        for code, count in row_codes.items():
+            codes[code] = codes.get(code, 0) + count
+    samples = sorted(sample for _, row in results for sample in row)
+    return {
+        "codes": codes,
+        "p50": statistics.median(samples) if samples else 0.0,
+        "p95": samples[int(len(samples) * 0.95)] if samples else 0.0,
+        "probe_p50": statistics.median(probe_samples) if probe_samples else 0.0,
+        "admission": admission,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--llm-delay-ms", type=float, default=500.0)
+    parser.add_argument("--parallel", type=int, default=2)
+    parser.add_argument("--queue-max", type=int, default=16)
+    parser.add_argument("--queue-wait-ms", type=float, default=2000.0)
+    parser.add_argument("--port", type=int, default=18004)
+    parser.add_argument("--llm-port", type=int, default=11509)
+    args = parser.parse_args()
+
+    llm = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_ollama", "--port", str(args.llm_port),
+            "--delay-ms", str(args.llm_delay_ms), "--parallel", str(args.parallel),
+        ]
+    )
+    time.sleep(1.0)
+
+    print(
+        f"clients={args.clients} seconds={args.seconds} llm_delay={args.llm_delay_ms:.0f}ms parallel={args.parallel} "
+        f"queue_max={args.queue_max} queue_wait={args.queue_wait_ms:.0f}ms"
+    )
+    print(f"{'mode':>8} {'200':>6} {'429':>6} {'p50ms':>8} {'p95ms':>8} {'/categories p50ms':>18} {'peak q':>7} {'wait p95':>9}")
+    for mode in ("off", "fallback", "reject"):
+        row = _run(mode, args)
+        codes = row["codes"]
+        admission = row["admission"]
+        print(
+            f"{mode:>8} {codes.get(200, 0):>6} {codes.get(429, 0):>6} {row['p50']:>8.1f} {row['p95']:>8.1f} "
+            f"{row['probe_p50']:>18.1f} {admission['peak_queue_depth']:>7} {admission['wait']['p95_ms']:>9.1f}"
+        )
+    llm.terminate()
+    llm.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
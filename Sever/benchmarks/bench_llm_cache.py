@@ -0,0 +1,64 @@
+# LLM 답변 캐시 미스(가짜 Ollama 호출) vs 히트 지연 비교 (프로세스 안에서 AIEngine 직접 호출)
+#   cd Sever
+#   python -m benchmarks.bench_llm_cache --rounds 200 --llm-delay-ms 50
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from typing import List
+
+
+def _summary(label: str, samples_us: List[float]) -> None:
+    samples_us = sorted(samples_us)
+    print(
+        f"{label:>6} {len(samples_us):>6} {statistics.median(samples_us):>10.1f} "
+        f"{samples_us[int(len(samples_us) * 0.95)]:>10.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--llm-delay-ms", type=float, default=50.0)
+    parser.add_argument("--llm-port", type=int, default=11503)
+    args = parser.parse_args()
+
+    from benchmarks.fake_ollama import serve
+
+    llm = serve(args.llm_port, args.llm_delay_ms)
+    threading.Thread(target=llm.serve_forever, daemon=True).start()
+    os.environ["OLLAMA_BASE_URL"] = f"http://127.0.0.1:{args.llm_port}"
+
+    from agent_server.ai_engine import AIEngine
+
+    engine = AIEngine()
+    context = "추천 결과 총 3건\n1. 친구 프로필: 주말 러너 | 한강 러닝 | 태그: 러닝 | 점수: 82"
+
+    async def run() -> None:
+        misses: List[float] = []
+        hits: List[float] = []
+        # 매 라운드 새 메시지(미스) 한 번 + 같은 메시지(히트) 한 번
+        for idx in range(args.rounds):
+            message = f"주말에 같이 러닝할 친구 찾아요 {idx}"
+            for bucket in (misses, hits):
+                started = time.perf_counter()
+                await engine.areply("friend", message, "find", recommendation_context=context)
+                bucket.append((time.perf_counter() - started) * 1_000_000)
+        await engine.aclose()
+        print(f"rounds={args.rounds} llm_delay={args.llm_delay_ms:.0f}ms")
+        print(f"{'case':>6} {'n':>6} {'p50 us':>10} {'p95 us':>10}")
+        _summary("miss", misses)
+        _summary("hit", hits)
+        print(json.dumps(engine.cache_stats(), ensure_ascii=False))
+
+    asyncio.run(run())
+    llm.shutdown()
+
+
+if __name__ == "__main__":
+    main()
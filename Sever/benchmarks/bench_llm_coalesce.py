@@ -0,0 +1,70 @@
+# 같은 질문이 한꺼번에 몰릴 때 single-flight 유무 비교 (프로세스 안에서 AIEngine 직접 호출, 답변 캐시는 끔)
+# 가짜 Ollama는 동시에 parallel개만 생성하도록 제한해 실제 모델 서버처럼 줄을 세운다.
+#   cd Sever
+#   python -m benchmarks.bench_llm_coalesce --bursts 5 --burst-size 32 --distinct 4 --llm-delay-ms 200 --parallel 2
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+from typing import List
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bursts", type=int, default=5)
+    parser.add_argument("--burst-size", type=int, default=32)
+    parser.add_argument("--distinct", type=int, default=4, help="한 번에 몰리는 요청 중 서로 다른 질문 수")
+    parser.add_argument("--llm-delay-ms", type=float, default=200.0)
+    parser.add_argument("--parallel", type=int, default=2)
+    parser.add_argument("--llm-port", type=int, default=11505)
+    args = parser.parse_args()
+
+    from benchmarks.fake_ollama import serve
+
+    llm = serve(args.llm_port, args.llm_delay_ms, parallel=args.parallel)
+    threading.Thread(target=llm.serve_forever, daemon=True).start()
+    os.environ["OLLAMA_BASE_URL"] = f"http://127.0.0.1:{args.llm_port}"
+    os.environ["LLM_CACHE_SIZE"] = "0"
+
+    from agent_server.ai_engine import AIEngine
+
+    async def run(coalesce: bool) -> None:
+        engine = AIEngine()
+        engine.coalesce = coalesce
+        latencies: List[float] = []
+
+        async def one(message: str) -> None:
+            started = time.perf_counter()
+            await engine.areply("friend", message, "find")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        for burst in range(args.bursts):
+            await asyncio.gather(
+                *(one(f"주말 러닝 친구 {burst}-{idx % args.distinct}") for idx in range(args.burst_size))
+            )
+        elapsed = time.perf_counter() - started
+        await engine.aclose()
+        stats = engine.coalesce_stats()
+        latencies.sort()
+        print(
+            f"{'on' if coalesce else 'off':>8} {stats['upstream_calls']:>9} {stats['coalesced']:>9} "
+            f"{statistics.median(latencies):>8.1f} {latencies[int(len(latencies) * 0.95)]:>8.1f} {elapsed:>8.2f}"
+        )
+
+    print(
+        f"bursts={args.bursts} burst_size={args.burst_size} distinct={args.distinct} "
+        f"llm_delay={args.llm_delay_ms:.0f}ms parallel={args.parallel}"
+    )
+    print(f"{'coalesce':>8} {'upstream':>9} {'coalesced':>9} {'p50ms':>8} {'p95ms':>8} {'total s':>8}")
+    for coalesce in (False, True):
+        asyncio.run(run(coalesce))
+    llm.shutdown()
+
+
+if __name__ == "__main__":
+    main()
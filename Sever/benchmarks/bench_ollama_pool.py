@@ -0,0 +1,134 @@
+# Ollama 백엔드 1개 vs 여러 개(OLLAMA_BASE_URLS, least outstanding 라우팅) /agent/ask 처리량 비교
+#   가짜 Ollama를 backends개 띄우고(각각 동시 생성 parallel개), 마지막 실행에서는 도중에 하나를 죽여
+#   상태 확인/차단기로 라우팅에서 빠지는지 본다. fallback 열은 LLM 답 대신 fallback 문장을 받은 수다.
+#   cd Sever
+#   python -m benchmarks.bench_ollama_pool --backends 3 --clients 24 --seconds 8 --llm-delay-ms 300 --parallel 2
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import requests
+
+from benchmarks.bench_ask_async import MESSAGES
+from benchmarks.bench_ask_deadline import FALLBACK_MARKER
+from benchmarks.bench_workers import _wait_ready
+
+
+def _client(base_url: str, seconds: float, seed: int) -> Tuple[int, List[float]]:
+    session = requests.Session()
+    fallback = 0
+    samples: List[float] = []
+    deadline = time.monotonic() + seconds
+    idx = seed
+    while time.monotonic() < deadline:
+        category_id, message = MESSAGES[idx % len(MESSAGES)]
+        idx += 1
+        started = time.perf_counter()
+        res = session.post(
+            f"{base_url}/agent/ask",
+            json={"category_id": category_id, "mode": "find", "message": f"{message} {seed}-{idx}", "deadline_ms": 0},
+            timeout=120,
+        )
+        samples.append((time.perf_counter() - started) * 1000)
+        fallback += FALLBACK_MARKER in res.json().get("assistant_message", "")
+    return fallback, samples
+
+
+def _start_llm(port: int, args: argparse.Namespace) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_ollama", "--port", str(port),
+            "--delay-ms", str(args.llm_delay_ms), "--parallel", str(args.parallel),
+        ]
+    )
+
+
+def _run(urls: List[str], kill: subprocess.Popen, args: argparse.Namespace) -> Dict[str, Any]:
+    env = dict(
+        os.environ,
+        MATCH_STORAGE="memory",
+        OLLAMA_BASE_URLS=",".join(urls),
+        OLLAMA_WARMUP="0",
+        OLLAMA_HEALTH_INTERVAL="1",
+        LLM_CACHE_SIZE="0",
+        LLM_CONCURRENCY=str(args.parallel),
+        LLM_QUEUE_MAX=str(args.clients),
+        LLM_QUEUE_WAIT_MS="60000",
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "agent_server.main:app",
+            "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        _wait_ready(base_url)
+        if kill is not None:
+            # 부하 도중(1/3 지점) 백엔드 하나를 죽인다.
+            threading.Timer(args.seconds / 3, kill.kill).start()
+        with ThreadPoolExecutor(args.clients) as pool:
+            futures = [pool.submit(_client, base_url, args.seconds, idx) for idx in range(args.clients)]
+            results = [future.result() for future in futures]
+        backends = requests.get(f"{base_url}/metrics", timeout=5).json()["llm_backends"]["backends"]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    samples = sorted(sample for _, row in results for sample in row)
+    return {
+        "rps": len(samples) / args.seconds,
+        "fallback": sum(row[0] for row in results),
+        "p50": statistics.median(samples),
+        "p95": samples[int(len(samples) * 0.95)],
+        "backends": backends,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", type=int, default=3)
+    parser.add_argument("--clients", type=int, default=24)
+    parser.add_argument("--seconds", type=float, default=8.0)
+    parser.add_argument("--llm-delay-ms", type=float, default=300.0)
+    parser.add_argument("--parallel", type=int, default=2)
+    parser.add_argument("--port", type=int, default=18007)
+    parser.add_argument("--llm-port", type=int, default=11520)
+    args = parser.parse_args()
+
+    ports = [args.llm_port + idx for idx in range(args.backends)]
+    llms = [_start_llm(port, args) for port in ports]
+    time.sleep(1.0)
+    urls = [f"http://127.0.0.1:{port}" for port in ports]
+
+    print(
+        f"backends={args.backends} clients={args.clients} seconds={args.seconds} "
+        f"llm_delay={args.llm_delay_ms:.0f}ms parallel={args.parallel}"
+    )
+    print(f"{'run':>12} {'req/s':>8} {'p50ms':>8} {'p95ms':>8} {'fallback':>9}  per-backend routed/errors")
+    runs = (("single", urls[:1], None), ("pool", urls, None), ("pool-kill1", urls, llms[0]))
+    for label, run_urls, kill in runs:
+        row = _run(run_urls, kill, args)
+        per_backend = " ".join(
+            f"{item['base_url'].rsplit(':', 1)[-1]}:{item['routed']}/{item['errors']}{'' if item['routable'] else '(out)'}"
+            for item in row["backends"]
+        )
+        print(
+            f"{label:>12} {row['rps']:>8.1f} {row['p50']:>8.1f} {row['p95']:>8.1f} {row['fallback']:>9}  {per_backend}"
+        )
+    for llm in llms:
+        llm.terminate()
+        llm.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# 프롬프트 배치 전(요청마다 시스템 프롬프트 조립, 사용자 문장 뒤에 추천 문맥) vs 후(미리 만든 시스템 프롬프트, 문맥 먼저)
+#   가짜 Ollama가 글자당 prompt eval 시간을 흉내 내고, 슬롯마다 직전 프롬프트와 앞부분이 같은 만큼은 건너뛴다(KV 캐시 재사용).
+#   카테고리를 섞은 /agent/ask 요청 문맥(실제 추천 결과)을 만들어 프로세스 안에서 AIEngine으로 바로 보낸다.
+#   cd Sever
+#   python -m benchmarks.bench_prompt_prefix --requests 120 --prompt-us-per-char 200 --slots 4
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.bench_ask_async import MESSAGES
+
+Context = Tuple[str, str, Optional[str]]
+
+
+def _legacy_payload(engine: Any, category_id: str, message: str, recommendation_context: Optional[str]) -> Dict[str, Any]:
+    # 바뀌기 전 _chat_payload 배치를 그대로 재현한다(비교용).
+    from agent_server.prompt_packs import CATEGORY_DOMAIN_BY_ID, CATEGORY_NAME_BY_ID, resolve_mode
+
+    mode_id, mode_meta = resolve_mode(category_id, "find")
+    category_name = CATEGORY_NAME_BY_ID.get(category_id, "친구 만들기")
+    category_domain = CATEGORY_DOMAIN_BY_ID.get(category_id, "people")
+    user_message = message
+    if recommendation_context:
+        user_message = f"{user_message}\n\n[RecommendationContext]\n{recommendation_context}"
+    mode_specific = (
+        "추천 결과 컨텍스트가 주어지면 추상적인 설명 대신, "
+        "실제 후보 수(몇 건)와 상위 후보의 제목/상태/가격(또는 핵심 조건)을 구체적으로 설명하라. "
+        "리스트에 없는 정보를 꾸며내지 마라."
+    )
+    if mode_id == "find" and category_domain == "market":
+        response_format = "응답 형식: 1) 검색 결과 요약(몇 건, 핵심 키워드) 2) 상위 매물 2~3개를 항목으로 설명 3) 바로 선택/비교할 수 있는 다음 질문 1개."
+    else:
+        response_format = "응답 형식: 1) 핵심요약 1문장 2) 다음 행동 1~2개 3) 필요한 추가질문 1개."
+    system_prompt = (
+        "너는 카테고리 전용 AI 에이전트다. 한국어로 간결히 답해라. "
+        f"카테고리: {category_name}. "
+        f"현재 모드: {mode_meta['title']}({mode_id}). "
+        f"모드 설명: {mode_meta['description']}. "
+        f"입력 힌트: {mode_meta['prompt_hint']}. "
+        f"모드 지시: {mode_meta['system_prompt']} "
+        f"{mode_specific} "
+        f"{response_format}"
+    )
+    return {
+        "model": engine.ollama_model,
+        "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_message}],
+        "stream": False,
+        "keep_alive": engine.keep_alive,
+    }
+
+
+def _current_payload(engine: Any, category_id: str, message: str, recommendation_context: Optional[str]) -> Dict[str, Any]:
+    return engine._chat_payload(category_id, message, "find", None, recommendation_context)
+
+
+def _contexts(count: int) -> List[Context]:
+    # 목데이터 보드에서 /agent/ask와 같은 방식으로 추천 문맥을 만든다.
+    from agent_server.main import _prepare_ask
+    from agent_server.matching import seed_mock_board
+    from agent_server.schemas import AskRequest
+
+    seed_mock_board(reset=True)
+    out: List[Context] = []
+    for idx in range(count):
+        category_id, message = MESSAGES[idx % len(MESSAGES)]
+        message = f"{message} {idx}"
+        req = AskRequest(category_id=category_id, mode="find", message=message)
+        *_, recommendation_context = asyncio.run(_prepare_ask(req, "ko", None))
+        out.append((category_id, message, recommendation_context))
+    return out
+
+
+def _run(builder: Callable[..., Dict[str, Any]], contexts: List[Context], port: int, args: argparse.Namespace) -> Dict[str, float]:
+    from agent_server.ai_engine import AIEngine
+    from benchmarks.fake_ollama import serve
+
+    llm = serve(port, 0.0, 0.0, args.slots, 0.0, args.prompt_us_per_char)
+    threading.Thread(target=llm.serve_forever, daemon=True).start()
+    os.environ["OLLAMA_BASE_URL"] = f"http://127.0.0.1:{port}"
+    engine = AIEngine()
+
+    build_us = 0.0
+    chars = 0
+    started = time.perf_counter()
+    for category_id, message, recommendation_context in contexts:
+        t0 = time.perf_counter()
+        payload = builder(engine, category_id, message, recommendation_context)
+        build_us += (time.perf_counter() - t0) * 1e6
+        chars += sum(len(msg["content"]) for msg in payload["messages"])
+        engine._reply_with_ollama(payload)
+    elapsed = time.perf_counter() - started
+    llm.shutdown()
+
+    prompt_eval = engine.prompt_eval.stats()
+    return {
+        "build_us": build_us / len(contexts),
+        "chars": chars / len(contexts),
+        "eval_total_ms": prompt_eval["avg_ms"] * prompt_eval["count"],
+        "eval_p50": prompt_eval["p50_ms"],
+        "eval_p95": prompt_eval["p95_ms"],
+        "elapsed": elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=120)
+    parser.add_argument("--prompt-us-per-char", type=float, default=200.0)
+    parser.add_argument("--slots", type=int, default=4, help="가짜 Ollama 캐시 슬롯 수(OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--llm-port", type=int, default=11512)
+    args = parser.parse_args()
+
+    os.environ.update(MATCH_STORAGE="memory", LLM_CACHE_SIZE="0", LLM_COALESCE="0", OLLAMA_WARMUP="0")
+    contexts = _contexts(args.requests)
+
+    print(f"requests={args.requests} categories={len(MESSAGES)} prompt_cost={args.prompt_us_per_char:.0f}us/char slots={args.slots}")
+    print(f"{'layout':>8} {'build us':>9} {'chars':>7} {'eval total ms':>14} {'eval p50':>9} {'eval p95':>9} {'wall s':>7}")
+    for offset, (label, builder) in enumerate((("before", _legacy_payload), ("after", _current_payload))):
+        row = _run(builder, contexts, args.llm_port + offset, args)
+        print(
+            f"{label:>8} {row['build_us']:>9.1f} {row['chars']:>7.0f} {row['eval_total_ms']:>14.1f} "
+            f"{row['eval_p50']:>9.1f} {row['eval_p95']:>9.1f} {row['elapsed']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
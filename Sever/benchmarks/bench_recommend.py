@@ -0,0 +1,88 @@
+# recommend() 점수 엔진 벤치마크 (python vs numpy)
+#   cd Sever
+#   python -m benchmarks.bench_recommend --sizes 1000 10000 100000
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import List
+
+os.environ.setdefault("BOARD_LIMIT_PER_CATEGORY", "1000000")
+os.environ.setdefault("MATCH_SCORING_ENGINE", "numpy")
+os.environ.setdefault("MATCH_NUMPY_MIN_ITEMS", "0")
+
+from agent_server import matching  # noqa: E402
+from agent_server.columnar import numpy_available  # noqa: E402
+
+BRANDS = ["샤넬", "루이비통", "코치", "구찌", "프라다", "에르메스", "까르띠에", "롤렉스", "디올", "셀린느"]
+KINDS = ["가방", "지갑", "시계", "벨트", "토트", "숄더", "반지", "목걸이"]
+TAGS = ["정품", "직거래", "응답빠름", "상태A", "상태B", "풀구성", "급매", "서울", "경기", "보증서", "인보이스"]
+QUERIES = ["코치가방 찾아줘", "샤넬 지갑 상태A", "직거래", "롤렉스 시계 보증서", "초기 추천", "에르메스 벨트 급매 서울"]
+
+
+def _fill(category_id: str, size: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    matching.seed_mock_board(reset=True)
+    for idx in range(size):
+        brand = rng.choice(BRANDS)
+        kind = rng.choice(KINDS)
+        matching._insert_board_item(
+            category_id=category_id,
+            title=f"명품 매물: {brand} {kind} {idx}",
+            subtitle=f"상태 {rng.choice('SAB')}, {rng.randint(10, 900)}만원",
+            tags=[brand, kind] + rng.sample(TAGS, 2),
+            item_id=f"{category_id}-bench-{idx}",
+        )
+
+
+def _time_engine(engine: str, category_id: str, rounds: int) -> List[float]:
+    matching.SCORING_ENGINE = engine
+    samples: List[float] = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            matching.RECOMMEND_CACHE.clear()
+            started = time.perf_counter()
+            matching.recommend(category_id, query, "find")
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _rankings(engine: str, category_id: str) -> List[List[tuple]]:
+    matching.SCORING_ENGINE = engine
+    out = []
+    for query in QUERIES:
+        for mode in ("find", "publish"):
+            matching.RECOMMEND_CACHE.clear()
+            out.append([(rec.id, rec.score) for rec in matching.recommend(category_id, query, mode)])
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--category", default="luxury")
+    args = parser.parse_args()
+
+    if not numpy_available():
+        print("numpy가 설치되어 있지 않습니다: pip install numpy")
+        return 1
+
+    print(f"{'items':>8} {'engine':>7} {'p50 ms':>9} {'p95 ms':>9} {'same':>5}")
+    for size in args.sizes:
+        _fill(args.category, size)
+        same = _rankings("python", args.category) == _rankings("numpy", args.category)
+        for engine in ("python", "numpy"):
+            samples = sorted(_time_engine(engine, args.category, args.rounds))
+            p50 = statistics.median(samples)
+            p95 = samples[int(len(samples) * 0.95) - 1]
+            print(f"{size:>8} {engine:>7} {p50:>9.2f} {p95:>9.2f} {str(same):>5}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+# 저장소 백엔드별 요청 처리 지연 비교 (memory vs sqlite vs journal)
+#   cd Sever
+#   python -m benchmarks.bench_storage --requests 2000
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+
+def _measure(fn: Callable[[int], object], count: int) -> List[float]:
+    samples: List[float] = []
+    for idx in range(count):
+        started = time.perf_counter()
+        fn(idx)
+        samples.append((time.perf_counter() - started) * 1000)
+    return sorted(samples)
+
+
+def _run_backend(count: int) -> None:
+    from agent_server import main
+    from agent_server.schemas import ActionCreateRequest, ActionTransitionRequest, EmailAuthRequest
+
+    main.seed_on_startup()
+    main.seed_mock_board(reset=True)
+    created: Dict[int, str] = {}
+
+    def publish(idx: int) -> None:
+        main.publish_listing(
+            category_id="trade",
+            message=f"닌텐도 스위치 {idx}번 매물 직거래",
+            owner_name=f"user{idx}",
+            owner_email=f"user{idx}@bench.local",
+        )
+
+    def request(idx: int) -> None:
+        action = main.create_action(
+            ActionCreateRequest(
+                category_id="trade",
+                recommendation_id="trade-seed-1",
+                recommendation_title="판매글",
+                requester_email=f"buyer{idx}@bench.local",
+            )
+        )
+        created[idx] = action.id
+
+    def cancel(idx: int) -> None:
+        main.update_action(
+            created[idx],
+            ActionTransitionRequest(action="cancel", actor_email=f"buyer{idx}@bench.local"),
+        )
+
+    def auth(idx: int) -> None:
+        main.auth_email(EmailAuthRequest(email=f"user{idx}@bench.local", name=f"user{idx}"))
+
+    def bootstrap(idx: int) -> None:
+        main.bootstrap("trade", mode="find")
+
+    results = {
+        "publish": _measure(publish, count),
+        "action_request": _measure(request, count),
+        "action_cancel": _measure(cancel, count),
+        "auth_email": _measure(auth, count),
+        "bootstrap": _measure(bootstrap, count),
+    }
+    started = time.perf_counter()
+    main.STORE.flush()
+    drain_ms = (time.perf_counter() - started) * 1000
+    for name, samples in results.items():
+        p50 = statistics.median(samples)
+        p99 = samples[max(0, int(len(samples) * 0.99) - 1)]
+        print(f"{main.STORE.name:>7} {name:>15} {p50:>9.3f} {p99:>9.3f}")
+    print(f"{main.STORE.name:>7} {'flush(drain)':>15} {drain_ms:>9.1f}")
+    main.close_store()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--backend", choices=["memory", "sqlite", "journal"])
+    args = parser.parse_args()
+
+    if args.backend:
+        _run_backend(args.requests)
+        return 0
+
+    print(f"{'backend':>7} {'request':>15} {'p50 ms':>9} {'p99 ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("memory", "sqlite", "journal"):
+            env = dict(
+                os.environ,
+                MATCH_STORAGE=backend,
+                MATCH_SQLITE_PATH=os.path.join(tmp, "bench.db"),
+                MATCH_JOURNAL_DIR=os.path.join(tmp, "journal"),
+            )
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_storage", "--backend", backend, "--requests", str(args.requests)],
+                env=env,
+                check=True,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
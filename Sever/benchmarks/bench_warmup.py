@@ -0,0 +1,91 @@
+# 배포 직후 첫 사용자 지연: 모델 warm-up 끔 vs 켬 (가짜 Ollama가 모델 로딩 시간을 흉내 냄)
+#   서버가 뜬 뒤 settle초 뒤에 첫 /agent/ask를 보내고, 이어서 몇 건 더 보내 콜드/웜 요청 수를 본다.
+#   cd Sever
+#   python -m benchmarks.bench_warmup --load-ms 3000 --settle 5 --requests 5
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import requests
+
+from benchmarks.bench_ask_async import MESSAGES
+from benchmarks.bench_workers import _wait_ready
+
+
+def _run(warmup: bool, args: argparse.Namespace) -> Dict[str, object]:
+    # 모드마다 가짜 Ollama를 새로 띄워 모델이 내려간 상태에서 시작한다.
+    llm = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_ollama", "--port", str(args.llm_port),
+            "--delay-ms", str(args.llm_delay_ms), "--load-ms", str(args.load_ms),
+        ]
+    )
+    env = dict(
+        os.environ,
+        MATCH_STORAGE="memory",
+        OLLAMA_BASE_URL=f"http://127.0.0.1:{args.llm_port}",
+        OLLAMA_WARMUP="1" if warmup else "0",
+        LLM_CACHE_SIZE="0",
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "agent_server.main:app",
+            "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        _wait_ready(base_url)
+        time.sleep(args.settle)
+        ready_before = requests.get(f"{base_url}/health/ai", timeout=5).json()["ready"]
+        latencies: List[float] = []
+        for idx in range(args.requests):
+            category_id, message = MESSAGES[idx % len(MESSAGES)]
+            started = time.perf_counter()
+            requests.post(
+                f"{base_url}/agent/ask",
+                json={"category_id": category_id, "mode": "find", "message": f"{message} {idx}"},
+                timeout=60,
+            ).raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+        model = requests.get(f"{base_url}/metrics", timeout=5).json()["llm_model"]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        llm.terminate()
+        llm.wait(timeout=30)
+    return {"ready_before": ready_before, "latencies": latencies, "model": model}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--load-ms", type=float, default=3000.0)
+    parser.add_argument("--llm-delay-ms", type=float, default=100.0)
+    parser.add_argument("--settle", type=float, default=5.0, help="서버 시작 후 첫 사용자 요청까지 초")
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--port", type=int, default=18005)
+    parser.add_argument("--llm-port", type=int, default=11511)
+    args = parser.parse_args()
+
+    print(f"load={args.load_ms:.0f}ms llm_delay={args.llm_delay_ms:.0f}ms settle={args.settle}s requests={args.requests}")
+    print(f"{'warmup':>7} {'ready':>6} {'first ms':>9} {'rest avg':>9} {'cold':>5} {'warm':>5} {'warmup ms':>10}")
+    for warmup in (False, True):
+        row = _run(warmup, args)
+        latencies = row["latencies"]
+        model = row["model"]
+        rest = latencies[1:] or [0.0]
+        print(
+            f"{'on' if warmup else 'off':>7} {str(row['ready_before']):>6} {latencies[0]:>9.1f} "
+            f"{sum(rest) / len(rest):>9.1f} {model['requests_cold']:>5} {model['requests_warm']:>5} "
+            f"{model['warmup_duration']['max_ms']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# 워커 수별 /agent/ask 처리량 비교 (uvicorn --workers N + 공유 SQLite 저장소 + 가짜 LLM)
+#   cd Sever
+#   python -m benchmarks.bench_workers --workers 1 2 4 8 --seconds 10 --clients 32
+# 클라이언트도 CPU를 쓰므로 워커 수 + 클라이언트 프로세스가 코어 수를 넘지 않게 두는 것이 좋다.
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import requests
+
+from benchmarks.fake_ollama import serve
+
+MESSAGES: List[Tuple[str, str]] = [
+    ("friend", "주말에 같이 러닝할 친구 찾아요"),
+    ("dating", "차분하고 대화 잘 통하는 사람"),
+    ("soccer", "토요일 오전 11:11 상대팀 구해요"),
+    ("trade", "닌텐도 스위치 직거래"),
+    ("luxury", "코치 가방 찾아요"),
+    ("futsal", "강남 평일 저녁 풋살"),
+]
+
+
+def _wait_ready(base_url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def _client(args: Tuple[str, float, int]) -> Tuple[int, int, List[float]]:
+    base_url, seconds, seed = args
+    session = requests.Session()
+    ok = 0
+    failed = 0
+    samples: List[float] = []
+    deadline = time.monotonic() + seconds
+    idx = seed
+    while time.monotonic() < deadline:
+        category_id, message = MESSAGES[idx % len(MESSAGES)]
+        idx += 1
+        started = time.perf_counter()
+        try:
+            res = session.post(
+                f"{base_url}/agent/ask",
+                json={"category_id": category_id, "mode": "find", "message": f"{message} {idx % 50}"},
+                timeout=30,
+            )
+            if res.status_code == 200:
+                ok += 1
+                samples.append((time.perf_counter() - started) * 1000)
+            else:
+                failed += 1
+        except requests.RequestException:
+            failed += 1
+    return ok, failed, samples
+
+
+def _run(workers: int, port: int, llm_port: int, seconds: float, clients: int) -> Dict[str, float]:
+    workdir = tempfile.mkdtemp(prefix="bench-workers-")
+    env = dict(
+        os.environ,
+        MATCH_STORAGE="sqlite",
+        MATCH_SQLITE_PATH=os.path.join(workdir, "shared.db"),
+        OLLAMA_BASE_URL=f"http://127.0.0.1:{llm_port}",
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "agent_server.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base_url)
+        # 모든 워커가 뜨고 시드를 동기화할 시간을 준다.
+        time.sleep(1.0 + 0.3 * workers)
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.map(_client, [(base_url, seconds, idx) for idx in range(clients)])
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    ok = sum(row[0] for row in results)
+    failed = sum(row[1] for row in results)
+    samples = sorted(sample for row in results for sample in row[2])
+    return {
+        "rps": ok / seconds,
+        "failed": failed,
+        "p50": statistics.median(samples) if samples else 0.0,
+        "p95": samples[int(len(samples) * 0.95)] if samples else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--port", type=int, default=18000)
+    parser.add_argument("--llm-port", type=int, default=11500)
+    parser.add_argument("--llm-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    llm = serve(args.llm_port, args.llm_delay_ms)
+    threading.Thread(target=llm.serve_forever, daemon=True).start()
+
+    print(f"cpus={os.cpu_count()} clients={args.clients} seconds={args.seconds}")
+    print(f"{'workers':>8} {'req/s':>9} {'scale':>6} {'p50ms':>8} {'p95ms':>8} {'failed':>7}")
+    baseline = None
+    for workers in args.workers:
+        row = _run(workers, args.port, args.llm_port, args.seconds, args.clients)
+        baseline = baseline or row["rps"]
+        print(
+            f"{workers:>8} {row['rps']:>9.1f} {row['rps'] / baseline:>5.2f}x "
+            f"{row['p50']:>8.1f} {row['p95']:>8.1f} {int(row['failed']):>7}"
+        )
+    llm.shutdown()
+
+
+if __name__ == "__main__":
+    main()
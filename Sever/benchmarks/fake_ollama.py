@@ -0,0 +1,222 @@
+# 벤치마크용 가짜 Ollama 서버: /api/chat에 고정 응답을 돌려준다(선택적으로 지연 추가).
+# delay-ms는 첫 조각까지(프롬프트 처리), token-delay-ms는 조각(어절)마다 걸리는 시간이다.
+# "stream": true 요청에는 Ollama처럼 줄 단위 JSON 조각을 chunked로 흘려보낸다.
+# parallel을 주면 동시에 생성하는 요청 수를 그만큼으로 제한한다(OLLAMA_NUM_PARALLEL 흉내, 나머지는 대기).
+# load-ms를 주면 모델이 내려가 있을 때 첫 요청이 그만큼 로딩에 걸린다(콜드 스타트). 요청의 keep_alive
+# (기본 5m) 동안 올라가 있고, messages가 비어 있으면 로딩만 한다. GET /api/ps로 올라간 모델을 볼 수 있다.
+# prompt-us-per-char를 주면 프롬프트 처리(prompt eval)를 글자당 그만큼 걸리게 하되, llama.cpp 프롬프트 캐시처럼
+# 슬롯(parallel개, 최소 1개)마다 직전 프롬프트를 기억해 앞부분이 같은 만큼은 건너뛴다(prompt_eval_count/duration로 보고).
+#   cd Sever
+#   python -m benchmarks.fake_ollama --port 11500 --delay-ms 0 --token-delay-ms 0
+#   OLLAMA_BASE_URL=http://127.0.0.1:11500 uvicorn agent_server.main:app
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+REPLY = "요청을 확인했습니다. 조건에 맞는 후보를 정리했어요. 지역이나 시간대를 알려주시면 더 좁혀 드릴게요."
+
+
+def _pieces() -> List[str]:
+    words = REPLY.split(" ")
+    return [words[0]] + [f" {word}" for word in words[1:]]
+
+
+def _keep_alive_seconds(value: Any) -> Optional[float]:
+    # Ollama keep_alive 형식: 초(숫자) 또는 "30s"/"5m"/"1h". 음수면 계속 올려 둔다(None).
+    if value is None:
+        return 300.0
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        text = str(value).strip()
+        units = {"s": 1, "m": 60, "h": 3600}
+        seconds = float(text[:-1]) * units[text[-1]] if text and text[-1] in units else float(text)
+    return None if seconds < 0 else seconds
+
+
+def _render(messages: List[Dict[str, Any]]) -> str:
+    # 채팅 템플릿 흉내: 메시지를 순서대로 이어 붙인 문자열이 모델이 보는 프롬프트다.
+    return "".join(f"<|{msg.get('role', '')}|>{msg.get('content', '')}<|end|>" for msg in messages)
+
+
+def _common_prefix(left: str, right: str) -> int:
+    limit = min(len(left), len(right))
+    idx = 0
+    while idx < limit and left[idx] == right[idx]:
+        idx += 1
+    return idx
+
+
+class _PromptCache:
+    # llama.cpp 서버처럼 앞부분이 절반 이상 겹치는 슬롯이 있으면 그 슬롯을, 없으면 가장 오래 안 쓴 슬롯을 쓴다.
+    def __init__(self, slots: int, similarity: float = 0.5) -> None:
+        self.lock = threading.Lock()
+        self.slots = [""] * max(1, slots)
+        self.used = [0] * len(self.slots)
+        self.similarity = similarity
+        self.clock = 0
+
+    def evaluate(self, prompt: str) -> int:
+        # 캐시에 없는(새로 계산해야 하는) 글자 수
+        with self.lock:
+            shared = [_common_prefix(cached, prompt) for cached in self.slots]
+            best = max(range(len(self.slots)), key=lambda idx: shared[idx])
+            if shared[best] < len(prompt) * self.similarity:
+                best = min(range(len(self.slots)), key=lambda idx: self.used[idx])
+            self.clock += 1
+            self.used[best] = self.clock
+            self.slots[best] = prompt
+            return len(prompt) - shared[best]
+
+
+class _Model:
+    def __init__(self, load: float) -> None:
+        self.load = load
+        self.lock = threading.Lock()
+        self.loaded_until = 0.0
+
+    def ensure_loaded(self, keep_alive: Any) -> float:
+        # 로딩에 걸린 시간(초)을 돌려준다. 올라가 있으면 0.
+        with self.lock:
+            started = time.monotonic()
+            if self.load and started >= self.loaded_until:
+                time.sleep(self.load)
+            seconds = _keep_alive_seconds(keep_alive)
+            now = time.monotonic()
+            self.loaded_until = float("inf") if seconds is None else now + seconds
+            return now - started
+
+    def resident(self) -> bool:
+        return time.monotonic() < self.loaded_until
+
+
+def make_handler(
+    delay: float, token_delay: float = 0.0, parallel: int = 0, load: float = 0.0, prompt_per_char: float = 0.0
+):
+    slots = threading.BoundedSemaphore(parallel) if parallel > 0 else None
+    model_state = _Model(load)
+    prompt_cache = _PromptCache(parallel)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # keep-alive 연결에서 헤더/본문 write가 Nagle + delayed ACK에 걸려 지연되지 않도록 한다.
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            if self.path != "/api/ps":
+                self._json(404, {"error": "not found"})
+                return
+            models = []
+            if model_state.resident():
+                remaining = min(model_state.loaded_until - time.monotonic(), 10**8)
+                expires_at = datetime.now(timezone.utc) + timedelta(seconds=remaining)
+                models.append({"name": self.server.model_name, "model": self.server.model_name, "expires_at": expires_at.isoformat()})
+            self._json(200, {"models": models})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if payload.get("model"):
+                self.server.model_name = payload["model"]
+            if slots is None:
+                self._generate(payload)
+                return
+            with slots:
+                self._generate(payload)
+
+        def _generate(self, payload: dict) -> None:
+            model = payload.get("model", "")
+            load_ns = int(model_state.ensure_loaded(payload.get("keep_alive")) * 1e9)
+            if not payload.get("messages"):
+                # 로딩/keep_alive 갱신만 하는 요청
+                self._json(200, {"model": model, "message": {"role": "assistant", "content": ""}, "done_reason": "load", "done": True})
+                return
+            prompt = _render(payload["messages"])
+            evaluated = prompt_cache.evaluate(prompt) if prompt_per_char else len(prompt)
+            eval_seconds = delay + evaluated * prompt_per_char
+            if eval_seconds:
+                time.sleep(eval_seconds)
+            timings = {
+                "load_duration": load_ns,
+                "prompt_eval_count": evaluated,
+                "prompt_eval_duration": int(eval_seconds * 1e9),
+            }
+            if payload.get("stream"):
+                self._stream(model, timings)
+                return
+            if token_delay:
+                time.sleep(token_delay * len(_pieces()))
+            self._json(200, {"model": model, "message": {"role": "assistant", "content": REPLY}, "done": True, **timings})
+
+        def _json(self, status: int, data: Dict[str, Any]) -> None:
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, model: str, timings: Dict[str, int]) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for idx, piece in enumerate(_pieces()):
+                if idx and token_delay:
+                    time.sleep(token_delay)
+                self._chunk({"model": model, "message": {"role": "assistant", "content": piece}, "done": False})
+            self._chunk({"model": model, "message": {"role": "assistant", "content": ""}, "done": True, **timings})
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _chunk(self, data: dict) -> None:
+            line = json.dumps(data, ensure_ascii=False).encode("utf-8") + b"\n"
+            self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, format: str, *args) -> None:
+            return None
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    # 기본 listen backlog(5)로는 동시 연결이 몰릴 때 SYN 재전송(1초+) 지연이 생겨 벤치 결과가 왜곡된다.
+    request_queue_size = 1024
+    daemon_threads = True
+    model_name = "llama3.2:1b"
+
+
+def serve(
+    port: int,
+    delay_ms: float = 0.0,
+    token_delay_ms: float = 0.0,
+    parallel: int = 0,
+    load_ms: float = 0.0,
+    prompt_us_per_char: float = 0.0,
+) -> ThreadingHTTPServer:
+    handler = make_handler(delay_ms / 1000, token_delay_ms / 1000, parallel, load_ms / 1000, prompt_us_per_char / 1e6)
+    return _Server(("127.0.0.1", port), handler)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    parser.add_argument("--token-delay-ms", type=float, default=0.0)
+    parser.add_argument("--parallel", type=int, default=0)
+    parser.add_argument("--load-ms", type=float, default=0.0)
+    parser.add_argument("--prompt-us-per-char", type=float, default=0.0)
+    args = parser.parse_args()
+    serve(
+        args.port, args.delay_ms, args.token_delay_ms, args.parallel, args.load_ms, args.prompt_us_per_char
+    ).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
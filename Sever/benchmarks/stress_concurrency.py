@@ -0,0 +1,191 @@
+# 동시성 스트레스 테스트: publish / recommend / transition을 여러 스레드에서 동시에 호출한 뒤
+# 보드·색인·액션 상태의 불변식을 확인한다. 실패하면 종료 코드 1.
+#   cd Sever
+#   python -m benchmarks.stress_concurrency --seconds 5 --threads 12
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Dict, List
+
+
+def _check_board(m, errors: List[str]) -> None:
+    for cid, board in list(m.BOARD.items()):
+        items = list(board)
+        ids = [item["id"] for item in items]
+        if len(ids) != len(set(ids)):
+            errors.append(f"{cid}: duplicate ids on board")
+        if len(items) > m.BOARD_LIMIT_PER_CATEGORY:
+            errors.append(f"{cid}: board over limit ({len(items)})")
+        index = m.BOARD_INDEX.get(cid)
+        if index is None or set(index.items) != set(ids):
+            errors.append(f"{cid}: index items differ from board")
+            continue
+        expected = m._BoardIndex()
+        for item in reversed(items):
+            expected.add(item)
+        if {w: set(v) for w, v in expected.postings.items()} != {w: set(v) for w, v in index.postings.items()}:
+            errors.append(f"{cid}: postings differ from a rebuilt index")
+        if any(index.items[item_id] is not item for item_id, item in zip(ids, items)):
+            errors.append(f"{cid}: index holds a stale item object")
+        owned = Counter()
+        for item in items:
+            owner = m._owner_key(item)
+            if owner and m.OWNER_LISTINGS.get(owner, {}).get(cid, {}).get(item["id"]) is not item:
+                errors.append(f"{cid}: owner index missing {item['id']}")
+            owned[owner] += 1
+        for owner, by_category in m.OWNER_LISTINGS.items():
+            if len(by_category.get(cid, {})) != owned.get(owner, 0):
+                errors.append(f"{cid}: owner index has extra listings for {owner}")
+
+
+def _check_actions(m, errors: List[str]) -> None:
+    for action in m.ACTIONS.values():
+        if action.get("version", 1) != len(action.get("history", [])):
+            errors.append(f"{action['id']}: version {action.get('version')} != history {len(action['history'])}")
+    open_keys = Counter(
+        m._open_action_key(action) for action in m.ACTIONS.values() if action["status"] in m.OPEN_ACTION_STATUSES
+    )
+    for key, count in open_keys.items():
+        if count > 1:
+            errors.append(f"{key}: {count} open actions")
+        if key not in m.OPEN_ACTION_BY_KEY:
+            errors.append(f"{key}: open action missing from dedup index")
+    if len(m.ACTION_TIMELINE) != len(m.ACTIONS):
+        errors.append("action timeline size differs from ACTIONS")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=12)
+    args = parser.parse_args()
+
+    from agent_server import matching as m
+
+    m.seed_mock_board(reset=True)
+    categories = ["trade", "luxury", "friend"]
+    stop = threading.Event()
+    failures: List[str] = []
+    counts: Counter = Counter()
+    # 스레드별 "내 글"에 성공한 수정 횟수. 최종 버전과 비교해 잃어버린 수정이 없는지 본다.
+    own_updates: Dict[tuple, int] = {}
+    lock = threading.Lock()
+
+    def guarded(fn):
+        def run(worker_id: int) -> None:
+            rng = random.Random(worker_id)
+            try:
+                while not stop.is_set():
+                    fn(worker_id, rng)
+            except Exception:
+                failures.append(traceback.format_exc())
+                stop.set()
+
+        return run
+
+    @guarded
+    def publisher(worker_id: int, rng: random.Random) -> None:
+        cid = rng.choice(categories)
+        email = f"writer{worker_id % 3}@stress.local"
+        if rng.random() < 0.5:
+            m.publish_listing(cid, f"새 매물 {rng.randint(0, 999)} 직거래 가방", owner_email=f"new{rng.randint(0, 9999)}@stress.local")
+            counts["publish"] += 1
+            return
+        # 같은 글을 여러 스레드가 동시에 고치도록 한 사람의 최신 글을 If-Match로 수정한다.
+        listing = m._latest_owner_listing(cid, email)
+        if listing is None:
+            m.publish_listing(cid, "내 글 등록 가방", owner_email=email)
+            return
+        try:
+            rec, _ = m.publish_listing(
+                cid,
+                f"내 글 수정 {rng.randint(0, 999)} 가방",
+                owner_email=email,
+                target_recommendation_id=listing["id"],
+                expected_version=listing.get("version", 1),
+            )
+        except m.VersionConflictError:
+            counts["publish_conflict"] += 1
+            return
+        except ValueError:
+            # 그 사이 한도 초과로 밀려난 글
+            return
+        with lock:
+            own_updates[(cid, listing["id"])] = own_updates.get((cid, listing["id"]), 0) + 1
+        counts["publish_update"] += 1
+
+    @guarded
+    def reader(worker_id: int, rng: random.Random) -> None:
+        cid = rng.choice(categories)
+        recs = m.recommend(cid, rng.choice(["가방", "직거래", "수정", "코치 가방", ""]), mode="find")
+        for rec in recs:
+            try:
+                m.recommendation_detail(cid, rec.id, viewer_email=f"buyer{worker_id}@stress.local")
+            except KeyError:
+                # 추천 이후 한도 초과로 밀려난 글(404)
+                pass
+        m.list_user_listings(f"writer{worker_id % 3}@stress.local", today_only=False)
+        counts["recommend"] += 1
+
+    @guarded
+    def transitioner(worker_id: int, rng: random.Random) -> None:
+        cid = rng.choice(categories)
+        board = list(m.BOARD.get(cid, []))
+        if not board:
+            return
+        item = rng.choice(board[:10])
+        buyer = f"buyer{rng.randint(0, 5)}@stress.local"
+        try:
+            action = m.request_action(cid, item["id"], item["title"], requester_email=buyer)
+        except ValueError:
+            return
+        command, actor = rng.choice(
+            [("accept", item["owner_email"]), ("cancel", buyer), ("reject", item["owner_email"])]
+        )
+        try:
+            m.transition_action(action["id"], command, actor, expected_version=action["version"])
+            counts["transition"] += 1
+        except m.VersionConflictError:
+            counts["transition_conflict"] += 1
+        except (ValueError, PermissionError):
+            pass
+
+    roles = [publisher, reader, transitioner]
+    threads = [
+        threading.Thread(target=roles[idx % len(roles)], args=(idx,), daemon=True) for idx in range(max(3, args.threads))
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    errors: List[str] = []
+    _check_board(m, errors)
+    _check_actions(m, errors)
+    for (cid, item_id), updates in own_updates.items():
+        item = m._find_board_item(cid, item_id)
+        if item is not None and item.get("version", 1) < updates + 1:
+            errors.append(f"{item_id}: version {item.get('version')} lost updates ({updates} succeeded)")
+
+    print(f"{elapsed:.1f}s " + " ".join(f"{key}={value}" for key, value in sorted(counts.items())))
+    for failure in failures[:3]:
+        print(failure)
+    for error in errors[:20]:
+        print("FAIL", error)
+    if failures or errors:
+        sys.exit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()